@@ -19,7 +19,7 @@ kwargs = {'author': '',
  'maintainer': '',
  'maintainer_email': '',
  'name': 'plant_costsse',
- 'package_data': {'plant_costsse': []},
+ 'package_data': {'plant_costsse': ['data/*.npy', 'data/*.json']},
  'package_dir': {'': 'src'},
  'packages': ['plant_costsse'],
  'url': '',
@@ -30,8 +30,12 @@ kwargs = {'author': '',
 setup(**kwargs)
 
 # set up for landbased bos model
+import os
+import sys
 from distutils.core import setup
 from distutils.extension import Extension
+from distutils.command.build_ext import build_ext
+from distutils.errors import CCompilerError, DistutilsExecError, DistutilsPlatformError
 
 try:
     USE_CYTHON = True
@@ -47,6 +51,37 @@ extensions = [Extension('_landbos', ['src/plant_costsse/nrel_land_bosse/_landbos
 if USE_CYTHON:
     extensions = cythonize(extensions)
 
+
+class build_ext_openmp(build_ext):
+    """
+    Build _landbos with OpenMP so landBOS_batch runs in parallel, falling back to
+    the serial build if the compiler does not support it (or LANDBOS_OPENMP=0).
+    """
+
+    def build_extensions(self):
+
+        if os.environ.get('LANDBOS_OPENMP', '1') != '0':
+            msvc = self.compiler.compiler_type == 'msvc'
+            compile_args = ['/openmp'] if msvc else ['-fopenmp']
+            link_args = [] if msvc else ['-fopenmp']
+
+            for ext in self.extensions:
+                ext.extra_compile_args += compile_args
+                ext.extra_link_args += link_args
+
+            try:
+                build_ext.build_extensions(self)
+                return
+            except (CCompilerError, DistutilsExecError, DistutilsPlatformError):
+                sys.stderr.write('OpenMP build of _landbos failed, building serial version\n')
+
+            for ext in self.extensions:
+                ext.extra_compile_args = [a for a in ext.extra_compile_args if a not in compile_args]
+                ext.extra_link_args = [a for a in ext.extra_link_args if a not in link_args]
+
+        build_ext.build_extensions(self)
+
+
 setup(
     name='NREL_Land_BOSSE',
     description='a translation of the NREL landbased balance of station excel model',
@@ -55,5 +90,6 @@ setup(
     package_dir={'': 'src'},
     py_modules=['plant_costsse.nrel_land_bosse.nrel_land_bosse'],
     license='Apache License, Version 2.0',
-    ext_modules=extensions
+    ext_modules=extensions,
+    cmdclass={'build_ext': build_ext_openmp}
 )
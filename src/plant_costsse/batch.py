@@ -0,0 +1,51 @@
+"""
+batch.py
+
+Helpers for evaluating the vectorized cost models over large sweeps.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+
+def threaded_batch(func, inputs, n_threads=4, chunk_size=None, **options):
+    """
+    Evaluate the vectorized cost function func on a pool of threads.
+
+    The arrays in the dictionary inputs are broadcast together, flattened and split into
+    chunks; each thread calls func with one chunk plus options, and the dictionaries of
+    arrays it returns are joined back in the original order and shape.  options are
+    shared by all threads and must not be mutated by func.
+    """
+
+    names = list(inputs)
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(inputs[name])) for name in names])
+    shape = arrays[0].shape
+    flat = [a.ravel() for a in arrays]
+    n = flat[0].size
+
+    if chunk_size is None:
+        chunk_size = max(1, -(-n // n_threads))
+
+    def evaluate(start):
+        kwargs = dict(options)
+        for name, a in zip(names, flat):
+            kwargs[name] = a[start:start + chunk_size]
+        return func(**kwargs)
+
+    pool = ThreadPool(n_threads)
+    try:
+        results = pool.map(evaluate, range(0, max(n, 1), chunk_size))
+    finally:
+        pool.close()
+        pool.join()
+
+    out = {}
+    for key in results[0]:
+        value = np.concatenate([r[key] for r in results])
+        out[key] = value.reshape(shape + value.shape[1:])
+
+    return out
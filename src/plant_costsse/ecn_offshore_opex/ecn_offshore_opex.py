@@ -6,14 +6,15 @@ Copyright (c) NREL. All rights reserved.
 """
 
 from openmdao.main.api import Component, Assembly, VariableTree
-from openmdao.main.datatypes.api import Int, Bool, Float, Array, VarTree
+from openmdao.main.datatypes.api import Int, Bool, Float, Array, VarTree, Dict
 
 import numpy as np
 
 from fusedwind.plant_cost.fused_opex import OPEXVarTree, ExtendedOPEXAggregator, ExtendedOPEXModel, configure_extended_opex
 from fusedwind.interface import implement_base
 
-from ecnomXLS import ecnomXLS
+from ecnomPool import open_backend, ecn_input_cells, ecn_outputs, out_row0, out_row1, out_col
+
 
 @implement_base(ExtendedOPEXModel)
 class opex_ecn_assembly(Assembly):
@@ -25,15 +26,18 @@ class opex_ecn_assembly(Assembly):
     # parameters
     turbine_number = Int(100, iotype='in', desc = 'total number of wind turbines at the plant')
     project_lifetime = Float(20.0, iotype='in', desc = 'project lifetime for wind plant')
+    weather_cells = Dict(iotype='in', desc='further General input cells {(irow,icol): value}, e.g. site accessibility from ecnomWeather.weather_cells')
 
     # Outputs
     avg_annual_opex = Float(iotype='out', desc='Average annual Operating Expenditures for a wind plant over its lifetime')
     opex_breakdown = VarTree(OPEXVarTree(),iotype='out')
     availability  = Float(0.0, iotype='out', desc='Availability')
 
-    def __init__(self, ssfile=None):
+    def __init__(self, ssfile=None, backend='excel', cache=None):
         
         self.ssfile = ssfile
+        self.backend = backend
+        self.cache = cache
       
         Assembly.__init__(self)
 
@@ -41,12 +45,13 @@ class opex_ecn_assembly(Assembly):
 
         configure_extended_opex(self)
       
-        self.replace('opex', opex_ecn_offshore_component(self.ssfile))
+        self.replace('opex', opex_ecn_offshore_component(self.ssfile, self.backend, self.cache))
         
         self.connect('turbine_cost','opex.turbine_cost')
         self.connect('machine_rating','opex.machine_rating')
         self.connect('turbine_number','opex.turbine_number')
         self.connect('project_lifetime','opex.project_lifetime')
+        self.connect('weather_cells','opex.weather_cells')
 
         self.connect('opex.availability','availability')
 
@@ -61,23 +66,48 @@ class opex_ecn_offshore_component(Component):
     # parameters
     turbine_number = Int(100, iotype='in', desc = 'total number of wind turbines at the plant')
     project_lifetime = Float(20.0, iotype='in', desc = 'project lifetime for wind plant')
+    weather_cells = Dict(iotype='in', desc='further General input cells {(irow,icol): value}, e.g. site accessibility from ecnomWeather.weather_cells; must not overlap the plant input cells')
 
     # Outputs
     avg_annual_opex = Float(iotype='out', desc='Average annual Operating Expenditures for a wind plant over its lifetime')
     opex_breakdown = VarTree(OPEXVarTree(),iotype='out')
     availability  = Float(0.0, iotype='out', desc='Availability')
 
-    def __init__(self, ssfile=None):
+    def __init__(self, ssfile=None, backend='excel', cache=None):
         """
         OpenMDAO component to wrap ECN Offshore O&M Excel Model (ecnomXLS.py).
-        Call __init__ with a file name to override default ECN spreadsheet file
+        Call __init__ with a file name to override default ECN spreadsheet file.
+        backend='python' evaluates the workbook in-process (ecnomEngine.py) instead of through Excel.
+        cache names an SQLite file in which results are kept across runs (ecnomCache.py).
         """
         
         Component.__init__(self)
 
-        #open excel account
-        self.ecnxls = ecnomXLS(debug=False)
-        self.ecnxls.ssopen(ssfile)
+        #open excel account (or the in-process engine)
+        self.ecnxls = open_backend(backend, ssfile)
+
+        self.cache = None
+        if cache is not None:
+            from ecnomCache import ecnomCache
+            self.cache = ecnomCache(cache, ssfile, backend=backend)
+
+        # workbook value of every weather cell before it was first written, restored when
+        # the cell is dropped from weather_cells (the 'General' input cells hold constants)
+        self.original_cells = {}
+
+        self.reset_cache()
+
+    def reset_cache(self):
+        """
+        Forget the values last written to the spreadsheet, e.g. after it was modified
+        outside this component, so that the next execute rewrites every input cell
+        """
+
+        self.cell_cache = {}  # last value written to each 'General' input cell
+        self.last_inputs = None  # inputs of the previous call
+        self.output_cache = None  # OverviewResults I20:I56 for those inputs
+        self.writes_saved = 0
+        self.reads_saved = 0
 
     def execute(self):
         """
@@ -85,33 +115,65 @@ class opex_ecn_offshore_component(Component):
         """
         # print "In {0}.execute()...".format(self.__class__)
 
-        # Inputs - copy to spreadsheet
-
-        # set basic plant inputs        
-        self.ecnxls.setCell( 6,3,self.turbine_number)
-        self.ecnxls.setCell( 5,8,self.machine_rating)
-        self.ecnxls.setCell( 7,3,self.project_lifetime)
-
-        # set basic turbine inputs
-        self.invCosts = self.turbine_cost / self.machine_rating  # investment costs per kW
-        self.ecnxls.setCell( 6,8,self.invCosts)
-        
-        # Outputs - read from spreadsheet
-
-        self.availability = self.ecnxls.getCell(20,9)
-        self.avg_annual_opex      = self.ecnxls.getCell(56,9) * 1000
-        self.opex_breakdown.lease_opex = 21.0 * self.turbine_number * self.machine_rating # hack to include land lease costs not in ECN model, cost from COE Review 2011
-        self.avg_annual_opex += self.opex_breakdown.lease_opex
-
-        self.opex_breakdown.corrective_opex = self.ecnxls.getCell(51,9) * 1000 + self.ecnxls.getCell(52,9) * 1000
-        self.opex_breakdown.preventative_opex = self.ecnxls.getCell(53,9) * 1000
-        self.opex_breakdown.other_opex    = self.ecnxls.getCell(54,9) * 1000
+        # Inputs - copy the cells that changed since the last call to spreadsheet in one batch
+
+        inputs = ecn_input_cells(self.turbine_cost, self.machine_rating, self.turbine_number, self.project_lifetime)
+        self.invCosts = inputs[(6,8)]  # investment costs per kW
+
+        clash = sorted(set(self.weather_cells) & set(inputs))
+        if clash:
+            raise ValueError('weather_cells {} overlap the plant input cells of ecn_input_cells'.format(clash))
+        inputs.update(self.weather_cells)
+
+        for rc in self.weather_cells:
+            if rc not in self.original_cells:
+                self.original_cells[rc] = self.ecnxls.getInputCell(rc[0], rc[1])
+        cells = dict((rc, value) for rc, value in self.original_cells.items() if rc not in inputs)
+        cells.update(inputs)
+
+        if inputs == self.last_inputs:
+            self.writes_saved += len(inputs)
+            self.reads_saved += 1
+        else:
+            outputs = self.cache.get(inputs) if self.cache is not None else None
+
+            if outputs is None:
+                changed = dict((rc, value) for rc, value in cells.items()
+                               if rc not in self.cell_cache or self.cell_cache[rc] != value)
+                self.writes_saved += len(cells) - len(changed)
+
+                if changed:
+                    self.ecnxls.set_cells(changed)
+                    self.cell_cache.update(changed)
+                self.ecnxls.calculate_once()
+
+                # Outputs - read rows 20-56 of column I from spreadsheet in a single call
+                outputs = [row[0] for row in self.ecnxls.get_range('OverviewResults', out_row0, out_col, out_row1, out_col)]
+                if self.cache is not None:
+                    self.cache.put(inputs, outputs)
+            else:
+                self.writes_saved += len(inputs)
+                self.reads_saved += 1
+
+            self.last_inputs = inputs
+            self.output_cache = outputs
+
+        out = ecn_outputs(self.output_cache, self.machine_rating, self.turbine_number)
+
+        self.availability = out['availability']
+        self.avg_annual_opex      = out['avg_annual_opex']  # includes land lease costs not in ECN model
+        self.opex_breakdown.lease_opex = out['lease_opex']
+        self.opex_breakdown.corrective_opex = out['corrective_opex']
+        self.opex_breakdown.preventative_opex = out['preventative_opex']
+        self.opex_breakdown.other_opex    = out['other_opex']
         
     def close(self):
         """
         Close the spreadsheet inputs and clean up
         """
         self.ecnxls.ssclose()
+        if self.cache is not None:
+            self.cache.close()
 
 #----------------------------
 
@@ -0,0 +1,158 @@
+"""
+ecnomCache.py
+Persistent cache of ECN O&M spreadsheet results
+
+Results are stored in a local SQLite database, keyed on a hash of the
+workbook file contents, the backend that evaluated it and the values of the
+input cells, so repeated studies do not need to open the spreadsheet at all.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+def file_digest(filename, blocksize=1 << 20):
+    """
+    sha1 hex digest of the contents of a file
+    """
+
+    sha = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        block = f.read(blocksize)
+        while block:
+            sha.update(block)
+            block = f.read(blocksize)
+    return sha.hexdigest()
+
+
+def backend_name(backend):
+    """
+    name of an ecnomPool.open_backend backend: the string itself, or the
+    module-qualified name of a factory
+    """
+
+    if isinstance(backend, basestring):
+        return backend
+    return '{}.{}'.format(getattr(backend, '__module__', ''),
+                          getattr(backend, '__name__', type(backend).__name__))
+
+
+def _canonical(value):
+
+    if isinstance(value, basestring):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class ecnomCache(object):
+    '''
+    class ecnomCache:
+      on-disk store of ECN O&M results for (workbook, backend, input cells)
+
+      backend names the evaluator (ecnomPool.open_backend), so results of Excel
+      and of the in-process engine are never mixed.
+
+      Entries for a workbook whose contents changed are removed when the cache
+      is opened for it; the least recently used entries are evicted once
+      more than max_entries are stored.
+    '''
+
+    def __init__(self, dbfile, ssfile, max_entries=100000, backend='excel'):
+
+        self.dbfile = dbfile
+        self.ssfile = os.path.abspath(ssfile)
+        self.digest = file_digest(ssfile)
+        self.max_entries = max_entries
+        self.backend = backend_name(backend)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db = sqlite3.connect(dbfile, timeout=30.0)
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS results ('
+                            'workbook TEXT, digest TEXT, inputs TEXT, outputs TEXT, used REAL, '
+                            'PRIMARY KEY (digest, inputs))')
+            # drop results of earlier versions of this workbook
+            self.db.execute('DELETE FROM results WHERE workbook = ? AND digest != ?',
+                            (self.ssfile, self.digest))
+
+    def key(self, inputs):
+        """
+        canonical text of the backend and {(irow,icol): value} input cells; numbers
+        are written as floats, so 5, 5.0 and numpy.float64(5) share an entry
+        """
+
+        return json.dumps([self.backend, sorted([[int(rc[0]), int(rc[1])], _canonical(value)]
+                                                for rc, value in inputs.items())])
+
+    def get(self, inputs):
+        """
+        cached outputs for the input cells, or None
+        """
+
+        key = self.key(inputs)
+        row = self.db.execute('SELECT outputs FROM results WHERE digest = ? AND inputs = ?',
+                              (self.digest, key)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self.db:
+            self.db.execute('UPDATE results SET used = ? WHERE digest = ? AND inputs = ?',
+                            (time.time(), self.digest, key))
+        return json.loads(row[0])
+
+    def put(self, inputs, outputs):
+        """
+        store outputs (a list of cell values) for the input cells;
+        returns False if they cannot be stored (e.g. Excel error values)
+        """
+
+        try:
+            text = json.dumps(outputs)
+        except (TypeError, ValueError):
+            return False
+
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                            (self.ssfile, self.digest, self.key(inputs), text, time.time()))
+
+            n = self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            if n > self.max_entries:
+                self.db.execute('DELETE FROM results WHERE rowid IN '
+                                '(SELECT rowid FROM results ORDER BY used LIMIT ?)',
+                                (n - self.max_entries,))
+                self.evictions += n - self.max_entries
+        return True
+
+    def stats(self):
+        """
+        hit/miss statistics and number of stored entries
+        """
+
+        n = self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entries': n}
+
+    def clear(self):
+        """
+        remove all entries for this workbook
+        """
+
+        with self.db:
+            self.db.execute('DELETE FROM results WHERE workbook = ?', (self.ssfile,))
+
+    def close(self):
+
+        self.db.close()
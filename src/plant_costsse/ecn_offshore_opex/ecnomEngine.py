@@ -0,0 +1,1104 @@
+"""
+ecnomEngine.py
+Evaluates the ECN O&M spreadsheet in-process, without Excel
+
+The workbook is read once with openpyxl and its formulas are evaluated in
+Python, so the ECN model runs on any platform at in-memory speed.
+ecnomEngine offers the same interface as ecnomXLS.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import math
+import os
+import re
+import sys
+
+# cells read by opex_ecn_offshore_component.execute ('OverviewResults')
+output_cells = ((20, 9), (51, 9), (52, 9), (53, 9), (54, 9), (55, 9), (56, 9))
+
+# printCosts rows (revenue losses and repair costs), columns 4-9 ('OverviewResults')
+cost_rows = (24, 56)
+cost_cols = range(4, 10)
+
+#-------------------------------------------------------------------------
+# Values
+
+class ExcelError(Exception):
+    """
+    Excel error value (#DIV/0!, #VALUE!, ...) raised while evaluating a formula
+    and stored as the value of the cell it occurs in.
+    """
+
+    def __init__(self, code):
+        Exception.__init__(self, code)
+        self.code = code
+
+    def __eq__(self, other):
+        return isinstance(other, ExcelError) and other.code == self.code
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return self.code
+
+
+class Range(object):
+    """
+    Rectangular block of cell values.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def values(self):
+        return [value for row in self.rows for value in row]
+
+
+def col2num(letters):
+    num = 0
+    for c in letters.upper():
+        num = num*26 + ord(c) - ord('A') + 1
+    return num
+
+
+def num2col(num):
+    letters = ''
+    while num > 0:
+        num, rem = divmod(num - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def to_number(value):
+
+    if isinstance(value, ExcelError):
+        raise value
+    if isinstance(value, Range):
+        value = _single(value)
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, long, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        raise ExcelError('#VALUE!')
+
+
+def to_bool(value):
+
+    if isinstance(value, basestring):
+        if value.upper() in ('TRUE', 'FALSE'):
+            return value.upper() == 'TRUE'
+        raise ExcelError('#VALUE!')
+    return to_number(value) != 0.0
+
+
+def to_string(value):
+
+    if isinstance(value, ExcelError):
+        raise value
+    if isinstance(value, Range):
+        value = _single(value)
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value == int(value):
+        return str(int(value))
+    return unicode(value) if not isinstance(value, str) else value
+
+
+def _single(rng):
+
+    values = rng.values()
+    if len(values) != 1:
+        raise ExcelError('#VALUE!')
+    if isinstance(values[0], ExcelError):
+        raise values[0]
+    return values[0]
+
+
+def _scalar(value):
+
+    if isinstance(value, Range):
+        return _single(value)
+    if isinstance(value, ExcelError):
+        raise value
+    return value
+
+
+def _numbers(args):
+    """
+    Numbers in args the way SUM/MIN/MAX/AVERAGE see them: text and empty
+    cells inside ranges are skipped, direct arguments are converted.
+    """
+
+    out = []
+    for arg in args:
+        if isinstance(arg, Range):
+            for value in arg.values():
+                if isinstance(value, ExcelError):
+                    raise value
+                if isinstance(value, (int, long, float)) and not isinstance(value, bool):
+                    out.append(float(value))
+        else:
+            out.append(to_number(arg))
+    return out
+
+
+def _compare(op, a, b):
+
+    a = _scalar(a)
+    b = _scalar(b)
+    if a is None:
+        a = '' if isinstance(b, basestring) else 0.0
+    if b is None:
+        b = '' if isinstance(a, basestring) else 0.0
+    if isinstance(a, basestring) and isinstance(b, basestring):
+        a, b = a.lower(), b.lower()
+    elif isinstance(a, basestring) or isinstance(b, basestring):
+        # Excel orders numbers < text < booleans
+        a, b = (isinstance(a, basestring), a), (isinstance(b, basestring), b)
+    else:
+        a, b = float(a), float(b)
+
+    if op == '=':
+        return a == b
+    if op == '<>':
+        return a != b
+    if op == '<':
+        return a < b
+    if op == '>':
+        return a > b
+    if op == '<=':
+        return a <= b
+    return a >= b
+
+
+def _divide(a, b):
+
+    b = to_number(b)
+    if b == 0.0:
+        raise ExcelError('#DIV/0!')
+    return to_number(a) / b
+
+
+def _power(a, b):
+
+    try:
+        return math.pow(to_number(a), to_number(b))
+    except (ValueError, OverflowError):
+        raise ExcelError('#NUM!')
+
+
+_binary = {
+    '+': lambda a, b: to_number(a) + to_number(b),
+    '-': lambda a, b: to_number(a) - to_number(b),
+    '*': lambda a, b: to_number(a) * to_number(b),
+    '/': _divide,
+    '^': _power,
+    '&': lambda a, b: to_string(a) + to_string(b),
+}
+
+#-------------------------------------------------------------------------
+# Functions
+
+def _round(x, digits=0, mode=None):
+
+    x = to_number(x)
+    digits = int(to_number(digits))
+    scale = 10.0**digits
+    if mode == 'up':
+        return math.copysign(math.ceil(abs(x)*scale - 1e-9), x) / scale
+    if mode == 'down':
+        return math.copysign(math.floor(abs(x)*scale + 1e-9), x) / scale
+    # Excel rounds halves away from zero
+    return math.copysign(math.floor(abs(x)*scale + 0.5), x) / scale
+
+
+def _lookup_index(value, values, match_type):
+
+    value = _scalar(value)
+    if match_type == 0:
+        for i, v in enumerate(values):
+            if v is not None and _compare('=', v, value):
+                return i
+        raise ExcelError('#N/A')
+
+    # approximate match on sorted data
+    found = None
+    for i, v in enumerate(values):
+        if v is None or isinstance(v, basestring) != isinstance(value, basestring):
+            continue
+        if (match_type > 0 and _compare('<=', v, value)) or \
+           (match_type < 0 and _compare('>=', v, value)):
+            found = i
+        else:
+            break
+    if found is None:
+        raise ExcelError('#N/A')
+    return found
+
+
+def _vlookup(value, table, col, approximate=True):
+
+    col = int(to_number(col))
+    rows = table.rows
+    if col < 1 or col > len(rows[0]):
+        raise ExcelError('#REF!')
+    i = _lookup_index(value, [row[0] for row in rows], 1 if to_bool(approximate) else 0)
+    return rows[i][col - 1]
+
+
+def _hlookup(value, table, row, approximate=True):
+
+    row = int(to_number(row))
+    rows = table.rows
+    if row < 1 or row > len(rows):
+        raise ExcelError('#REF!')
+    i = _lookup_index(value, rows[0], 1 if to_bool(approximate) else 0)
+    return rows[row - 1][i]
+
+
+def _match(value, array, match_type=1):
+
+    return _lookup_index(value, array.values(), int(to_number(match_type))) + 1.0
+
+
+def _index(array, row, col=None):
+
+    rows = array.rows
+    row = int(to_number(row))
+    if col is None:
+        if len(rows) == 1:
+            row, col = 1, row
+        else:
+            col = 1
+    col = int(to_number(col))
+    if row < 1 or col < 1 or row > len(rows) or col > len(rows[0]):
+        raise ExcelError('#REF!')
+    return rows[row - 1][col - 1]
+
+
+def _sumproduct(*arrays):
+
+    columns = [[to_number(v) if isinstance(v, (int, long, float)) else 0.0
+                for v in a.values()] for a in arrays]
+    if len(set(len(c) for c in columns)) != 1:
+        raise ExcelError('#VALUE!')
+    return sum(reduce(lambda x, y: x*y, values) for values in zip(*columns))
+
+
+def _criterion(criterion):
+
+    criterion = _scalar(criterion)
+    if isinstance(criterion, basestring):
+        m = re.match(r'(<=|>=|<>|<|>|=)?(.*)$', criterion)
+        op, operand = m.group(1) or '=', m.group(2)
+        try:
+            operand = float(operand)
+        except ValueError:
+            pass
+        return lambda v: v is not None and _compare(op, v, operand)
+    return lambda v: v is not None and _compare('=', v, criterion)
+
+
+def _sumif(rng, criterion, sum_range=None):
+
+    test = _criterion(criterion)
+    values = rng.values()
+    sums = (sum_range or rng).values()
+    return sum(to_number(s) for v, s in zip(values, sums)
+               if test(v) and isinstance(s, (int, long, float)))
+
+
+def _countif(rng, criterion):
+
+    test = _criterion(criterion)
+    return float(sum(1 for v in rng.values() if test(v)))
+
+
+def _mod(a, b):
+
+    b = to_number(b)
+    if b == 0.0:
+        raise ExcelError('#DIV/0!')
+    a = to_number(a)
+    return a - b*math.floor(a/b)
+
+
+def _log(x, base=10.0):
+
+    x = to_number(x)
+    if x <= 0.0:
+        raise ExcelError('#NUM!')
+    return math.log(x, to_number(base))
+
+
+def _ln(x):
+
+    x = to_number(x)
+    if x <= 0.0:
+        raise ExcelError('#NUM!')
+    return math.log(x)
+
+
+def _sqrt(x):
+
+    x = to_number(x)
+    if x < 0.0:
+        raise ExcelError('#NUM!')
+    return math.sqrt(x)
+
+
+def _average(*args):
+
+    values = _numbers(args)
+    if not values:
+        raise ExcelError('#DIV/0!')
+    return sum(values) / len(values)
+
+
+def _choose(i, *options):
+
+    i = int(to_number(i))
+    if i < 1 or i > len(options):
+        raise ExcelError('#VALUE!')
+    return options[i - 1]
+
+
+def _count(*args):
+
+    n = 0
+    for arg in args:
+        values = arg.values() if isinstance(arg, Range) else [arg]
+        n += sum(1 for v in values if isinstance(v, (int, long, float)) and not isinstance(v, bool))
+    return float(n)
+
+
+def _counta(*args):
+
+    n = 0
+    for arg in args:
+        values = arg.values() if isinstance(arg, Range) else [arg]
+        n += sum(1 for v in values if v is not None)
+    return float(n)
+
+
+def _ceiling(x, significance=1.0):
+
+    x, significance = to_number(x), to_number(significance)
+    if significance == 0.0:
+        return 0.0
+    return math.ceil(x / significance) * significance
+
+
+def _floor(x, significance=1.0):
+
+    x, significance = to_number(x), to_number(significance)
+    if significance == 0.0:
+        raise ExcelError('#DIV/0!')
+    return math.floor(x / significance) * significance
+
+
+# functions whose arguments are all evaluated before the call
+functions = {
+    'SUM': lambda *args: sum(_numbers(args)),
+    'AVERAGE': _average,
+    'MIN': lambda *args: min(_numbers(args) or [0.0]),
+    'MAX': lambda *args: max(_numbers(args) or [0.0]),
+    'COUNT': _count,
+    'COUNTA': _counta,
+    'SUMPRODUCT': _sumproduct,
+    'SUMIF': _sumif,
+    'COUNTIF': _countif,
+    'AND': lambda *args: all(to_bool(v) for arg in args
+                             for v in (arg.values() if isinstance(arg, Range) else [arg])),
+    'OR': lambda *args: any(to_bool(v) for arg in args
+                            for v in (arg.values() if isinstance(arg, Range) else [arg])),
+    'NOT': lambda x: not to_bool(x),
+    'ABS': lambda x: abs(to_number(x)),
+    'SQRT': _sqrt,
+    'EXP': lambda x: math.exp(to_number(x)),
+    'LN': _ln,
+    'LOG': _log,
+    'LOG10': lambda x: _log(x, 10.0),
+    'POWER': _power,
+    'INT': lambda x: float(math.floor(to_number(x))),
+    'MOD': _mod,
+    'ROUND': _round,
+    'ROUNDUP': lambda x, digits=0: _round(x, digits, 'up'),
+    'ROUNDDOWN': lambda x, digits=0: _round(x, digits, 'down'),
+    'CEILING': _ceiling,
+    'FLOOR': _floor,
+    'PI': lambda: math.pi,
+    'VLOOKUP': _vlookup,
+    'HLOOKUP': _hlookup,
+    'MATCH': _match,
+    'INDEX': _index,
+    'CHOOSE': _choose,
+    'ISNUMBER': lambda x: isinstance(x, (int, long, float)) and not isinstance(x, bool),
+    'ISBLANK': lambda x: x is None,
+    'CONCATENATE': lambda *args: ''.join(to_string(a) for a in args),
+}
+
+#-------------------------------------------------------------------------
+# Formula compiler
+
+_tokens = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A))
+  | (?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][\w\.]*)!)?
+        (?:\$?[A-Za-z]{1,3}\$?[0-9]+(?::\$?[A-Za-z]{1,3}\$?[0-9]+)?
+          |\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}|\$?[0-9]+:\$?[0-9]+))(?![\w(])
+  | (?P<number>(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)
+  | (?P<func>[A-Za-z_][\w\.]*)\s*\(
+  | (?P<name>[A-Za-z_][\w\.]*)
+  | (?P<op><>|<=|>=|[-+*/^&=<>%(),;])
+""", re.X)
+
+_ref = re.compile(r"(?:(?P<sheet>'(?:[^']|'')+'|[^!]+)!)?"
+                  r"(?:\$?(?P<c1>[A-Za-z]{1,3})\$?(?P<r1>[0-9]+)"
+                  r"(?::\$?(?P<c2>[A-Za-z]{1,3})\$?(?P<r2>[0-9]+))?"
+                  r"|\$?(?P<cols1>[A-Za-z]{1,3}):\$?(?P<cols2>[A-Za-z]{1,3})"
+                  r"|\$?(?P<rows1>[0-9]+):\$?(?P<rows2>[0-9]+))$")
+
+# size of an Excel worksheet, the extent of whole-column (A:A) and whole-row (1:1) references
+max_rows = 1048576
+max_cols = 16384
+
+
+def tokenize(text):
+
+    pos = 0
+    tokens = []
+    while pos < len(text):
+        m = _tokens.match(text, pos)
+        if m is None:
+            raise SyntaxError('cannot parse formula {} at {}'.format(text, text[pos:]))
+        pos = m.end()
+        kind = m.lastgroup
+        if kind != 'ws':
+            tokens.append((kind, m.group(kind)))
+    return tokens
+
+
+def parse_ref(text, sheet):
+    """
+    (sheet, row1, col1, row2, col2) for an A1 style reference; whole columns (A:B)
+    and rows (1:2) extend to max_rows and max_cols.
+    """
+
+    m = _ref.match(text)
+    if m is None:
+        raise SyntaxError('invalid reference {}'.format(text))
+    if m.group('sheet'):
+        sheet = m.group('sheet')
+        if sheet.startswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    if m.group('cols1'):
+        c1, c2 = col2num(m.group('cols1')), col2num(m.group('cols2'))
+        return sheet, 1, min(c1, c2), max_rows, max(c1, c2)
+    if m.group('rows1'):
+        r1, r2 = int(m.group('rows1')), int(m.group('rows2'))
+        return sheet, min(r1, r2), 1, max(r1, r2), max_cols
+    r1, c1 = int(m.group('r1')), col2num(m.group('c1'))
+    if m.group('r2'):
+        r2, c2 = int(m.group('r2')), col2num(m.group('c2'))
+    else:
+        r2, c2 = r1, c1
+    return sheet, min(r1, r2), min(c1, c2), max(r1, r2), max(c1, c2)
+
+
+class Formula(object):
+    """
+    Excel formula compiled to a Python closure of the workbook.
+
+    Functions the engine does not implement and undefined names evaluate to
+    #NAME?, as in Excel; unsupported lists them.
+    """
+
+    def __init__(self, text, sheet, book):
+
+        self.text = text
+        self.sheet = sheet
+        self._book = book
+        self._tokens = tokenize(text.lstrip('='))
+        self._pos = 0
+        self.refs = []
+        self.unsupported = []
+        self.evaluate = self._comparison()
+        if self._pos != len(self._tokens):
+            raise SyntaxError('unexpected {} in formula {}'.format(self._peek()[1], text))
+        del self._tokens
+
+    def __repr__(self):
+        return 'Formula({!r})'.format(self.text)
+
+    def _peek(self):
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self._pos += 1
+        return token
+
+    def _expect(self, op):
+        kind, value = self._next()
+        if value != op:
+            raise SyntaxError('expected {} in formula {}'.format(op, self.text))
+
+    def _binary_level(self, operators, operand):
+        left = operand()
+        while self._peek()[0] == 'op' and self._peek()[1] in operators:
+            op = self._next()[1]
+            right = operand()
+            left = self._binary_node(op, left, right)
+        return left
+
+    def _binary_node(self, op, left, right):
+        if op in _binary:
+            f = _binary[op]
+            return lambda: f(_scalar(left()), _scalar(right()))
+        return lambda: _compare(op, left(), right())
+
+    def _comparison(self):
+        return self._binary_level(('=', '<>', '<', '>', '<=', '>='), self._concat)
+
+    def _concat(self):
+        return self._binary_level(('&',), self._additive)
+
+    def _additive(self):
+        return self._binary_level(('+', '-'), self._term)
+
+    def _term(self):
+        return self._binary_level(('*', '/'), self._power)
+
+    def _power(self):
+        return self._binary_level(('^',), self._percent)
+
+    def _percent(self):
+        node = self._unary()
+        while self._peek() == ('op', '%'):
+            self._next()
+            node = (lambda n: lambda: to_number(_scalar(n())) / 100.0)(node)
+        return node
+
+    def _unary(self):
+        if self._peek() == ('op', '-'):
+            self._next()
+            node = self._unary()
+            return lambda: -to_number(_scalar(node()))
+        if self._peek() == ('op', '+'):
+            self._next()
+            return self._unary()
+        return self._primary()
+
+    def _primary(self):
+
+        kind, value = self._next()
+
+        if kind == 'number':
+            number = float(value)
+            return lambda: number
+        if kind == 'string':
+            string = value[1:-1].replace('""', '"')
+            return lambda: string
+        if kind == 'error':
+            def error():
+                raise ExcelError(value)
+            return error
+        if kind == 'ref':
+            return self._reference(parse_ref(value, self.sheet))
+        if kind == 'name':
+            if value.upper() in ('TRUE', 'FALSE'):
+                flag = value.upper() == 'TRUE'
+                return lambda: flag
+            if value.upper() not in self._book.names:
+                return self._unsupported(value)
+            return self._reference(self._book.name_ref(value))
+        if kind == 'func':
+            return self._function(value.upper())
+        if (kind, value) == ('op', '('):
+            node = self._comparison()
+            self._expect(')')
+            return node
+
+        raise SyntaxError('unexpected {} in formula {}'.format(value, self.text))
+
+    def _reference(self, ref):
+
+        self.refs.append(ref)
+        book = self._book
+        sheet, r1, c1, r2, c2 = ref
+        if (r1, c1) == (r2, c2):
+            return lambda: book.value(sheet, r1, c1)
+        return lambda: book.range(sheet, r1, c1, r2, c2)
+
+    def _arguments(self):
+
+        args = []
+        if self._peek() == ('op', ')'):
+            self._next()
+            return args
+        while True:
+            if self._peek()[1] in (',', ';', ')'):
+                args.append(lambda: None)  # omitted argument
+            else:
+                args.append(self._comparison())
+            kind, value = self._next()
+            if value == ')':
+                return args
+            if value not in (',', ';'):
+                raise SyntaxError('expected , or ) in formula {}'.format(self.text))
+
+    def _function(self, name):
+
+        args = self._arguments()
+
+        # lazily evaluated functions
+        if name == 'IF':
+            def f():
+                if to_bool(_scalar(args[0]())):
+                    return args[1]() if len(args) > 1 else True
+                return args[2]() if len(args) > 2 else False
+            return f
+        if name == 'IFERROR':
+            def f():
+                try:
+                    return _scalar(args[0]())
+                except ExcelError:
+                    return args[1]()
+            return f
+        if name == 'ISERROR':
+            def f():
+                try:
+                    _scalar(args[0]())
+                    return False
+                except ExcelError:
+                    return True
+            return f
+
+        if name not in functions:
+            return self._unsupported(name + '()')
+
+        func = functions[name]
+        return lambda: func(*[a() for a in args])
+
+    def _unsupported(self, name):
+
+        self.unsupported.append(name)
+        def f():
+            raise ExcelError('#NAME?')
+        return f
+
+#-------------------------------------------------------------------------
+# Workbook
+
+class Workbook(object):
+    """
+    In-memory workbook: constant cells, formula cells and a cache of
+    computed values that is dropped whenever an input changes.
+
+    A formula is evaluated after the formula cells it refers to, which are found
+    with an explicit stack rather than by recursion, so chains of any length are
+    evaluated without reaching the Python recursion limit.
+
+    unsupported maps each formula cell using functions or names the engine does
+    not implement to their names; see unsupported_precedents.  Whole-column and
+    whole-row references are cut to the rows and columns in use on their sheet.
+    """
+
+    def __init__(self, cells=None, names=None):
+        """
+        cells maps (sheet, row, col) to a constant or to a formula string starting with '='.
+        names maps defined names to references such as 'General!$C$6'.
+        """
+
+        self.cells = {}
+        self.names = dict((k.upper(), v) for k, v in (names or {}).items())
+        self.sheets = {}
+        self._values = {}
+        self._active = set()
+        self._precedents = {}
+        self.unsupported = {}
+        self._extent = {}
+
+        for (sheet, row, col), value in (cells or {}).items():
+            self.set(sheet, row, col, value)
+
+    def _sheet(self, sheet):
+        return self.sheets.setdefault(sheet.lower(), sheet)
+
+    def set(self, sheet, row, col, value):
+        """
+        Store a constant or a formula ('=...') in a cell.
+        """
+
+        key = (self._sheet(sheet), row, col)
+        if isinstance(value, basestring) and value.startswith('=') and len(value) > 1:
+            value = Formula(value, key[0], self)
+        self.unsupported.pop(key, None)
+        if isinstance(value, Formula) and value.unsupported:
+            self.unsupported[key] = value.unsupported
+        if value is None:
+            self.cells.pop(key, None)
+        else:
+            self.cells[key] = value
+            rows, cols = self._extent.get(key[0], (0, 0))
+            self._extent[key[0]] = (max(rows, row), max(cols, col))
+        self._values.clear()
+        self._precedents.clear()
+
+    def name_ref(self, name):
+
+        if name.upper() not in self.names:
+            raise NotImplementedError('undefined name {}'.format(name))
+        return parse_ref(self.names[name.upper()].replace('$', ''), None)
+
+    def value(self, sheet, row, col):
+        """
+        Value of a cell, evaluating its formula (and those it depends on) if needed.
+        """
+
+        key = (self.sheets.get(sheet.lower(), sheet), row, col)
+        try:
+            value = self._values[key]
+        except KeyError:
+            value = self._evaluate(key)
+
+        if isinstance(value, ExcelError):
+            raise value
+        return value
+
+    def _evaluate(self, key):
+
+        cell = self.cells.get(key)
+        if not isinstance(cell, Formula):
+            return cell
+
+        for pending in self._evaluation_order(key):
+            self._compute(pending)
+        return self._values[key]
+
+    def _formula_cells(self, ref):
+        """
+        keys of the formula cells inside the reference (sheet, row1, col1, row2, col2)
+        """
+
+        sheet, r1, c1, r2, c2 = ref
+        sheet = self.sheets.get(sheet.lower(), sheet)
+        if (r2 - r1 + 1)*(c2 - c1 + 1) <= len(self.cells):
+            keys = ((sheet, row, col) for row in range(r1, r2 + 1) for col in range(c1, c2 + 1))
+            return [k for k in keys if isinstance(self.cells.get(k), Formula)]
+        return [k for k, cell in self.cells.items() if isinstance(cell, Formula) and
+                k[0] == sheet and r1 <= k[1] <= r2 and c1 <= k[2] <= c2]
+
+    def precedents(self, key):
+        """
+        formula cells the formula in cell key refers to
+        """
+
+        try:
+            return self._precedents[key]
+        except KeyError:
+            keys = []
+            for ref in self.cells[key].refs:
+                keys.extend(self._formula_cells(ref))
+            self._precedents[key] = keys
+            return keys
+
+    def unsupported_precedents(self, keys):
+        """
+        {cell: unsupported names} for the cells keys and every formula cell they depend on
+        """
+
+        found = {}
+        for key in keys:
+            if isinstance(self.cells.get(key), Formula):
+                for cell in self._evaluation_order(key, cached=False):
+                    if cell in self.unsupported:
+                        found[cell] = self.unsupported[cell]
+        return found
+
+    def _evaluation_order(self, key, cached=True):
+        """
+        Formula cells reachable from the formula in cell key, each after the cells it
+        refers to, by a depth-first search on an explicit stack.  With cached=True
+        cells whose value is known are left out.
+        """
+
+        order = []
+        done = {key: False}  # False while on the stack
+        stack = [(key, iter(self.precedents(key)))]
+
+        while stack:
+            node, precedents = stack[-1]
+            for dep in precedents:
+                if cached and dep in self._values:
+                    continue
+                if dep not in done:
+                    done[dep] = False
+                    stack.append((dep, iter(self.precedents(dep))))
+                    break
+                if not done[dep]:
+                    raise ValueError('circular reference at {}!{}{}'.format(dep[0], num2col(dep[2]), dep[1]))
+            else:
+                stack.pop()
+                done[node] = True
+                order.append(node)
+
+        return order
+
+    def _compute(self, key):
+
+        cell = self.cells[key]
+        if key in self._active:
+            raise ValueError('circular reference at {}!{}{}'.format(key[0], num2col(key[2]), key[1]))
+
+        self._active.add(key)
+        try:
+            value = _scalar(cell.evaluate())
+        except ExcelError as e:
+            value = e
+        finally:
+            self._active.discard(key)
+
+        if isinstance(value, bool):
+            pass
+        elif isinstance(value, (int, long)):
+            value = float(value)
+
+        self._values[key] = value
+        return value
+
+    def range(self, sheet, r1, c1, r2, c2):
+
+        rows, cols = self._extent.get(self.sheets.get(sheet.lower(), sheet), (r1, c1))
+        if r2 == max_rows:
+            r2 = max(r1, min(r2, rows))
+        if c2 == max_cols:
+            c2 = max(c1, min(c2, cols))
+
+        rows = []
+        for row in range(r1, r2 + 1):
+            values = []
+            for col in range(c1, c2 + 1):
+                try:
+                    values.append(self.value(sheet, row, col))
+                except ExcelError as e:
+                    values.append(e)
+            rows.append(values)
+        return Range(rows)
+
+
+def load_workbook(filename):
+    """
+    Read an .xlsx/.xlsm workbook with openpyxl.
+
+    Returns the Workbook together with a dictionary of the values Excel cached
+    for every formula cell when the file was last saved (used by ecnomEngine.verify).
+    """
+
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.xls':
+        raise ValueError('{}: the binary .xls format stores no readable formulas, '
+                         'save the workbook as .xlsx first'.format(filename))
+
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError('the headless ECN engine requires openpyxl to read {}'.format(filename))
+
+    formulas = openpyxl.load_workbook(filename, data_only=False)
+    cached = openpyxl.load_workbook(filename, data_only=True)
+
+    names = {}
+    defined = formulas.defined_names
+    for dn in getattr(defined, 'definedName', None) or list(getattr(defined, 'values', lambda: [])()):
+        if dn.localSheetId is None and dn.attr_text and '!' in dn.attr_text:
+            names[dn.name] = dn.attr_text
+
+    cells = {}
+    saved = {}
+    for ws in formulas.worksheets:
+        saved_ws = cached[ws.title]
+        for row in ws.iter_rows():
+            for cell in row:
+                value = getattr(cell.value, 'text', cell.value)  # array formulas
+                if value is None:
+                    continue
+                key = (ws.title, cell.row, cell.column if isinstance(cell.column, int) else col2num(cell.column))
+                cells[key] = value
+                if isinstance(value, basestring) and value.startswith('='):
+                    saved[key] = saved_ws.cell(row=key[1], column=key[2]).value
+
+    return Workbook(cells, names), saved
+
+#-------------------------------------------------------------------------
+
+class ecnomEngine(object):
+    '''
+    class ecnomEngine:
+      evaluates the ECN O&M spreadsheet without Excel
+
+      Offers the ecnomXLS interface: setCell() writes the 'General' worksheet
+      and getCell() reads 'OverviewResults'; cell indices are 1-based as in Excel.
+    '''
+
+    def __init__(self, debug=False):
+        self.debug = debug
+        self.book = None
+        self.saved = {}
+
+        # row indices into 'General' worksheet
+        self.i_price = 5
+        self.i_nturb = 6
+        self.i_lftim = 7
+
+        if (self.debug):
+            sys.stdout.write("Created ecnomEngine object\n")
+
+    def ssopen(self, ssfile=None):
+        """
+        read and compile the ECN O&M spreadsheet
+        """
+
+        if ssfile is None or not os.path.isfile(ssfile):
+            raise ValueError('No such file: {}'.format(ssfile))
+
+        self.xlsfile = ssfile
+        self.book, self.saved = load_workbook(ssfile)
+
+        if (self.debug):
+            sys.stdout.write("Read {} cells from {}\n".format(len(self.book.cells), ssfile))
+
+        self.check()
+
+    def check(self):
+        """
+        raise NotImplementedError listing the functions and names the engine does not
+        support in the formulas the output cells depend on; elsewhere they give #NAME?
+        """
+
+        sheet = self.book.sheets.get('overviewresults', 'OverviewResults')
+        cells = set(output_cells) | set((r, c) for r in cost_rows for c in cost_cols)
+        missing = self.book.unsupported_precedents([(sheet, row, col) for row, col in cells])
+        if missing:
+            raise NotImplementedError('{}: the ECN outputs depend on Excel functions or names the '
+                'engine does not support: {}'.format(getattr(self, 'xlsfile', 'workbook'), '; '.join(
+                '{}!{}{} uses {}'.format(key[0], num2col(key[2]), key[1], ', '.join(names))
+                for key, names in sorted(missing.items()))))
+
+    def ssclose(self):
+        """
+        release the workbook
+        """
+
+        self.book = None
+        self.saved = {}
+
+    def setCell(self, irow, icol, value):
+        """
+        set an input cell in the ECN O&M spreadsheet, 'General' worksheet
+        """
+
+        self.book.set('General', irow, icol, value)
+
+    def set_cells(self, cells, sheet='General'):
+        """
+        set several input cells, {(irow,icol): value, ...}
+        """
+
+        for (irow, icol), value in cells.items():
+            self.book.set(sheet, irow, icol, value)
+
+    def calculate_once(self):
+        """
+        formulas are evaluated on demand, so there is nothing to recalculate
+        """
+
+        pass
+
+    def get_range(self, sheet, irow0, icol0, irow1, icol1):
+        """
+        get the block of cells irow0..irow1, icol0..icol1 (inclusive) as a list of rows
+        """
+
+        return self.book.range(sheet, irow0, icol0, irow1, icol1).rows
+
+    def getCell(self, irow, icol):
+        """
+        get an output cell in the ECN O&M spreadsheet, 'OverviewResults' worksheet
+        """
+
+        return self.book.value('OverviewResults', irow, icol)
+
+    def getInputCell(self, irow, icol):
+        """
+        get an input cell in the ECN O&M spreadsheet, 'General' worksheet
+        """
+
+        return self.book.value('General', irow, icol)
+
+    def getCost(self):
+        """
+        return the value of cents/kWH from the ECN O&M spreadsheet, 'OverviewResults' worksheet
+        """
+
+        return self.getCell(3, 6)
+
+    def printCosts(self):
+        """
+        print calculated costs from the ECN O&M spreadsheet
+        returns revenue loss, repair costs and totals
+        """
+
+        block = self.get_range('OverviewResults', cost_rows[0], cost_cols[0], cost_rows[1], cost_cols[-1])
+        rl = block[0]
+        rc = block[-1]
+        ttl = [a + b for a, b in zip(rl, rc)]
+
+        head = ['Winter', 'Spring', 'Summer', 'Fall', 'Year', 'Total']
+        sys.stdout.write(' ' * 13 + ' '.join('{0:>6}'.format(h) for h in head) + '\n')
+        for label, values in (('Revenue Loss', rl), ('Repair Cost', rc), ('Total', ttl)):
+            sys.stdout.write('{0:12} '.format(label) +
+                             ' '.join('{0:6.0f}'.format(v) for v in values) + '\n')
+
+        return (rl, rc, ttl)
+
+    def verify(self, cells=None, rtol=1e-9):
+        """
+        Compare evaluated 'OverviewResults' cells with the values Excel cached in the
+        workbook (so call it before changing any inputs).  By default the cells read by
+        opex_ecn_offshore_component and printCosts are checked.
+
+        Returns a list of (row, col, evaluated, cached) for every mismatch.
+        """
+
+        if cells is None:
+            cells = set(output_cells) | set((r, c) for r in cost_rows for c in cost_cols)
+
+        mismatches = []
+        for row, col in sorted(cells):
+            cached = self.saved.get((self.book.sheets.get('overviewresults', 'OverviewResults'), row, col))
+            try:
+                value = self.getCell(row, col)
+            except ExcelError as e:
+                value = e
+            if isinstance(value, float) and isinstance(cached, (int, long, float)):
+                if abs(value - cached) <= rtol*max(abs(value), abs(cached), 1e-300):
+                    continue
+            elif value == cached:
+                continue
+            mismatches.append((row, col, value, cached))
+
+        return mismatches
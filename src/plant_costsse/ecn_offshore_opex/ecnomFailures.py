@@ -0,0 +1,133 @@
+"""
+ecnomFailures.py
+Monte Carlo simulation of turbine failures and repairs for offshore O&M
+
+Failures of each ECN fault type (wt_failfreq_row) are sampled for turbines x years
+as Poisson counts, repair downtimes as Gamma distributed sums of exponential repair
+times, and availability and corrective OPEX distributions are accumulated over
+realizations processed in chunks of bounded size.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import numpy as np
+
+from ecnomTables import wt_fault_types, wt_failfreq_row, wt_failfreq_col
+
+hours_per_year = 8760.0
+
+
+def _by_fault(values, name):
+    """
+    array in wt_fault_types order from a dict keyed by fault code (missing types are 0)
+    or from a sequence already in that order
+    """
+
+    if isinstance(values, dict):
+        unknown = set(values) - set(wt_fault_types)
+        if unknown:
+            raise ValueError('unknown ECN fault types in {}: {}'.format(name, ', '.join(sorted(unknown))))
+        return np.array([values.get(code, 0.0) for code in wt_fault_types], dtype=float)
+
+    values = np.asarray(values, dtype=float)
+    if values.shape != (len(wt_fault_types),):
+        raise ValueError('{} needs one value per ECN fault type ({})'.format(name, len(wt_fault_types)))
+    return values
+
+
+def failure_rates_from_workbook(ecn):
+    """
+    failure frequencies [1/turbine/yr] of the 'FaultTypesWT' worksheet of an open ecnomXLS or ecnomEngine
+    """
+
+    rows = [wt_failfreq_row[code] for code in wt_fault_types]
+    block = ecn.get_range('FaultTypesWT', min(rows), wt_failfreq_col, max(rows), wt_failfreq_col)
+    return dict((code, float(block[row - min(rows)][0] or 0.0)) for code, row in zip(wt_fault_types, rows))
+
+
+def simulate_failure_chunks(failure_rate, repair_time, repair_cost, turbine_number=100, years=20,
+                            realizations=1000, seed=0, chunk_size=None, max_samples=2**22):
+    """
+    Generator of Monte Carlo results for chunks of realizations.
+
+    failure_rate [1/turbine/yr], repair_time [h of downtime per failure, mean] and
+    repair_cost [USD per failure] are dictionaries keyed by ECN fault code (see
+    wt_failfreq_row) or arrays in wt_fault_types order.
+
+    Each chunk holds at most max_samples turbine-year-fault samples unless chunk_size
+    (realizations per chunk) is given.  Yields dictionaries of arrays over the chunk's
+    realizations: 'availability', 'corrective_opex' [USD/yr], 'failures' and
+    'downtime' [h] per fault type (n, len(wt_fault_types)).  Results are reproducible
+    for a given seed and chunk size.
+    """
+
+    rate = _by_fault(failure_rate, 'failure_rate')
+    mttr = _by_fault(repair_time, 'repair_time')
+    cost = _by_fault(repair_cost, 'repair_cost')
+    nfault = len(wt_fault_types)
+
+    if chunk_size is None:
+        chunk_size = max(1, int(max_samples // (turbine_number * years * nfault)))
+
+    for ichunk, start in enumerate(range(0, realizations, chunk_size)):
+        n = min(chunk_size, realizations - start)
+        rs = np.random.RandomState([seed, ichunk])
+
+        # failures per realization, turbine, year and fault type
+        failures = rs.poisson(rate, size=(n, turbine_number, years, nfault))
+
+        # downtime: sum of exponential repair times of the failures, capped at a year per turbine-year
+        downtime = np.zeros(failures.shape)
+        hit = failures > 0
+        downtime[hit] = rs.gamma(failures[hit], np.broadcast_to(mttr, failures.shape)[hit])
+        turbine_year = downtime.sum(axis=3)
+        capped = np.minimum(turbine_year, hours_per_year)
+        scale = np.where(turbine_year > 0.0, capped / np.where(turbine_year > 0.0, turbine_year, 1.0), 1.0)
+        downtime *= scale[..., np.newaxis]
+
+        failures = failures.sum(axis=(1, 2))
+        downtime = downtime.sum(axis=(1, 2))
+
+        yield {'availability': 1.0 - downtime.sum(axis=1) / (turbine_number * years * hours_per_year),
+               'corrective_opex': failures.dot(cost) / years,
+               'failures': failures,
+               'downtime': downtime}
+
+
+def simulate_failures(failure_rate, repair_time, repair_cost, turbine_number=100, years=20,
+                      realizations=1000, seed=0, chunk_size=None, max_samples=2**22,
+                      percentiles=(10, 50, 90)):
+    """
+    Availability and corrective OPEX distributions from simulate_failure_chunks.
+
+    Returns the per-realization 'availability' and 'corrective_opex' [USD/yr], the mean
+    'failures' and 'downtime' [h] per fault type over the plant lifetime, and the mean
+    and percentiles of availability and corrective OPEX.
+    """
+
+    availability = np.empty(realizations)
+    opex = np.empty(realizations)
+    failures = np.zeros(len(wt_fault_types))
+    downtime = np.zeros(len(wt_fault_types))
+
+    i = 0
+    for chunk in simulate_failure_chunks(failure_rate, repair_time, repair_cost, turbine_number, years,
+                                         realizations, seed, chunk_size, max_samples):
+        n = len(chunk['availability'])
+        availability[i:i + n] = chunk['availability']
+        opex[i:i + n] = chunk['corrective_opex']
+        failures += chunk['failures'].sum(axis=0)
+        downtime += chunk['downtime'].sum(axis=0)
+        i += n
+
+    out = {'availability': availability,
+           'corrective_opex': opex,
+           'failures': dict(zip(wt_fault_types, failures / realizations)),
+           'downtime': dict(zip(wt_fault_types, downtime / realizations)),
+           'availability_mean': availability.mean(),
+           'corrective_opex_mean': opex.mean()}
+    for p in percentiles:
+        out['availability_p{}'.format(p)] = np.percentile(availability, p)
+        out['corrective_opex_p{}'.format(p)] = np.percentile(opex, p)
+
+    return out
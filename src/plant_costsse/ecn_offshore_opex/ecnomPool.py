@@ -0,0 +1,266 @@
+"""
+ecnomPool.py
+Pool of worker processes, each holding its own open copy of the ECN O&M workbook
+
+Evaluations are dispatched to idle workers and returned in submission order;
+a worker that exceeds the task timeout (or dies) is restarted and its task retried.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import multiprocessing
+import time
+import traceback
+
+import numpy as np
+
+# 'OverviewResults' block read for every evaluation: column I, rows 20-56
+out_row0 = 20
+out_row1 = 56
+out_col = 9
+
+
+def ecn_input_cells(turbine_cost, machine_rating, turbine_number, project_lifetime):
+    """
+    'General' input cells {(irow,icol): value} of the ECN O&M spreadsheet for a plant
+    """
+
+    return {( 6,3): turbine_number,     # basic plant inputs
+            ( 5,8): machine_rating,
+            ( 7,3): project_lifetime,
+            ( 6,8): turbine_cost / machine_rating}  # investment costs per kW
+
+
+def ecn_outputs(col, machine_rating, turbine_number):
+    """
+    availability and OPEX [USD/yr] from the 'OverviewResults' I20:I56 values
+    """
+
+    cell = lambda irow: col[irow - out_row0]
+
+    lease_opex = 21.0 * turbine_number * machine_rating # hack to include land lease costs not in ECN model, cost from COE Review 2011
+
+    return {'availability': cell(20),
+            'avg_annual_opex': cell(56) * 1000 + lease_opex,
+            'lease_opex': lease_opex,
+            'corrective_opex': cell(51) * 1000 + cell(52) * 1000,
+            'preventative_opex': cell(53) * 1000,
+            'other_opex': cell(54) * 1000}
+
+
+def open_backend(backend, ssfile):
+    """
+    open the workbook with 'excel' (ecnomXLS), 'python' (ecnomEngine) or a
+    callable returning an object with the same interface
+    """
+
+    if backend == 'excel':
+        from ecnomXLS import ecnomXLS
+        ecn = ecnomXLS(debug=False)
+    elif backend == 'python':
+        from ecnomEngine import ecnomEngine
+        ecn = ecnomEngine(debug=False)
+    elif callable(backend):
+        ecn = backend()
+    else:
+        raise ValueError('Unknown ECN backend {}'.format(backend))
+
+    ecn.ssopen(ssfile)
+    return ecn
+
+
+def _worker(conn, ssfile, backend):
+    """
+    worker process: open the workbook once, then evaluate input cells sent over conn
+    """
+
+    try:
+        ecn = open_backend(backend, ssfile)
+    except Exception:
+        conn.send(('error', traceback.format_exc()))
+        return
+    conn.send(('ready', None))
+
+    written = {}
+    while True:
+        try:
+            cells = conn.recv()
+        except EOFError:
+            break
+        if cells is None:
+            break
+
+        try:
+            changed = dict((rc, v) for rc, v in cells.items() if rc not in written or written[rc] != v)
+            if changed:
+                ecn.set_cells(changed)
+                written.update(changed)
+            ecn.calculate_once()
+            col = [row[0] for row in ecn.get_range('OverviewResults', out_row0, out_col, out_row1, out_col)]
+            conn.send(('done', col))
+        except Exception:
+            written = {}
+            conn.send(('error', traceback.format_exc()))
+
+    try:
+        ecn.ssclose()
+    except Exception:
+        pass
+
+
+class _Worker(object):
+
+    def __init__(self, ssfile, backend):
+
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker, args=(child, ssfile, backend))
+        self.process.daemon = True
+        self.process.start()
+        child.close()
+
+        self.task = None
+        self.started = None
+
+        status, value = self.conn.recv()
+        if status != 'ready':
+            self.stop()
+            raise RuntimeError('ECN worker failed to open {}:\n{}'.format(ssfile, value))
+
+    def submit(self, task, cells):
+        self.task = task
+        self.started = time.time()
+        self.conn.send(cells)
+
+    def stop(self, kill=False):
+
+        if not kill:
+            try:
+                self.conn.send(None)
+            except (IOError, OSError):
+                kill = True
+        if kill:
+            self.process.terminate()
+        self.process.join(10.0)
+        self.conn.close()
+
+
+class ecnomPool(object):
+    '''
+    class ecnomPool:
+      n_workers processes with a warm copy of the ECN O&M workbook each
+
+      timeout [s] limits a single evaluation; a worker exceeding it is restarted
+      and the task retried up to retries times.
+    '''
+
+    def __init__(self, ssfile, n_workers=None, backend='excel', timeout=None, retries=1):
+
+        self.ssfile = ssfile
+        self.backend = backend
+        self.timeout = timeout
+        self.retries = retries
+        self.restarts = 0
+
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        self.workers = []
+        try:
+            for i in range(n_workers):
+                self.workers.append(_Worker(ssfile, backend))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        stop all workers
+        """
+
+        for w in self.workers:
+            w.stop(kill=w.task is not None)
+        self.workers = []
+
+    def _restart(self, i):
+
+        self.workers[i].stop(kill=True)
+        self.workers[i] = _Worker(self.ssfile, self.backend)
+        self.restarts += 1
+
+    def map_cells(self, tasks):
+        """
+        evaluate a list of {(irow,icol): value} input cell dictionaries and return the
+        'OverviewResults' I20:I56 values of each, in submission order
+        """
+
+        results = [None] * len(tasks)
+        errors = {}
+        attempts = [0] * len(tasks)
+        pending = list(range(len(tasks)))[::-1]
+
+        while pending or any(w.task is not None for w in self.workers):
+
+            for w in self.workers:
+                if w.task is None and pending:
+                    task = pending.pop()
+                    w.submit(task, tasks[task])
+
+            progressed = False
+            for i, w in enumerate(self.workers):
+                if w.task is None:
+                    continue
+
+                task = w.task
+                if w.conn.poll():
+                    status, value = w.conn.recv()
+                    w.task = None
+                    if status == 'done':
+                        results[task] = value
+                    else:
+                        errors[task] = value
+                    progressed = True
+                    continue
+
+                hung = self.timeout is not None and time.time() - w.started > self.timeout
+                if hung or not w.process.is_alive():
+                    self._restart(i)
+                    attempts[task] += 1
+                    if attempts[task] > self.retries:
+                        errors[task] = 'worker timed out' if hung else 'worker died'
+                    else:
+                        pending.append(task)
+                    progressed = True
+
+            if not progressed:
+                time.sleep(0.001)
+
+        if errors:
+            task = min(errors)
+            raise RuntimeError('{} of {} ECN evaluations failed; first (task {}):\n{}'.format(
+                len(errors), len(tasks), task, errors[task]))
+
+        return results
+
+    def evaluate(self, turbine_cost, machine_rating, turbine_number=100, project_lifetime=20.0):
+        """
+        availability and OPEX breakdown for (broadcast) arrays of plant inputs,
+        returned as a dictionary of arrays
+        """
+
+        arrays = np.broadcast_arrays(np.asarray(turbine_cost, dtype=float), np.asarray(machine_rating, dtype=float),
+                                     np.asarray(turbine_number), np.asarray(project_lifetime, dtype=float))
+        shape = arrays[0].shape
+        points = list(zip(*[a.ravel().tolist() for a in arrays]))
+
+        cols = self.map_cells([ecn_input_cells(*p) for p in points])
+
+        out = {}
+        for p, col in zip(points, cols):
+            for key, value in ecn_outputs(col, p[1], p[2]).items():
+                out.setdefault(key, []).append(value)
+        return dict((key, np.array(values).reshape(shape)) for key, values in out.items())
@@ -0,0 +1,357 @@
+"""
+ecnomSurrogate.py
+Adaptive radial basis function surrogate of the ECN offshore OPEX outputs
+
+The ECN O&M model is sampled over user given input bounds, a cubic RBF with a
+linear tail is fitted to every output, and new samples are added where the
+leave-one-out error estimate is largest until it drops below a tolerance.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import warnings
+
+from openmdao.main.api import Component
+from openmdao.main.datatypes.api import Int, Float, VarTree
+
+import numpy as np
+
+from fusedwind.plant_cost.fused_opex import OPEXVarTree, ExtendedOPEXAggregator
+from fusedwind.interface import implement_base
+
+surrogate_inputs = ('turbine_cost', 'machine_rating', 'turbine_number', 'project_lifetime')
+surrogate_outputs = ('preventative_opex', 'corrective_opex', 'lease_opex', 'other_opex',
+                     'avg_annual_opex', 'availability')
+default_inputs = {'turbine_number': 100, 'project_lifetime': 20.0}
+
+
+class RBFInterpolant(object):
+    """
+    Cubic radial basis function interpolant with a linear polynomial tail,
+    s(x) = sum_i w_i |x - x_i|^3 + c_0 + c^T x, for several outputs at once.
+    """
+
+    def __init__(self, X, Y):
+
+        self.X = np.array(X, dtype=float)
+        Y = np.array(Y, dtype=float)
+        n, d = self.X.shape
+
+        P = np.hstack([np.ones((n, 1)), self.X])
+        M = np.zeros((n + d + 1, n + d + 1))
+        M[:n, :n] = self._phi(self._distance(self.X))
+        M[:n, n:] = P
+        M[n:, :n] = P.T
+
+        self.Minv = np.linalg.inv(M)
+        self.coef = self.Minv.dot(np.vstack([Y, np.zeros((d + 1, Y.shape[1]))]))
+
+    @staticmethod
+    def _phi(r):
+        return r**3
+
+    def _distance(self, x):
+        return np.sqrt(((x[:, np.newaxis, :] - self.X[np.newaxis, :, :])**2).sum(axis=2))
+
+    def __call__(self, x):
+        """
+        values (k, m) at points x (k, d)
+        """
+
+        x = np.atleast_2d(x)
+        n = self.X.shape[0]
+        return self._phi(self._distance(x)).dot(self.coef[:n]) + self.coef[n] + x.dot(self.coef[n + 1:])
+
+    def gradient(self, x):
+        """
+        gradients (k, m, d) at points x (k, d)
+        """
+
+        x = np.atleast_2d(x)
+        n = self.X.shape[0]
+        diff = x[:, np.newaxis, :] - self.X[np.newaxis, :, :]  # (k, n, d)
+        r = np.sqrt((diff**2).sum(axis=2))
+        dphi = 3.0 * r[:, :, np.newaxis] * diff  # d|x - x_i|^3/dx
+        return np.einsum('knd,nm->kmd', dphi, self.coef[:n]) + self.coef[n + 1:].T[np.newaxis, :, :]
+
+    def loo_errors(self):
+        """
+        leave-one-out errors (n, m) at the samples (Rippa's formula)
+        """
+
+        n = self.X.shape[0]
+        return self.coef[:n] / np.diag(self.Minv)[:n, np.newaxis]
+
+
+class ecnomSurrogate(object):
+    '''
+    class ecnomSurrogate:
+      RBF response surface of the ECN offshore OPEX outputs
+
+      names are the inputs varied within [lower, upper]; the remaining inputs
+      are held at the values in fixed.  error holds the largest leave-one-out
+      error of each output, an estimate of the interpolation error bound, and
+      relative_error the largest of them relative to the range of its output
+      (set by fit_surrogate, None if unknown).
+    '''
+
+    def __init__(self, names, lower, upper, fixed, X, Y, relative_error=None):
+
+        self.names = tuple(names)
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.fixed = dict(fixed)
+        self.X = np.asarray(X, dtype=float)
+        self.Y = np.asarray(Y, dtype=float)
+
+        self.rbf = RBFInterpolant(self._scale(self.X), self.Y)
+        loo = np.abs(self.rbf.loo_errors())
+        self.error = dict(zip(surrogate_outputs, loo.max(axis=0)))
+        self.sample_error = loo
+        self.relative_error = relative_error
+
+    def _scale(self, x):
+        return (x - self.lower) / (self.upper - self.lower)
+
+    def check(self, **inputs):
+        """
+        raise ValueError if an input differs from the value it was held at in fixed,
+        and warn if a varied input lies outside [lower, upper] (extrapolation)
+        """
+
+        for name, value in inputs.items():
+            if name in self.fixed and np.any(np.asarray(value, dtype=float) != self.fixed[name]):
+                raise ValueError('the ECN surrogate was fitted with {} = {}, not {}'.format(
+                    name, self.fixed[name], value))
+
+        for name, lower, upper in zip(self.names, self.lower, self.upper):
+            value = np.asarray(inputs[name], dtype=float)
+            if np.any(value < lower) or np.any(value > upper):
+                warnings.warn('{} = {} is outside the range [{}, {}] of the ECN surrogate, '
+                              'its outputs are extrapolated'.format(name, value, lower, upper))
+
+    def evaluate(self, **inputs):
+        """
+        outputs (and their gradients with respect to the varied inputs) for
+        broadcast arrays of the varied inputs; returns (values, gradients)
+        dictionaries of arrays shaped like the inputs (gradients gain a last
+        axis ordered like names).  Inputs are validated by check.
+        """
+
+        self.check(**inputs)
+        arrays = np.broadcast_arrays(*[np.asarray(inputs[name], dtype=float) for name in self.names])
+        shape = arrays[0].shape
+        x = self._scale(np.column_stack([a.ravel() for a in arrays]))
+
+        y = self.rbf(x)
+        dy = self.rbf.gradient(x) / (self.upper - self.lower)
+
+        values = dict((name, y[:, j].reshape(shape)) for j, name in enumerate(surrogate_outputs))
+        gradients = dict((name, dy[:, j, :].reshape(shape + (len(self.names),)))
+                         for j, name in enumerate(surrogate_outputs))
+        return values, gradients
+
+    def save(self, filename):
+        """
+        write the surrogate to a compressed .npz file
+        """
+
+        np.savez_compressed(filename, names=np.array(self.names), lower=self.lower, upper=self.upper,
+                            fixed_names=np.array(sorted(self.fixed)),
+                            fixed_values=np.array([self.fixed[k] for k in sorted(self.fixed)], dtype=float),
+                            X=self.X, Y=self.Y,
+                            relative_error=np.nan if self.relative_error is None else self.relative_error)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        read a surrogate written by save
+        """
+
+        data = np.load(filename)
+        fixed = dict(zip([str(k) for k in data['fixed_names']], data['fixed_values']))
+        relative_error = float(data['relative_error']) if 'relative_error' in data.files else np.nan
+        return cls([str(k) for k in data['names']], data['lower'], data['upper'], fixed, data['X'], data['Y'],
+                   None if np.isnan(relative_error) else relative_error)
+
+
+def component_evaluator(component):
+    """
+    evaluate function for fit_surrogate running an opex_ecn_offshore_component point by point
+    """
+
+    def evaluate(**inputs):
+        arrays = np.broadcast_arrays(*[np.asarray(inputs[name]) for name in surrogate_inputs])
+        out = dict((name, []) for name in surrogate_outputs)
+        for point in zip(*[a.ravel().tolist() for a in arrays]):
+            for name, value in zip(surrogate_inputs, point):
+                setattr(component, name, value)
+            component.run()
+            out['avg_annual_opex'].append(component.avg_annual_opex)
+            out['availability'].append(component.availability)
+            for name in surrogate_outputs[:4]:
+                out[name].append(getattr(component.opex_breakdown, name))
+        return dict((name, np.array(values)) for name, values in out.items())
+
+    return evaluate
+
+
+def fit_surrogate(evaluate, bounds, fixed=None, n_initial=None, n_max=200, batch=None, tol=1e-3, seed=0):
+    """
+    Sample the ECN OPEX model and fit an ecnomSurrogate, refining adaptively.
+
+    evaluate(turbine_cost=..., machine_rating=..., turbine_number=..., project_lifetime=...)
+    takes arrays of inputs and returns a dictionary of output arrays, e.g.
+    ecnomPool(...).evaluate or component_evaluator(opex_ecn_offshore_component(...)).
+    bounds maps the varied inputs to (lower, upper); the others are held at fixed
+    (default: 100 turbines, 20 year lifetime).
+
+    Samples are added in batches where the leave-one-out error of the nearest
+    sample, relative to the range of each output, times the distance to it is largest,
+    until the largest relative error is below tol or n_max samples were taken.
+    """
+
+    names = [name for name in surrogate_inputs if name in bounds]
+    d = len(names)
+    lower = np.array([bounds[name][0] for name in names], dtype=float)
+    upper = np.array([bounds[name][1] for name in names], dtype=float)
+
+    fixed = dict((k, v) for k, v in dict(default_inputs, **(fixed or {})).items() if k not in bounds)
+    for name in surrogate_inputs:
+        if name not in bounds and name not in fixed:
+            raise ValueError('no bounds or fixed value for {}'.format(name))
+
+    if n_initial is None:
+        n_initial = max(4 * d, d + 2)
+    if batch is None:
+        batch = max(1, d)
+
+    rs = np.random.RandomState(seed)
+
+    def sample(u):
+        # unit cube points -> inputs (whole turbines) -> outputs
+        x = lower + u * (upper - lower)
+        if 'turbine_number' in names:
+            i = names.index('turbine_number')
+            x[:, i] = np.round(x[:, i])
+        kwargs = dict(fixed)
+        kwargs.update((name, x[:, i]) for i, name in enumerate(names))
+        out = evaluate(**kwargs)
+        return x, np.column_stack([np.asarray(out[name], dtype=float).ravel() for name in surrogate_outputs])
+
+    # Latin hypercube start
+    u = (np.argsort(rs.rand(n_initial, d), axis=0) + rs.rand(n_initial, d)) / n_initial
+    X, Y = sample(u)
+
+    while True:
+        model = ecnomSurrogate(names, lower, upper, fixed, X, Y)
+
+        scale = np.ptp(Y, axis=0)
+        scale[scale == 0.0] = 1.0
+        err = (model.sample_error / scale).max(axis=1)
+        if err.max() <= tol or len(X) >= n_max:
+            model.relative_error = err.max()
+            return model
+
+        # greedy batch selection among random candidates
+        candidates = rs.rand(200 * d, d)
+        dist = model.rbf._distance(candidates)
+        nearest = dist.argmin(axis=1)
+        dmin = dist[np.arange(len(candidates)), nearest]
+        score = dmin * err[nearest]
+
+        chosen = []
+        for k in range(min(batch, n_max - len(X))):
+            j = score.argmax()
+            if score[j] <= 0.0:
+                break
+            chosen.append(j)
+            dnew = np.sqrt(((candidates - candidates[j])**2).sum(axis=1))
+            score = np.where(dnew < dmin, dnew * err[nearest], score)
+            dmin = np.minimum(dmin, dnew)
+
+        if not chosen:
+            model.relative_error = err.max()
+            return model
+
+        x, y = sample(candidates[chosen])
+        keep = [i for i in range(len(x)) if not (X == x[i]).all(axis=1).any()]
+        if not keep:
+            model.relative_error = err.max()
+            return model
+        X = np.vstack([X, x[keep]])
+        Y = np.vstack([Y, y[keep]])
+
+#-------------------------------------------------------------------------
+
+@implement_base(ExtendedOPEXAggregator)
+class opex_ecn_surrogate_component(Component):
+    """ Evaluates an RBF surrogate of the ECN O&M spreadsheet """
+
+    # variables
+    turbine_cost = Float(units='USD', iotype='in', desc = 'turbine system capital costs')
+    machine_rating = Float(units='kW', iotype='in', desc= 'wind turbine rated power')
+
+    # parameters
+    turbine_number = Int(100, iotype='in', desc = 'total number of wind turbines at the plant')
+    project_lifetime = Float(20.0, iotype='in', desc = 'project lifetime for wind plant')
+
+    # Outputs
+    avg_annual_opex = Float(iotype='out', desc='Average annual Operating Expenditures for a wind plant over its lifetime')
+    opex_breakdown = VarTree(OPEXVarTree(),iotype='out')
+    availability  = Float(0.0, iotype='out', desc='Availability')
+    opex_error = Float(0.0, units='USD', iotype='out', desc='largest leave-one-out error of avg_annual_opex in the surrogate')
+    relative_error = Float(0.0, iotype='out', desc='largest leave-one-out error of the surrogate relative to the range of each output')
+
+    def __init__(self, surrogate):
+        """
+        OpenMDAO drop-in for opex_ecn_offshore_component.
+        Call __init__ with an ecnomSurrogate or the file it was saved to.
+        turbine_number and project_lifetime must equal the values the surrogate was
+        fitted at unless it varies them; execute raises ValueError otherwise.
+        """
+
+        Component.__init__(self)
+
+        if not isinstance(surrogate, ecnomSurrogate):
+            surrogate = ecnomSurrogate.load(surrogate)
+        self.surrogate = surrogate
+
+        #controls what happens if derivatives are missing
+        self.missing_deriv_policy = 'assume_zero'
+
+    def execute(self):
+        """
+        Evaluates the surrogate and its gradients with respect to the inputs.
+        """
+
+        values, gradients = self.surrogate.evaluate(**dict((name, getattr(self, name))
+                                                           for name in surrogate_inputs))
+
+        for name in surrogate_outputs[:4]:
+            setattr(self.opex_breakdown, name, float(values[name]))
+        self.avg_annual_opex = float(values['avg_annual_opex'])
+        self.availability = float(values['availability'])
+        self.opex_error = float(self.surrogate.error['avg_annual_opex'])
+        if self.surrogate.relative_error is not None:
+            self.relative_error = float(self.surrogate.relative_error)
+
+        # rows: list_deriv_vars outputs, columns: list_deriv_vars inputs
+        inputs = self.list_deriv_vars()[0]
+        self.J = np.zeros((len(surrogate_outputs), len(inputs)))
+        for i, name in enumerate(surrogate_outputs):
+            for j, var in enumerate(inputs):
+                if var in self.surrogate.names:
+                    self.J[i, j] = gradients[name][self.surrogate.names.index(var)]
+
+    def list_deriv_vars(self):
+
+        inputs = ['turbine_cost', 'machine_rating', 'project_lifetime']
+        outputs = ['opex_breakdown.preventative_opex', 'opex_breakdown.corrective_opex', 'opex_breakdown.lease_opex', \
+                  'opex_breakdown.other_opex', 'avg_annual_opex', 'availability']
+
+        return inputs, outputs
+
+    def provideJ(self):
+
+        return self.J
@@ -0,0 +1,62 @@
+"""
+ecnomTables.py
+Layout of the ECN O&M spreadsheet: worksheet names and fault types
+
+Kept separate from ecnomXLS.py so that models which use the ECN fault
+categories do not need Excel.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+# shnums - sheet names and corresponding numbers in ECN O&M spreadsheet
+#   Most inputs will be on sheet 'General' (5)
+#   Most outputs are read from sheet 'OverviewResults' (12)
+
+shnums = {     
+    'Data'            :  1, 
+    'Definition'      :  2, 
+    'Fitting'         :  3, 
+    'WorkDays'        :  4, 
+    'General'         :  5, 
+    'FaultTypesWT'    :  6, 
+    'FaultTypesBOP'   :  7, 
+    'Equipment'       :  8, 
+    'FixedCosts'      :  9, 
+    'LowIntervals'    : 10, 
+    'DataSeason'      : 11, 
+    'OverviewResults' : 12, 
+    'Costs_yr'        : 13, 
+    'Costs_win'       : 14, 
+    'Costs_spr'       : 15, 
+    'Costs_sum'       : 16, 
+    'Costs_aut'       : 17, 
+    'Costs_yr_graphs' : 18, 
+    'Application'     : 19 
+ }
+
+# Failure frequencies are found in sheet 'FaultTypesWT'
+ 
+wt_failfreq_col = 2
+wt_failfreq_row = {
+    'MDA10' :  19, # Rotor system - blades
+    'MDA20' :  27, # Rotor system - Hub
+    'MDC'   :  35, # Blade adjustment
+    'MDK10' :  43, # Drive train - main shaft/bearing
+    'MDK30' :  51, # Drive train - brake system
+    'MDL'   :  59, # Yaw gearbox
+    'MDX'   :  67, # Hydraulic system
+    'MDY'   :  75, # Control and protection system turbine
+    'MKA'   :  83, # Generator 
+    'MKY'   :  91, # Control and protection system generator
+    'MSA'   :  99, # Generator lead / transmission cables
+    'MST'   : 107, # Transformer
+    'MUD'   : 115, # Machinery enclosure
+    'UMD'   : 123, # Turbine structure / tower
+    'XA'    : 131, # Heating, ventilation, air conditioning
+    'XM'    : 139, # Crane system
+    'AB'    : 147, # Lightning protection / grounding
+    'MD'    : 155, # Remote Resets
+    }
+
+# fault types in spreadsheet order
+wt_fault_types = tuple(sorted(wt_failfreq_row, key=wt_failfreq_row.get))
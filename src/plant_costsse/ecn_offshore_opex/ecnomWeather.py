@@ -0,0 +1,176 @@
+"""
+ecnomWeather.py
+Weather window statistics for offshore maintenance access
+
+Hourly significant wave height and wind speed series are read from memory-mapped
+files in chunks, in a single pass, and reduced to seasonal accessibility, counts of
+weather windows of at least a given length within a vessel's limits, and waiting
+time distributions until the next such window.  The seasons follow the ECN O&M
+spreadsheet ('Costs_win', 'Costs_spr', 'Costs_sum', 'Costs_aut', 'Costs_yr').
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import numpy as np
+
+seasons = ('win', 'spr', 'sum', 'aut', 'yr')
+hours_per_year = 8766.0  # including leap years
+
+
+def open_metocean(filename, n_columns=2, dtype='float32'):
+    """
+    memory-map a met-ocean series: a .npy file, or raw binary with n_columns values
+    (wave height [m], wind speed [m/s]) per hour; leading site axes are allowed in .npy files
+    """
+
+    if filename.endswith('.npy'):
+        return np.load(filename, mmap_mode='r')
+    return np.memmap(filename, dtype=dtype, mode='r').reshape(-1, n_columns)
+
+
+def _season(start, hours):
+    """
+    season index (0 winter ... 3 autumn) of hours counted from the datetime64 start
+    """
+
+    month = (start + hours).astype('datetime64[M]').astype(int) % 12  # 0 = January
+    return ((month + 1) % 12) // 3
+
+
+class WeatherWindows(object):
+    '''
+    class WeatherWindows:
+      single-pass accumulator of weather window statistics for one site
+
+      An hour is accessible when the wave height is at most hs_max and the wind
+      speed at most ws_max; a window is a run of at least min_hours accessible hours.
+      Feed consecutive chunks of the series with add() and read the statistics
+      with results().
+    '''
+
+    def __init__(self, hs_max, ws_max, min_hours, start='2000-01-01T00', max_wait=24 * 90):
+
+        self.hs_max = hs_max
+        self.ws_max = ws_max
+        self.min_hours = int(min_hours)
+        self.start = np.datetime64(start, 'h')
+        self.max_wait = int(max_wait)
+
+        self.n = 0  # hours processed
+        self.last_closed = -1  # last inaccessible hour
+        self.pending = 0  # first hour whose next window start is not known yet
+
+        self.hours = np.zeros(4)
+        self.accessible = np.zeros(4)
+        self.windows = np.zeros(4)
+        self.wait_sum = np.zeros(4)
+        self.wait_hist = np.zeros((4, self.max_wait + 1))
+
+    def add(self, wave_height, wind_speed):
+        """
+        process the next consecutive hours of the series
+        """
+
+        wave_height = np.asarray(wave_height)
+        m = len(wave_height)
+        if m == 0:
+            return
+
+        hours = self.n + np.arange(m)
+        season = _season(self.start, hours)
+        ok = (wave_height <= self.hs_max) & (np.asarray(wind_speed) <= self.ws_max)
+
+        self.hours += np.bincount(season, minlength=4)
+        self.accessible += np.bincount(season[ok], minlength=4)
+
+        # length of the accessible run ending at each hour
+        closed = np.maximum.accumulate(np.where(ok, -1, hours))
+        closed = np.maximum(closed, self.last_closed)
+        run = hours - closed
+        self.last_closed = closed[-1]
+
+        # a run reaching min_hours completes a window that started min_hours-1 hours earlier
+        N = self.min_hours
+        starts = hours[run >= N] - (N - 1)
+        new = starts[run[run >= N] == N]
+        self.windows += np.bincount(_season(self.start, new), minlength=4)
+
+        if len(starts):
+            self._waits(starts)
+
+        self.n += m
+
+    def _waits(self, starts):
+
+        # waiting time of each pending hour until the next window start
+        t = np.arange(self.pending, starts[-1] + 1)
+        wait = starts[np.searchsorted(starts, t)] - t
+        season = _season(self.start, t)
+
+        np.add.at(self.wait_sum, season, wait)
+        np.add.at(self.wait_hist, (season, np.minimum(wait, self.max_wait)), 1.0)
+        self.pending = starts[-1] + 1
+
+    def results(self):
+        """
+        per season ('win', 'spr', 'sum', 'aut', 'yr') arrays of hours, accessibility
+        (fraction of accessible hours), windows and windows_per_year, mean_wait [h]
+        until the next window start, the wait_histogram (waits of max_wait hours or more
+        in the last bin) and censored hours with no window start before the series ended
+        """
+
+        def with_year(a):
+            return np.concatenate([a, [a.sum(axis=0)]])
+
+        hours = with_year(self.hours)
+        waited = with_year(self.wait_hist.sum(axis=1))
+        censored = with_year(np.bincount(_season(self.start, np.arange(self.pending, self.n)), minlength=4)
+                             if self.n > self.pending else np.zeros(4))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {'hours': hours,
+                    'accessibility': with_year(self.accessible) / hours,
+                    'windows': with_year(self.windows),
+                    'windows_per_year': with_year(self.windows) / (self.n / hours_per_year),
+                    'mean_wait': with_year(self.wait_sum) / waited,
+                    'wait_histogram': with_year(self.wait_hist),
+                    'censored': censored}
+
+
+def weather_windows(series, hs_max, ws_max, min_hours, start='2000-01-01T00', max_wait=24 * 90,
+                    chunk_hours=24 * 365):
+    """
+    weather window statistics (see WeatherWindows.results) of an (hours, 2) series of
+    wave height and wind speed, e.g. from open_metocean, read chunk_hours at a time
+    """
+
+    ww = WeatherWindows(hs_max, ws_max, min_hours, start, max_wait)
+    for i in range(0, series.shape[0], chunk_hours):
+        chunk = np.asarray(series[i:i + chunk_hours])
+        ww.add(chunk[:, 0], chunk[:, 1])
+    return ww.results()
+
+
+def site_weather_windows(series, hs_max, ws_max, min_hours, start='2000-01-01T00', max_wait=24 * 90,
+                         chunk_hours=24 * 365):
+    """
+    weather_windows for each site of a (sites, hours, 2) series; returns a dictionary
+    of arrays with a leading site axis
+    """
+
+    out = {}
+    for site in range(series.shape[0]):
+        stats = weather_windows(series[site], hs_max, ws_max, min_hours, start, max_wait, chunk_hours)
+        for key, value in stats.items():
+            out.setdefault(key, []).append(value)
+    return dict((key, np.array(values)) for key, values in out.items())
+
+
+def weather_cells(stats, layout):
+    """
+    ECN 'General' input cells from weather window statistics: layout maps
+    (irow, icol) to (statistic, season), e.g. {(12,3): ('accessibility', 'win')};
+    the result can be assigned to opex_ecn_offshore_component.weather_cells
+    """
+
+    return dict((rc, float(stats[name][seasons.index(season)])) for rc, (name, season) in layout.items())
@@ -10,62 +10,35 @@ Copyright (c) NREL. All rights reserved.
 """
 
 import sys, os
+import warnings
 from commonse.xcel_wrapper import ExcelWrapper
 
 #import win32com.client as win32
 
-# shnums - sheet names and corresponding numbers in ECN O&M spreadsheet
-#   Most inputs will be on sheet 'General' (5)
-#   Most outputs are read from sheet 'OverviewResults' (12)
-
-shnums = {     
-    'Data'            :  1, 
-    'Definition'      :  2, 
-    'Fitting'         :  3, 
-    'WorkDays'        :  4, 
-    'General'         :  5, 
-    'FaultTypesWT'    :  6, 
-    'FaultTypesBOP'   :  7, 
-    'Equipment'       :  8, 
-    'FixedCosts'      :  9, 
-    'LowIntervals'    : 10, 
-    'DataSeason'      : 11, 
-    'OverviewResults' : 12, 
-    'Costs_yr'        : 13, 
-    'Costs_win'       : 14, 
-    'Costs_spr'       : 15, 
-    'Costs_sum'       : 16, 
-    'Costs_aut'       : 17, 
-    'Costs_yr_graphs' : 18, 
-    'Application'     : 19 
- }
-
-# Failure frequencies are found in sheet 'FaultTypesWT'
- 
-wt_failfreq_col = 2
-wt_failfreq_row = {
-    'MDA10' :  19, # Rotor system - blades
-    'MDA20' :  27, # Rotor system - Hub
-    'MDC'   :  35, # Blade adjustment
-    'MDK10' :  43, # Drive train - main shaft/bearing
-    'MDK30' :  51, # Drive train - brake system
-    'MDL'   :  59, # Yaw gearbox
-    'MDX'   :  67, # Hydraulic system
-    'MDY'   :  75, # Control and protection system turbine
-    'MKA'   :  83, # Generator 
-    'MKY'   :  91, # Control and protection system generator
-    'MSA'   :  99, # Generator lead / transmission cables
-    'MST'   : 107, # Transformer
-    'MUD'   : 115, # Machinery enclosure
-    'UMD'   : 123, # Turbine structure / tower
-    'XA'    : 131, # Heating, ventilation, air conditioning
-    'XM'    : 139, # Crane system
-    'AB'    : 147, # Lightning protection / grounding
-    'MD'    : 155, # Remote Resets
-    }
+# sheet names/numbers and fault type tables of the ECN O&M spreadsheet
+from ecnomTables import shnums, wt_failfreq_col, wt_failfreq_row
 
 #euro = u"\u20AC"
 
+xlCalculationManual = -4135
+
+def _column_runs(cells):
+    """
+    group {(irow,icol): value} into runs of vertically adjacent cells,
+    yielding ((irow,icol), [values]) for the top cell of each run
+    """
+
+    run = None
+    for (irow, icol) in sorted(cells, key=lambda rc: (rc[1], rc[0])):
+        if run is not None and icol == run[0][1] and irow == run[0][0] + len(run[1]):
+            run[1].append(cells[(irow, icol)])
+            continue
+        if run is not None:
+            yield run
+        run = ((irow, icol), [cells[(irow, icol)]])
+    if run is not None:
+        yield run
+
 #-------------------------------------------------------------------------
     
 class ecnomXLS(object):
@@ -86,6 +59,9 @@ class ecnomXLS(object):
     def __init__(self,debug=False):
         self.debug = debug
         self.xcel = ExcelWrapper()
+        self.dirty = False
+        self.calcmode = None
+        self.wb = None  # COM workbook for range access, see _open_workbook
         
         # row indices into 'General' worksheet    
         self.i_price = 5
@@ -119,6 +95,13 @@ class ecnomXLS(object):
             res = self.xcel.openWorkbook(self.xlsfile)
             if res != 0:
                 return res
+
+            # recalculate only on request (calculate_once) instead of after every write
+            self.wb = self._open_workbook()
+            wb = self._workbook()
+            if wb is not None:
+                self.calcmode = wb.Application.Calculation
+                wb.Application.Calculation = xlCalculationManual
             
     #        if (self.debug):    
     #            print "Found %d sheets" % self.ss.Sheets.Count
@@ -133,6 +116,13 @@ class ecnomXLS(object):
         close the ECN O&M spreadsheet
         """
 
+        # restore the calculation mode of the Excel session
+        wb = self._workbook()
+        if wb is not None and self.calcmode is not None:
+            wb.Application.Calculation = self.calcmode
+            self.calcmode = None
+        self.wb = None
+
         # Close spreadsheet without saving
         self.xcel.closeWorkbook()       
 #        self.ss.Close(False)
@@ -148,6 +138,7 @@ class ecnomXLS(object):
         set an input cell in the ECN O&M spreadsheet, 'General' worksheet
         """
         res = self.xcel.setCell(irow, icol, value, "General")
+        self.dirty = True
 
 #        self.ss.Activate()
 #        self.xl.Worksheets("General").Activate()
@@ -171,6 +162,7 @@ class ecnomXLS(object):
        
         #return (value)
 #        return (self.ss.Worksheets(shnums['OverviewResults']).Cells(irow,icol).Value)
+        self.calculate_once()
         cval = self.xcel.getCell(irow, icol, "OverviewResults")
         return cval
     #-----------------------
@@ -183,6 +175,92 @@ class ecnomXLS(object):
         cval = self.xcel.getCell(irow, icol, "General")
         return cval
     
+    #-----------------------
+
+    def _open_workbook(self):
+        """
+        COM workbook object of the spreadsheet the Excel wrapper opened, bound by its
+        file name through win32com (ExcelWrapper does not expose it).  Returns None
+        with a warning if it cannot be bound: cells are then written and read one at
+        a time through the wrapper and Excel recalculates after every write.
+        """
+
+        try:
+            import win32com.client
+            wb = win32com.client.GetObject(os.path.abspath(self.xlsfile))
+            wb.Worksheets("General")
+            return wb
+        except Exception as e:
+            warnings.warn('cannot reach the Excel workbook {} through COM ({}); ECN cells will be '
+                          'accessed one at a time, with automatic recalculation'.format(self.xlsfile, e))
+            return None
+
+    def _workbook(self):
+        """
+        COM workbook object for range access (None if it could not be bound)
+        """
+
+        return self.wb
+
+    #-----------------------
+
+    def set_cells(self, cells, sheet="General"):
+        """
+        set several input cells, {(irow,icol): value, ...}, of the ECN O&M spreadsheet.
+        Adjacent cells in a column are written together as one range; the spreadsheet
+        is recalculated once by the next calculate_once() or read.
+        """
+
+        wb = self._workbook()
+        if wb is None:
+            for (irow, icol), value in cells.items():
+                self.xcel.setCell(irow, icol, value, sheet)
+            self.dirty = True
+            return
+
+        sh = wb.Worksheets(sheet)
+        for (irow, icol), values in _column_runs(cells):
+            cell = sh.Cells(irow, icol)
+            rng = sh.Range(cell, sh.Cells(irow + len(values) - 1, icol))
+            rng.Value = tuple((v,) for v in values)
+        self.dirty = True
+
+    #-----------------------
+
+    def calculate_once(self):
+        """
+        recalculate the ECN O&M spreadsheet if any inputs were written since the last recalculation
+        """
+
+        if not self.dirty:
+            return
+
+        wb = self._workbook()
+        if wb is not None:
+            wb.Application.Calculate()
+        self.dirty = False
+
+    #-----------------------
+
+    def get_range(self, sheet, irow0, icol0, irow1, icol1):
+        """
+        get the block of cells irow0..irow1, icol0..icol1 (inclusive) of a worksheet
+        as a list of rows, recalculating first if inputs changed
+        """
+
+        self.calculate_once()
+
+        wb = self._workbook()
+        if wb is None:
+            return [[self.xcel.getCell(irow, icol, sheet) for icol in range(icol0, icol1 + 1)]
+                    for irow in range(irow0, irow1 + 1)]
+
+        sh = wb.Worksheets(sheet)
+        values = sh.Range(sh.Cells(irow0, icol0), sh.Cells(irow1, icol1)).Value
+        if not isinstance(values, tuple):  # single cell
+            return [[values]]
+        return [list(row) for row in values]
+
     #-----------------------    
         
     def getCost(self):
@@ -208,11 +286,14 @@ class ecnomXLS(object):
         iRowRL = 24 # revenue losses
         iRowRC = 56 # repair costs
         
-        rl = []
-        rc = []
-        ttl = []
         head = ['Winter', 'Spring', 'Summer', 'Fall', 'Year', 'Total']
         
+        # both rows in a single read
+        block = self.get_range("OverviewResults", iRowRL, 4, iRowRC, 9)
+        rl = list(block[0])
+        rc = list(block[iRowRC - iRowRL])
+        ttl = [a + b for a, b in zip(rl, rc)]
+
         print ' ' * 12,
         for h in head:
             if h != None:
@@ -220,26 +301,17 @@ class ecnomXLS(object):
         print 
         
         print '{0:12}'.format('Revenue Loss'),
-        for i in range(4,10):
-            val = self.xcel.getCell(iRowRL,i,"OverviewResults")
-#            val = sh.Cells(iRowRL,i).Value
-            rl.append(val)
+        for val in rl:
             print "{0:6.0f} ".format(val),
         print
         
         print '{0:12}'.format("Repair Cost"),
-        for i in range(4,10):
-            val = self.xcel.getCell(iRowRC,i,"OverviewResults")
-#            val = sh.Cells(iRowRC,i).Value
-            rc.append(val)
+        for val in rc:
             print "{0:6.0f} ".format(val),
         print
         
         print '{0:12}'.format("Total"),
-        for i in range(4,10):
-            val = self.xcel.getCell(iRowRL,i,"OverviewResults") + self.xcel.getCell(iRowRC,i,"OverviewResults")
-#            val = sh.Cells(iRowRL,i).Value+sh.Cells(iRowRC,i).Value
-            ttl.append(val)
+        for val in ttl:
             print "{0:6.0f} ".format(val),
         print
 
@@ -0,0 +1,427 @@
+"""
+escalation.py
+
+Cached producer price index (PPI) escalators for the NREL Cost and Scaling Model modules.
+
+The PPI data of commonse is only loaded when an escalator is first computed.  Escalators
+for the CSM indices can also be compiled once into a binary store (build_escalator_store)
+that is memory-mapped on first use, so new processes start without parsing the PPI
+tables and forked workers share its pages.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import copy
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# PPI indices used by the CSM BOS and OPEX models
+csm_indices = ('IPPI_FND', 'IPPI_LEL', 'IPPI_RDC', 'IPPI_LAI', 'IPPI_TPT', 'IPPI_LPM',
+               'IPPI_MPF', 'IPPI_OAI', 'IPPI_PAE', 'IPPI_STP', 'IPPI_OPM', 'IPPI_OEL',
+               'IPPI_LOM', 'IPPI_LLR', 'IPPI_LSE', 'IPPI_OOM', 'IPPI_OLR')
+
+# reference (year, month) pairs used by the CSM BOS and OPEX models
+csm_references = ((2002, 9), (2002, 3), (2003, 9))
+
+# compiled escalator store, see build_escalator_store
+store_file = os.environ.get('PLANT_COSTSSE_PPI_STORE',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ppi_escalators.npy'))
+
+
+class EscalatorCache(object):
+    """
+    Bounded LRU cache of PPI escalators keyed on
+    (index, reference year, reference month, current year, current month).
+
+    Escalators are computed on a private copy of the PPI object so the
+    module-global commonse.config.ppi is never modified; without a source
+    it is imported on the first miss.
+    """
+
+    def __init__(self, source=None, maxsize=4096):
+
+        self.source = None if source is None else copy.copy(source)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, code, ref_yr, ref_mon, curr_yr, curr_mon):
+
+        key = (code, int(ref_yr), int(ref_mon), int(curr_yr), int(curr_mon))
+
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                value = self._values.pop(key)
+                self._values[key] = value
+                return value
+
+            self.misses += 1
+            if self.source is None:
+                from commonse.config import ppi
+                self.source = copy.copy(ppi)
+            self.source.ref_yr, self.source.ref_mon = key[1], key[2]
+            self.source.curr_yr, self.source.curr_mon = key[3], key[4]
+            value = self.source.compute(code)
+
+            self._values[key] = value
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+        return value
+
+    def __len__(self):
+
+        return len(self._values)
+
+    def clear(self):
+
+        with self._lock:
+            self._values.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class EscalatorTable(object):
+    """
+    Dense table of escalators for every index and reference date over a range of years,
+    so a lookup is a single array indexing operation.
+
+    values[index, reference, year - first_year, month - 1]
+    """
+
+    def __init__(self, first_year, last_year, codes=csm_indices, references=csm_references, cache=None):
+
+        if cache is None:
+            cache = EscalatorCache(maxsize=0)
+
+        self.first_year = first_year
+        self.last_year = last_year
+        self.codes = dict((code, i) for i, code in enumerate(codes))
+        self.references = dict((ref, i) for i, ref in enumerate(references))
+
+        years = range(first_year, last_year + 1)
+        self.values = np.empty((len(codes), len(references), len(years), 12))
+        for i, code in enumerate(codes):
+            for j, (ref_yr, ref_mon) in enumerate(references):
+                for k, year in enumerate(years):
+                    for month in range(1, 13):
+                        self.values[i, j, k, month - 1] = cache(code, ref_yr, ref_mon, year, month)
+
+    def save(self, filename):
+        """
+        write the values to a .npy file and the indices, references and years
+        to a .json file beside it
+        """
+
+        np.save(filename, np.ascontiguousarray(self.values))
+        codes = sorted(self.codes, key=self.codes.get)
+        references = sorted(self.references, key=self.references.get)
+        with open(os.path.splitext(filename)[0] + '.json', 'w') as f:
+            json.dump({'first_year': self.first_year, 'last_year': self.last_year,
+                       'codes': codes, 'references': [list(r) for r in references]}, f)
+
+    @classmethod
+    def load(cls, filename, mmap_mode='r'):
+        """
+        read a table written by save; by default the values are memory-mapped read-only
+        """
+
+        with open(os.path.splitext(filename)[0] + '.json') as f:
+            meta = json.load(f)
+
+        table = cls.__new__(cls)
+        table.first_year = meta['first_year']
+        table.last_year = meta['last_year']
+        table.codes = dict((str(code), i) for i, code in enumerate(meta['codes']))
+        table.references = dict((tuple(ref), i) for i, ref in enumerate(meta['references']))
+        table.values = np.load(filename, mmap_mode=mmap_mode)
+
+        shape = (len(table.codes), len(table.references), table.last_year - table.first_year + 1, 12)
+        if table.values.shape != shape:
+            raise ValueError('{} holds escalators of shape {}, expected {}'.format(
+                filename, table.values.shape, shape))
+
+        return table
+
+    def covers(self, code, ref_yr, ref_mon, year):
+        """
+        True if the table holds the index, reference date and every year requested.
+        """
+
+        return code in self.codes and (ref_yr, ref_mon) in self.references and \
+            np.all((year >= self.first_year) & (year <= self.last_year))
+
+    def lookup(self, code, ref_yr, ref_mon, year, month):
+
+        return self.values[self.codes[code], self.references[ref_yr, ref_mon],
+                           np.asarray(year, dtype=int) - self.first_year, np.asarray(month, dtype=int) - 1]
+
+
+class EscalationContext(object):
+    """
+    Immutable source of price escalators for the CSM models.
+
+    The context owns a read-only EscalatorTable for first_year to last_year built
+    from a private copy of the PPI data, so lookups never touch shared mutable
+    state and one context can be used by any number of threads without locking.
+    """
+
+    __slots__ = ('first_year', 'last_year', '_table')
+
+    def __init__(self, first_year=2000, last_year=2030, source=None):
+
+        table = EscalatorTable(first_year, last_year, cache=EscalatorCache(source, maxsize=0))
+        table.values.flags.writeable = False
+
+        object.__setattr__(self, 'first_year', first_year)
+        object.__setattr__(self, 'last_year', last_year)
+        object.__setattr__(self, '_table', table)
+
+    @classmethod
+    def from_table(cls, table):
+        """
+        context using an existing EscalatorTable (e.g. the memory-mapped store) without copying it
+        """
+
+        context = object.__new__(cls)
+        if table.values.flags.writeable:
+            table.values.flags.writeable = False
+        object.__setattr__(context, 'first_year', table.first_year)
+        object.__setattr__(context, 'last_year', table.last_year)
+        object.__setattr__(context, '_table', table)
+
+        return context
+
+    def __setattr__(self, name, value):
+
+        raise AttributeError('EscalationContext is immutable')
+
+    def escalators(self, code, ref_yr, ref_mon, year, month):
+        """
+        Escalators of PPI index code from the reference date to each (year, month).
+        """
+
+        year = np.asarray(year)
+        if not self._table.covers(code, ref_yr, ref_mon, year):
+            raise ValueError('{} from {}/{} is not available for years outside {}-{}'.format(
+                code, ref_mon, ref_yr, self.first_year, self.last_year))
+
+        return self._table.lookup(code, ref_yr, ref_mon, year, month)
+
+
+cache = EscalatorCache()
+table = None
+
+_context = None
+_context_lock = threading.Lock()
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def escalator_store():
+    """
+    EscalatorTable memory-mapped from store_file on first use, or None if there is no store.
+    """
+
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = EscalatorTable.load(store_file) if os.path.exists(store_file) else False
+
+    return _store or None
+
+
+def build_escalator_store(filename=None, first_year=2000, last_year=2030):
+    """
+    Compile the escalators of every CSM index and reference date for first_year to
+    last_year from the commonse PPI data into a binary store (default store_file).
+    Run as 'python -m plant_costsse.escalation [first-last]'.
+    """
+
+    filename = store_file if filename is None else filename
+    if os.path.dirname(filename) and not os.path.isdir(os.path.dirname(filename)):
+        os.makedirs(os.path.dirname(filename))
+
+    table = EscalatorTable(first_year, last_year)
+    table.save(filename)
+
+    return table
+
+
+def default_context():
+    """
+    Shared EscalationContext for 2000-2030, built on first use; the compiled
+    store is used when it covers these years.
+    """
+
+    global _context
+    with _context_lock:
+        if _context is None:
+            store = escalator_store()
+            if store is not None and store.first_year <= 2000 and store.last_year >= 2030 and \
+                    all(store.covers(code, ref[0], ref[1], 2000) for code in csm_indices for ref in csm_references):
+                _context = EscalationContext.from_table(store)
+            else:
+                _context = EscalationContext()
+
+    return _context
+
+
+def precompute_escalators(first_year, last_year):
+    """
+    Build the module escalator table for all CSM indices between first_year and last_year.
+    Setting PLANT_COSTSSE_PPI_YEARS='first-last' builds it at import time.
+    """
+
+    global table
+    table = EscalatorTable(first_year, last_year)
+
+    return table
+
+
+def escalators(code, ref_yr, ref_mon, year, month):
+    """
+    Escalators of PPI index code from the reference date to each (year, month).
+    year and month may be arrays; the table (or else the compiled store) is used when
+    it covers the request and the cache is consulted once per distinct date otherwise.
+    """
+
+    year = np.asarray(year)
+    month = np.asarray(month)
+
+    if table is not None and table.covers(code, ref_yr, ref_mon, year):
+        return table.lookup(code, ref_yr, ref_mon, year, month)
+
+    store = escalator_store()
+    if store is not None and store.covers(code, ref_yr, ref_mon, year):
+        return store.lookup(code, ref_yr, ref_mon, year, month)
+
+    dates, inverse = np.unique(year.astype(int) * 12 + month.astype(int) - 1, return_inverse=True)
+    values = np.array([cache(code, ref_yr, ref_mon, date // 12, date % 12 + 1) for date in dates])
+
+    return values[inverse].reshape(year.shape)
+
+
+class _UnitEscalation(object):
+    """
+    Escalation context returning 1 for one (index, reference year, reference month)
+    term and 0 for every other; term None makes every escalator 0.  With record=True
+    every escalator is 1 and the terms requested are collected.
+    """
+
+    def __init__(self, term=None, record=False):
+
+        self.term = term
+        self.record = record
+        self.terms = []
+
+    def escalators(self, code, ref_yr, ref_mon, year, month):
+
+        key = (code, ref_yr, ref_mon)
+        if self.record:
+            if key not in self.terms:
+                self.terms.append(key)
+            return np.ones(np.shape(year))
+
+        return np.full(np.shape(year), 1.0 if key == self.term else 0.0)
+
+
+class BaseYearCosts(object):
+    """
+    Costs kept in reference-year dollars per PPI index, so they can be escalated
+    to any date without evaluating the cost equations again.
+
+    terms lists the (index, reference year, reference month) of every component, the
+    last term None holding costs that are not escalated (e.g. a share of turbine_cost);
+    values maps each cost field to an array whose last axis follows terms.
+    """
+
+    def __init__(self, terms, values):
+
+        self.terms = list(terms)
+        self.values = values
+
+    def escalators(self, year=2009, month=12, context=None):
+        """
+        escalator of every term to (year, month), with a trailing term axis
+        """
+
+        lookup = context.escalators if context is not None else escalators
+        year, month = np.broadcast_arrays(np.asarray(year), np.asarray(month))
+        return np.stack([lookup(term[0], term[1], term[2], year, month) if term is not None else
+                         np.ones(year.shape) for term in self.terms], axis=-1)
+
+    def escalate(self, year=2009, month=12, context=None):
+        """
+        Costs of every field in (year, month) dollars; year and month may be scalars
+        or arrays broadcasting against the stored results.
+        """
+
+        E = self.escalators(year, month, context)
+        return dict((field, (values * E).sum(axis=-1)) for field, values in self.values.items())
+
+    def save(self, filename):
+        """
+        write the terms and values to a .npz file of plain string and number arrays,
+        the unescalated term as an empty index name
+        """
+
+        terms = [t if t is not None else ('', 0, 0) for t in self.terms]
+        np.savez_compressed(filename, codes=np.array([t[0] for t in terms], dtype=str),
+                            ref_years=np.array([t[1] for t in terms], dtype=int),
+                            ref_months=np.array([t[2] for t in terms], dtype=int),
+                            fields=np.array(sorted(self.values), dtype=str),
+                            **dict(('value_' + f, v) for f, v in self.values.items()))
+
+    @classmethod
+    def load(cls, filename):
+        """
+        read costs written by save, without unpickling
+        """
+
+        data = np.load(filename, allow_pickle=False)
+        terms = [(str(code), int(yr), int(mon)) if code else None
+                 for code, yr, mon in zip(data['codes'], data['ref_years'], data['ref_months'])]
+        return cls(terms, dict((str(f), data['value_' + str(f)]) for f in data['fields']))
+
+
+def base_year_costs(model, fields, **inputs):
+    """
+    Split the costs of a vectorized CSM model (bos_csm_batch, opex_csm_batch) into
+    reference-year dollars per PPI index.
+
+    The cost equations are affine in the escalators: evaluating model with every
+    escalator 0 gives the unescalated costs, and with the escalator of one
+    (index, reference date) set to 1 the difference from those gives that term's
+    component of every field.
+    """
+
+    recorder = _UnitEscalation(record=True)
+    model(context=recorder, **inputs)
+    terms = recorder.terms + [None]
+
+    fixed = model(context=_UnitEscalation(None), **inputs)
+    parts = [model(context=_UnitEscalation(term), **inputs) for term in terms[:-1]]
+    values = dict((field, np.stack([part[field] - fixed[field] for part in parts] + [fixed[field]], axis=-1))
+                  for field in fields)
+
+    return BaseYearCosts(terms, values)
+
+
+if os.environ.get('PLANT_COSTSSE_PPI_YEARS'):
+    _first, _last = os.environ['PLANT_COSTSSE_PPI_YEARS'].split('-')
+    precompute_escalators(int(_first), int(_last))
+
+if __name__ == '__main__':
+    _first, _last = (sys.argv[1] if len(sys.argv) > 1 else '2000-2030').split('-')
+    build_escalator_store(first_year=int(_first), last_year=int(_last))
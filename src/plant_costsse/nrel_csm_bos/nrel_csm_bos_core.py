@@ -0,0 +1,217 @@
+"""
+nrel_csm_bos_core.py
+
+Cost equations of the BOS model of the NREL Cost and Scaling Model on plain floats
+and arrays.  Nothing here imports OpenMDAO or FUSED-Wind, so batch workers can
+use the model without loading them; bos_csm_component wraps these functions.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import numpy as np
+
+from plant_costsse.escalation import escalators as _escalators, base_year_costs
+from plant_costsse.batch import threaded_batch
+
+# BOSVarTree fields in the row order used for the Jacobian (bos_costs is the last row)
+bos_breakdown_fields = ('development_costs', 'preparation_and_staging_costs', 'transportation_costs',
+                        'foundation_and_substructure_costs', 'electrical_costs',
+                        'assembly_and_installation_costs', 'soft_costs', 'other_costs')
+
+def bos_csm_batch(machine_rating, rotor_diameter, hub_height, sea_depth, turbine_number,
+                  turbine_cost=0.0, year=2009, month=12, multiplier=1.0, context=None, n_threads=1):
+    """
+    Vectorized BOS model of the NREL _cost and Scaling Model.
+
+    Array inputs (including year and month) are broadcast against each other so that a
+    sweep over many design points is evaluated in a single NumPy pass; the land, shallow
+    (< 30 m), transitional (< 60 m) and deep water branches are selected by masks on
+    sea_depth.  There are no cost equations for deep water so those entries are NaN.
+
+    Returns a dictionary with an array for every field in bos_breakdown_fields, 'bos_costs'
+    and the Jacobian 'J' with trailing shape (9, 5): rows follow bos_breakdown_fields then
+    bos_costs, columns are machine_rating, rotor_diameter, turbine_cost, hub_height, RNA_mass.
+
+    Escalators come from the EscalationContext context if given and from the shared
+    escalator cache otherwise.  With n_threads > 1 the points are split across a thread
+    pool that shares the (immutable) context or, without one, the locked escalator cache.
+    """
+
+    if n_threads > 1:
+        inputs = dict(machine_rating=machine_rating, rotor_diameter=rotor_diameter, hub_height=hub_height,
+                      sea_depth=sea_depth, turbine_number=turbine_number, turbine_cost=turbine_cost,
+                      year=year, month=month, multiplier=multiplier)
+        return threaded_batch(bos_csm_batch, inputs, n_threads, context=context)
+
+    if context is not None:
+        escalators = context.escalators
+    else:
+        escalators = _escalators
+
+    lPrmtsCostCoeff1 = 9.94E-04
+    lPrmtsCostCoeff2 = 20.31
+    oPrmtsCostFactor = 37.0 # $/kW (2003)
+    scourCostFactor =  55.0 # $/kW (2003)
+    ptstgCostFactor =  20.0 # $/kW (2003)
+    ossElCostFactor = 260.0 # $/kW (2003) shallow
+    ostElCostFactor = 290.0 # $/kW (2003) transitional
+    ostSTransFactor  =  25.0 # $/kW (2003)
+    ostTTransFactor  =  77.0 # $/kW (2003)
+    osInstallFactor  = 100.0 # $/kW (2003) shallow & trans
+    suppInstallFactor = 330.0 # $/kW (2003) trans additional
+    paiCost         = 60000.0 # per turbine
+
+    suretyBRate     = 0.03  # 3% of ICC
+
+    rating, diameter, hheight, depth, nturb, tcc, mult, yr, mon = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(x, dtype=float)) for x in
+          (machine_rating, rotor_diameter, hub_height, sea_depth, turbine_number, turbine_cost, multiplier,
+           year, month)])
+
+    # type of plant: land, < 30m, < 60m (>= 60m is deep water)
+    land = depth == 0
+    shallow = (depth != 0) & (depth < 30)
+    trans = (depth >= 30) & (depth < 60)
+    branches = [land, shallow, trans]
+
+    def select(land_value, shallow_value, trans_value):
+        return np.select(branches, [land_value, shallow_value, trans_value], np.nan)
+
+    # price escalators from the 2002 (land) and 2003 (offshore) reference dates
+    FND = escalators('IPPI_FND', 2002, 9, yr, mon)
+    LEL = escalators('IPPI_LEL', 2002, 9, yr, mon)
+    RDC = escalators('IPPI_RDC', 2002, 9, yr, mon)
+    LAI = escalators('IPPI_LAI', 2002, 9, yr, mon)
+    TPT = escalators('IPPI_TPT', 2002, 9, yr, mon)
+    LPM = escalators('IPPI_LPM', 2002, 3, yr, mon)
+    MPF = escalators('IPPI_MPF', 2003, 9, yr, mon)
+    OAI = escalators('IPPI_OAI', 2003, 9, yr, mon)
+    PAE = escalators('IPPI_PAE', 2003, 9, yr, mon)
+    STP = escalators('IPPI_STP', 2003, 9, yr, mon)
+    OPM = escalators('IPPI_OPM', 2003, 9, yr, mon)
+    OEL = escalators('IPPI_OEL', 2003, 9, yr, mon)
+
+    # foundation costs
+    fcCoeff = 303.23
+    fcExp   = 0.4037
+    SweptArea = (diameter*0.5)**2.0 * np.pi
+    dFoundation = FND * fcCoeff * fcExp * (hheight*SweptArea)**(fcExp-1)
+    foundation_cost = select(FND * fcCoeff * (hheight*SweptArea)**fcExp,
+                             MPF * 300.0 * rating,
+                             OAI * 450.0 * rating)
+    d_foundation_d_rating = select(0.0, MPF * 300.0, OAI * 450.0)
+    d_foundation_d_diameter = select(dFoundation * hheight * 0.5 * np.pi * diameter, 0.0, 0.0)
+    d_foundation_d_hheight = select(dFoundation * SweptArea, 0.0, 0.0)
+
+    # cost calculations
+    tpC1  =0.00001581
+    tpC2  =-0.0375
+    tpInt =54.7
+    tFact = tpC1*rating*rating + tpC2*rating + tpInt
+    dtFact = 3. * tpC1*rating**2. + 2. * tpC2*rating + tpInt
+
+    engPermits_costs = select(LPM * ((lPrmtsCostCoeff1 * rating * rating) + (lPrmtsCostCoeff2 * rating)),
+                              OPM * oPrmtsCostFactor * rating,
+                              OPM * oPrmtsCostFactor * rating)
+    d_development_d_rating = select(LPM * (2.0 * lPrmtsCostCoeff1 * rating + lPrmtsCostCoeff2),
+                                    OPM * oPrmtsCostFactor,
+                                    OPM * oPrmtsCostFactor)
+
+    elC1  = 3.49E-06
+    elC2  = -0.0221
+    elInt = 109.7
+    eFact = elC1*rating*rating + elC2*rating + elInt
+    electrical_costs = select(LEL * rating * eFact,
+                              OEL * ossElCostFactor * rating,
+                              OEL * ostElCostFactor * rating)
+    d_electrical_d_rating = select(LEL * (3. * elC1*rating**2. + 2. * elC2*rating + elInt),
+                                   OEL * ossElCostFactor,
+                                   OEL * ostElCostFactor)
+
+    rcC1  = 2.17E-06
+    rcC2  = -0.0145
+    rcInt =69.54
+    rFact = rcC1*rating*rating + rcC2*rating + rcInt
+    roadsCivil_costs = select(RDC * rating * rFact, 0.0, 0.0)
+    portStaging_costs = select(0.0, STP * ptstgCostFactor * rating, STP * ptstgCostFactor * rating)
+    d_preparation_d_rating = select(RDC * (3. * rcC1 * rating**2. + 2. * rcC2 * rating + rcInt),
+                                    STP * ptstgCostFactor,
+                                    STP * ptstgCostFactor)
+
+    iCoeff = 1.965
+    iExp   = 1.1736
+    dInstallation = LAI * iCoeff * iExp * (hheight*diameter)**(iExp-1)
+    installation_costs = select(LAI * iCoeff * (hheight*diameter)**iExp,
+                                OAI * osInstallFactor * rating,
+                                OAI * (osInstallFactor + suppInstallFactor) * rating)
+    d_assembly_d_rating = select(0.0, OAI * osInstallFactor, OAI * (osInstallFactor + suppInstallFactor))
+    d_assembly_d_diameter = select(dInstallation * hheight, 0.0, 0.0)
+    d_assembly_d_hheight = select(dInstallation * diameter, 0.0, 0.0)
+
+    transportation_costs = select(TPT * rating * tFact,
+                                  TPT * rating * tFact,
+                                  (TPT * ostTTransFactor + OAI * ostSTransFactor) * rating)
+    d_transport_d_rating = select(TPT * dtFact, TPT * dtFact, TPT * ostTTransFactor + OAI * ostSTransFactor)
+
+    pai_costs = select(0.0, PAE * paiCost, PAE * paiCost)
+    scour_costs = select(0.0, STP * scourCostFactor * rating, STP * scourCostFactor * rating)
+    d_other_d_rating = select(0.0, STP * scourCostFactor, STP * scourCostFactor)
+
+    bos_costs = foundation_cost + \
+                transportation_costs + \
+                roadsCivil_costs    + \
+                portStaging_costs   + \
+                installation_costs   + \
+                electrical_costs     + \
+                engPermits_costs    + \
+                pai_costs          + \
+                scour_costs
+
+    surety = np.where(depth > 0.0, suretyBRate, 0.0)
+    suretyBond = surety * (tcc + bos_costs)
+    d_other_d_rating = d_other_d_rating + surety * (d_development_d_rating + d_preparation_d_rating +
+        d_transport_d_rating + d_foundation_d_rating + d_electrical_d_rating + d_assembly_d_rating + d_other_d_rating)
+
+    out = {}
+    out['development_costs'] = engPermits_costs * nturb
+    out['preparation_and_staging_costs'] = (roadsCivil_costs + portStaging_costs) * nturb
+    out['transportation_costs'] = transportation_costs * nturb
+    out['foundation_and_substructure_costs'] = foundation_cost * nturb
+    out['electrical_costs'] = electrical_costs * nturb
+    out['assembly_and_installation_costs'] = installation_costs * nturb
+    out['soft_costs'] = np.zeros_like(bos_costs)
+    out['other_costs'] = (pai_costs + scour_costs + suretyBond) * nturb
+    out['bos_costs'] = nturb * (bos_costs + suretyBond) * mult
+
+    # derivatives
+    J = np.zeros(rating.shape + (9, 5))
+    J[..., 0, 0] = d_development_d_rating
+    J[..., 1, 0] = d_preparation_d_rating
+    J[..., 2, 0] = d_transport_d_rating
+    J[..., 3, 0] = d_foundation_d_rating
+    J[..., 4, 0] = d_electrical_d_rating
+    J[..., 5, 0] = d_assembly_d_rating
+    J[..., 7, 0] = d_other_d_rating
+    J[..., 3, 1] = d_foundation_d_diameter
+    J[..., 5, 1] = d_assembly_d_diameter
+    J[..., 7, 2] = surety
+    J[..., 3, 3] = d_foundation_d_hheight
+    J[..., 5, 3] = d_assembly_d_hheight
+    J[..., :8, :] *= nturb[..., np.newaxis, np.newaxis]
+    J[..., 8, :] = J[..., :8, :].sum(axis=-2) * mult[..., np.newaxis]
+    out['J'] = J
+
+    return out
+
+def bos_csm_base_costs(machine_rating, rotor_diameter, hub_height, sea_depth, turbine_number,
+                       turbine_cost=0.0, multiplier=1.0):
+    """
+    BOS costs of the NREL _cost and Scaling Model in their reference-year dollars
+    (2002 land based, 2003 offshore) per PPI index, as a BaseYearCosts whose fields are
+    bos_breakdown_fields and bos_costs; call its escalate(year, month) for current dollars.
+    """
+
+    return base_year_costs(bos_csm_batch, bos_breakdown_fields + ('bos_costs',),
+                           machine_rating=machine_rating, rotor_diameter=rotor_diameter, hub_height=hub_height,
+                           sea_depth=sea_depth, turbine_number=turbine_number, turbine_cost=turbine_cost,
+                           multiplier=multiplier)
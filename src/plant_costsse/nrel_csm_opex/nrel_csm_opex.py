@@ -11,8 +11,8 @@ from openmdao.main.datatypes.api import Int, Bool, Float, Array, VarTree
 from fusedwind.plant_cost.fused_opex import OPEXVarTree, ExtendedOPEXAggregator, ExtendedOPEXModel, configure_extended_opex
 from fusedwind.interface import implement_base
 
-from commonse.config import *
-import numpy as np
+from plant_costsse.nrel_csm_opex.nrel_csm_opex_core import opex_breakdown_fields, opex_csm_batch, \
+    opex_csm_cashflows, opex_csm_base_costs
 
 @implement_base(ExtendedOPEXModel)
 class opex_csm_assembly(Assembly):
@@ -26,10 +26,21 @@ class opex_csm_assembly(Assembly):
     year = Int(2009, units='yr', iotype='in', desc='year for project start')
     month = Int(12, iotype = 'in', desc= 'month for project start') # units = months
     turbine_number = Int(100, iotype = 'in', desc = 'number of turbines at plant')
+    project_lifetime = Int(20, units='yr', iotype='in', desc='project lifetime for wind plant (cash flow mode)')
+    discount_rate = Float(0.07, iotype='in', desc='annual discount rate for the OPEX net present value (cash flow mode)')
 
     # Outputs
     avg_annual_opex = Float(iotype='out', desc='Average annual Operating Expenditures for a wind plant over its lifetime')
     opex_breakdown = VarTree(OPEXVarTree(),iotype='out')
+    annual_opex = Array(iotype='out', units='USD', desc='Operating Expenditures in each year of the project life (cash flow mode)')
+    opex_npv = Float(iotype='out', units='USD', desc='Net present value of the annual Operating Expenditures (cash flow mode)')
+
+    def __init__(self, context=None, cashflows=False):
+
+        self.context = context
+        self.cashflows = cashflows
+
+        Assembly.__init__(self)
 
     def configure(self):
 
@@ -37,7 +48,7 @@ class opex_csm_assembly(Assembly):
         
         configure_extended_opex(self)
 
-        self.replace('opex', opex_csm_component())
+        self.replace('opex', opex_csm_component(self.context, self.cashflows))
 
         self.connect('machine_rating','opex.machine_rating')
         self.connect('sea_depth','opex.sea_depth')
@@ -45,6 +56,11 @@ class opex_csm_assembly(Assembly):
         self.connect('year','opex.year')
         self.connect('month','opex.month')
         self.connect('turbine_number','opex.turbine_number')
+        self.connect('project_lifetime','opex.project_lifetime')
+        self.connect('discount_rate','opex.discount_rate')
+
+        self.connect('opex.annual_opex','annual_opex')
+        self.connect('opex.opex_npv','opex_npv')
 
 @implement_base(ExtendedOPEXAggregator)
 class opex_csm_component(Component):
@@ -58,18 +74,27 @@ class opex_csm_component(Component):
     year = Int(2009, units='yr', iotype='in', desc='year for project start')
     month = Int(12, iotype = 'in', desc= 'month for project start') # units = months
     turbine_number = Int(100, iotype = 'in', desc = 'number of turbines at plant')
+    project_lifetime = Int(20, units='yr', iotype='in', desc='project lifetime for wind plant (cash flow mode)')
+    discount_rate = Float(0.07, iotype='in', desc='annual discount rate for the OPEX net present value (cash flow mode)')
 
     # Outputs
     avg_annual_opex = Float(iotype='out', desc='Average annual Operating Expenditures for a wind plant over its lifetime')
     opex_breakdown = VarTree(OPEXVarTree(),iotype='out')
+    annual_opex = Array(iotype='out', units='USD', desc='Operating Expenditures in each year of the project life (cash flow mode)')
+    opex_npv = Float(iotype='out', units='USD', desc='Net present value of the annual Operating Expenditures (cash flow mode)')
 
-    def __init__(self):
+    def __init__(self, context=None, cashflows=False):
         """
         OpenMDAO component to wrap O&M model of the NREL _cost and Scaling model data (csmOM.py).
+        Call __init__ with an EscalationContext to escalate costs without shared PPI state;
+        with cashflows=True the costs of every year of the project life and their NPV are also computed
 
         """
         Component.__init__(self)
 
+        self.context = context
+        self.cashflows = cashflows
+
         #controls what happens if derivatives are missing
         self.missing_deriv_policy = 'assume_zero'
 
@@ -79,71 +104,20 @@ class opex_csm_component(Component):
         """
         # print "In {0}.execute()...".format(self.__class__)
 
-        # initialize variables
-        if self.sea_depth == 0:
-            offshore = False
-        else:
-            offshore = True
-        ppi.curr_yr = self.year
-        ppi.curr_mon = self.month
-
-        #O&M
-        offshoreCostFactor = 0.0200  # $/kwH
-        landCostFactor     = 0.0070  # $/kwH
-        if not offshore:  # kld - place for an error check - iShore should be in 1:4
-            cost = self.net_aep * landCostFactor
-            costEscalator = ppi.compute('IPPI_LOM')
-        else:
-            cost = self.net_aep * offshoreCostFactor
-            ppi.ref_yr = 2003
-            costEscalator = ppi.compute('IPPI_OOM')
-            ppi.ref_yr = 2002
-
-        self.opex_breakdown.preventative_opex = cost * costEscalator # in $/year
-
-        #LRC
-        if not offshore:
-            lrcCF = 10.70 # land based
-            costlrcEscFactor = ppi.compute('IPPI_LLR')
-        else: #TODO: transition and deep water options if applicable
-            lrcCF = 17.00 # offshore
-            ppi.ref_yr = 2003
-            costlrcEscFactor = ppi.compute('IPPI_OLR')
-            ppi.ref_yr = 2002
-
-        self.opex_breakdown.corrective_opex = self.machine_rating * lrcCF * costlrcEscFactor * self.turbine_number # in $/yr
-
-        #LLC
-        if not offshore:
-            leaseCF = 0.00108 # land based
-            costlandEscFactor = ppi.compute('IPPI_LSE')
-        else: #TODO: transition and deep water options if applicable
-            leaseCF = 0.00108 # offshore
-            costlandEscFactor = ppi.compute('IPPI_LSE')
-
-        self.opex_breakdown.lease_opex = self.net_aep * leaseCF * costlandEscFactor # in $/yr
-
-        #Other
-        self.opex_breakdown.other_opex = 0.0
-
-        #Total OPEX
-        self.avg_annual_opex = self.opex_breakdown.preventative_opex + self.opex_breakdown.corrective_opex \
-           + self.opex_breakdown.lease_opex
-
-        #dervivatives
-        self.d_corrective_d_aep = 0.0
-        self.d_corrective_d_rating = lrcCF * costlrcEscFactor * self.turbine_number
-        self.d_lease_d_aep = leaseCF * costlandEscFactor
-        self.d_lease_d_rating = 0.0
-        self.d_other_d_aep = 0.0
-        self.d_other_d_rating = 0.0
-        if not offshore:
-            self.d_preventative_d_aep = landCostFactor * costEscalator
-        else:
-            self.d_preventative_d_aep = offshoreCostFactor * costEscalator
-        self.d_preventative_d_rating = 0.0
-        self.d_opex_d_aep = self.d_preventative_d_aep + self.d_corrective_d_aep + self.d_lease_d_aep + self.d_other_d_aep
-        self.d_opex_d_rating = self.d_preventative_d_rating + self.d_corrective_d_rating + self.d_lease_d_rating + self.d_other_d_rating
+        out = opex_csm_batch(self.net_aep, self.machine_rating, self.sea_depth,
+                             self.year, self.month, self.turbine_number, self.context)
+
+        for name in opex_breakdown_fields:
+            setattr(self.opex_breakdown, name, out[name][0])
+        self.avg_annual_opex = out['avg_annual_opex'][0]
+
+        self.J = out['J'][0]
+
+        if self.cashflows:
+            flows = opex_csm_cashflows(self.net_aep, self.machine_rating, self.sea_depth, self.year, self.month,
+                                       self.turbine_number, self.project_lifetime, self.discount_rate, self.context)
+            self.annual_opex = flows['annual_opex'][0]
+            self.opex_npv = flows['opex_npv'][0]
 
     def list_deriv_vars(self):
 
@@ -156,10 +130,6 @@ class opex_csm_component(Component):
 
     def provideJ(self):
 
-        self.J = np.array([[self.d_preventative_d_aep, self.d_preventative_d_rating], [self.d_corrective_d_aep, self.d_corrective_d_rating],\
-                           [self.d_lease_d_aep, self.d_lease_d_rating], [self.d_other_d_aep, self.d_other_d_rating],\
-                           [self.d_opex_d_aep, self.d_opex_d_rating]])
-
         return self.J
 
 
@@ -0,0 +1,134 @@
+"""
+nrel_csm_opex_core.py
+
+Cost equations of the O&M model of the NREL Cost and Scaling Model on plain floats
+and arrays.  Nothing here imports OpenMDAO or FUSED-Wind, so batch workers can
+use the model without loading them; opex_csm_component wraps these functions.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import numpy as np
+
+from plant_costsse.escalation import escalators as _escalators, base_year_costs
+from plant_costsse.batch import threaded_batch
+
+# OPEXVarTree fields in the row order used for the Jacobian (avg_annual_opex is the last row)
+opex_breakdown_fields = ('preventative_opex', 'corrective_opex', 'lease_opex', 'other_opex')
+
+def opex_csm_batch(net_aep, machine_rating, sea_depth=20.0, year=2009, month=12, turbine_number=100,
+                   context=None, n_threads=1):
+    """
+    Vectorized O&M model of the NREL _cost and Scaling Model.
+
+    Array inputs are broadcast against each other so that N plants are evaluated in a
+    single NumPy pass; price escalators come from plant_costsse.escalation.
+
+    Returns a dictionary with an array for every field in opex_breakdown_fields,
+    'avg_annual_opex' and the Jacobian 'J' with trailing shape (5, 2): rows follow
+    opex_breakdown_fields then avg_annual_opex, columns are net_aep, machine_rating.
+
+    Escalators come from the EscalationContext context if given and from the shared
+    escalator cache otherwise.  With n_threads > 1 the plants are split across a thread
+    pool that shares the (immutable) context or, without one, the locked escalator cache.
+    """
+
+    if n_threads > 1:
+        inputs = dict(net_aep=net_aep, machine_rating=machine_rating, sea_depth=sea_depth,
+                      year=year, month=month, turbine_number=turbine_number)
+        return threaded_batch(opex_csm_batch, inputs, n_threads, context=context)
+
+    if context is not None:
+        escalators = context.escalators
+    else:
+        escalators = _escalators
+
+    aep, rating, depth, yr, mon, nturb = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(x, dtype=float)) for x in
+          (net_aep, machine_rating, sea_depth, year, month, turbine_number)])
+
+    offshore = depth != 0
+    esc = {}
+    for ref_yr, codes in ((2002, ('IPPI_LOM', 'IPPI_LLR', 'IPPI_LSE')), (2003, ('IPPI_OOM', 'IPPI_OLR'))):
+        for code in codes:
+            esc[code] = escalators(code, ref_yr, 9, yr, mon)
+
+    #O&M
+    offshoreCostFactor = 0.0200  # $/kwH
+    landCostFactor     = 0.0070  # $/kwH
+    d_preventative_d_aep = np.where(offshore, offshoreCostFactor * esc['IPPI_OOM'],
+                                    landCostFactor * esc['IPPI_LOM'])
+
+    #LRC
+    lrcCF = np.where(offshore, 17.00, 10.70)
+    costlrcEscFactor = np.where(offshore, esc['IPPI_OLR'], esc['IPPI_LLR'])
+    d_corrective_d_rating = lrcCF * costlrcEscFactor * nturb
+
+    #LLC
+    leaseCF = 0.00108 # land based and offshore
+    d_lease_d_aep = leaseCF * esc['IPPI_LSE']
+
+    out = {}
+    out['preventative_opex'] = aep * d_preventative_d_aep # in $/year
+    out['corrective_opex'] = rating * d_corrective_d_rating # in $/yr
+    out['lease_opex'] = aep * d_lease_d_aep # in $/yr
+    out['other_opex'] = np.zeros_like(aep)
+    out['avg_annual_opex'] = out['preventative_opex'] + out['corrective_opex'] + out['lease_opex']
+
+    # derivatives
+    J = np.zeros(aep.shape + (5, 2))
+    J[..., 0, 0] = d_preventative_d_aep
+    J[..., 1, 1] = d_corrective_d_rating
+    J[..., 2, 0] = d_lease_d_aep
+    J[..., 4, :] = J[..., :4, :].sum(axis=-2)
+    out['J'] = J
+
+    return out
+
+def opex_csm_cashflows(net_aep, machine_rating, sea_depth=20.0, year=2009, month=12, turbine_number=100,
+                       project_lifetime=20, discount_rate=0.07, context=None):
+    """
+    Year by year O&M costs of the NREL _cost and Scaling Model over the project life.
+
+    Every plant's costs are escalated to each calendar year from year to
+    year + project_lifetime - 1 in a single opex_csm_batch pass.
+
+    Returns a dictionary with (plants, years) arrays 'annual_opex', one for every field in
+    opex_breakdown_fields and the calendar 'year', plus the net present value 'opex_npv'
+    of the annual costs discounted at discount_rate at the end of each year.  Plants with
+    a shorter project_lifetime than the longest one have zero costs in the extra years.
+    """
+
+    aep, rating, depth, yr, mon, nturb, life, rate = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(x, dtype=float)) for x in
+          (net_aep, machine_rating, sea_depth, year, month, turbine_number, project_lifetime, discount_rate)])
+
+    shape = aep.shape
+    column = lambda x: x.reshape(-1, 1)
+    t = np.arange(int(life.max()))
+    years = column(yr) + t
+
+    out = opex_csm_batch(column(aep), column(rating), column(depth), years, column(mon), column(nturb),
+                         context)
+
+    active = t < column(life)
+    flows = {'year': years.astype(int).reshape(shape + t.shape)}
+    for name in opex_breakdown_fields + ('avg_annual_opex',):
+        flows[name] = np.where(active, out[name], 0.0).reshape(shape + t.shape)
+    flows['annual_opex'] = flows.pop('avg_annual_opex')
+
+    discount = (1.0 + column(rate)) ** -(t + 1.0)
+    flows['opex_npv'] = (flows['annual_opex'].reshape(-1, len(t)) * discount).sum(axis=-1).reshape(shape)
+
+    return flows
+
+def opex_csm_base_costs(net_aep, machine_rating, sea_depth=20.0, turbine_number=100):
+    """
+    O&M costs of the NREL _cost and Scaling Model in their reference-year dollars
+    (2002 land based, 2003 offshore) per PPI index, as a BaseYearCosts whose fields are
+    opex_breakdown_fields and avg_annual_opex; call its escalate(year, month) for current dollars.
+    """
+
+    return base_year_costs(opex_csm_batch, opex_breakdown_fields + ('avg_annual_opex',),
+                           net_aep=net_aep, machine_rating=machine_rating, sea_depth=sea_depth,
+                           turbine_number=turbine_number)
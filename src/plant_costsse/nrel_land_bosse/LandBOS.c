@@ -6,6 +6,9 @@
 //  Copyright (c) 2014 NREL. All rights reserved.
 //
 
+#ifndef LANDBOS_NONSMOOTH
+#define LANDBOS_NONSMOOTH
+#endif
 #include "LandBOS.h"
 
 double farmSize(double rating, int nTurb){
@@ -20,6 +20,77 @@ typedef struct{
     double cost;
 } MultCost;
 
+// line items of the fused evaluation, in the order they are stored in LandBOSResults
+typedef enum {COST_TRANSPORTATION, COST_ENGINEERING, COST_POWER_PERFORMANCE,
+    COST_ACCESS_ROADS, COST_SITE_COMPOUND, COST_BUILDING, COST_FOUNDATION,
+    COST_ERECTION, COST_ELECTRICAL_MATERIALS, COST_ELECTRICAL_INSTALLATION,
+    COST_SUBSTATION, COST_TRANSMISSION, COST_PROJECT_MANAGEMENT, COST_DEVELOPMENT,
+    COST_INSURANCE, COST_MARKUP, N_COST_ITEMS} CostItem;
+
+// inputs the fused derivatives are taken with respect to
+typedef enum {D_DIAMETER, D_HUBHT, D_TOPMASS, D_TURBINECOST, D_RATING,
+    D_MULTIPLIER, N_DERIV_VARS} DerivVar;
+
+// inputs of the fused evaluation
+// (a value of -1 for one of the defaults selects the default value)
+typedef struct{
+    double rating;
+    double diameter;
+    double hubHt;
+    int nTurb;
+    double voltage;
+    double distInter;
+    SiteTerrain terrain;
+    TurbineLayout layout;
+    SoilCondition soil;
+    double turbineCost;  // per turbine
+    double topMass;  // tonnes
+    double multiplier;
+
+    int constructionTime;
+    int accessRoadEntrances;
+    int weatherDelayDays;
+    int craneBreakdowns;
+    double buildingSize;
+    double permanentMetTowers;
+    double tempMetTowers;
+
+    int deliveryAssistRequired;
+    int padMountTransformer;
+    int newSwitchyardRequired;
+    double rockTrenchingLength;
+    double thermalBackfill;
+    double overheadCollector;
+    int performanceBond;
+    double contingency;
+    double warranty;
+    double useTax;
+    double overhead;
+    double profitMargin;
+    double developmentFee;
+    double transportDist;
+} LandBOSInputs;
+
+// outputs of the fused evaluation
+typedef struct{
+    double farmSize;
+    int constructionTime;
+    int accessRoadEntrances;
+    int weatherDelayDays;
+    int craneBreakdowns;
+    double buildingSize;
+    double permanentMetTowers;
+    double tempMetTowers;
+
+    double cost[N_COST_ITEMS];
+    double insuranceAlpha;
+    double markupAlpha;
+    double bosCost;  // total less turbine cost, times multiplier
+
+    double dcost[N_COST_ITEMS][N_DERIV_VARS];
+    double dbosCost[N_DERIV_VARS];
+} LandBOSResults;
+
 
 // Wind Farm Size (MW)
 double farmSize(double rating, int nTurb);
@@ -137,4 +208,32 @@ double totalCost(double rating, double diameter, double hubHt,
         double useTax, double overhead, double profitMargin,
         double developmentFee, double transportDist);
 
+#ifndef LANDBOS_NONSMOOTH
+// only defined in the smooth version (LandBOSsmooth.c); LandBOS.c defines
+// LANDBOS_NONSMOOTH so that the non-smooth build does not declare them
+
+// derivatives of the defaults and line items with respect to farm size and rating
+void deriv_defaultBuildingSize(double farmSize, double* dfarmSize);
+void deriv_defaultTempMetTowers(double farmSize, double* dfarmSize);
+void deriv_defaultPermanentMetTowers(double farmSize, double* dfarmSize);
+void deriv_transportationCost_rating(double tcc, int nTurb, double* drating);
+void deriv_engineeringCost(int nTurb, double farmSize, double* dfarmSize);
+void deriv_powerPerformanceCost_metTowers(double hubHt, double* dpermanent,
+        double* dtemporary);
+void deriv_siteCompoundCost(double farmSize, double* dfarmSize);
+void deriv_buildingCost(double buildingSize, double* dbuildingSize);
+void deriv_foundationCost_rating(double diameter, double topMass, int nTurb,
+        double* drating);
+void deriv_erectionCost_rating(int nTurb, double* drating);
+void deriv_electricalMaterialsCost_farmSize(double* dfarmSize);
+void deriv_electricalInstallationCost_farmSize(double farmSize, double* dfarmSize);
+void deriv_substationCost(double voltage, double farmSize, double* dfarmSize);
+void deriv_insuranceMultiplierAndCost_farmSize(double tcc, int performanceBond,
+        double* dfarmSize);
+
+// Defaults, every line item, the insurance and markup multipliers and the total
+// BOS cost together with their derivatives in a single call
+void landBOS(const LandBOSInputs* in, LandBOSResults* out);
+#endif
+
 #endif
\ No newline at end of file
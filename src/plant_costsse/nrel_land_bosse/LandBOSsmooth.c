@@ -52,18 +52,43 @@ double defaultBuildingSize(double farmSize){
     return buildingSize;
 }
 
+void deriv_defaultBuildingSize(double farmSize, double* dfarmSize){
+
+    double c3 = -6.13534135936e-06;
+    double c2 = 0.0124193928834;
+    double c1 = 1.06594513037;
+
+    double x2 = 1391.1224868;
+
+    if (farmSize >= x2){
+        *dfarmSize = 0.0;
+    } else{
+        *dfarmSize = 3.0*c3*pow(farmSize, 2) + 2.0*c2*farmSize + c1;
+    }
+}
+
 // Quantity of Temporary Meteorological Towers for Testing
 double defaultTempMetTowers(double farmSize){
 
     return farmSize/75.0;
 }
 
+void deriv_defaultTempMetTowers(double farmSize, double* dfarmSize){
+
+    *dfarmSize = 1.0/75.0;
+}
+
 // Quantity of Permanent Meteorological Towers for Testing
 double defaultPermanentMetTowers(double farmSize){
 
     return farmSize/100.0;
 }
 
+void deriv_defaultPermanentMetTowers(double farmSize, double* dfarmSize){
+
+    *dfarmSize = 1.0/100.0;
+}
+
 // Wind/Weather delay days
 int defaultWeatherDelayDays(int nTurb){
     return round(nTurb/5.0);
@@ -97,6 +122,12 @@ void deriv_transportationCost(double rating, int nTurb,
 
 }
 
+void deriv_transportationCost_rating(double tcc, int nTurb, double* drating){
+
+    *drating = tcc * nTurb;
+
+}
+
 
 double engineeringCost(int nTurb, double farmSize){
 
@@ -127,6 +158,26 @@ double engineeringCost(int nTurb, double farmSize){
     return cost;
 }
 
+void deriv_engineeringCost(int nTurb, double farmSize, double* dfarmSize){
+
+    double c3 = -2e-06;
+    double c2 = 0.0012;
+    double c1 = -0.225;
+
+    double dmultiplier;
+    if (farmSize <= 150.0){
+        dmultiplier = 0.0;
+    }
+    else if (farmSize >= 250.0){
+        dmultiplier = 0.0;
+    }
+    else{
+        dmultiplier = 3.0*c3*pow(farmSize, 2) + 2.0*c2*farmSize + c1;
+    }
+
+    *dfarmSize = dmultiplier * 161675;
+}
+
 
 double powerPerformanceCost(double hubHt, double permanent,
         double temporary){
@@ -227,6 +278,14 @@ void deriv_powerPerformanceCost(double hubHt, double permanent,
     *dhubHt = permanent*dmultiplier1 + temporary*dmultiplier2;
 }
 
+void deriv_powerPerformanceCost_metTowers(double hubHt, double* dpermanent,
+        double* dtemporary){
+
+    // the cost is linear in the number of towers
+    *dpermanent = powerPerformanceCost(hubHt, 1.0, 0.0) - 200000;
+    *dtemporary = powerPerformanceCost(hubHt, 0.0, 1.0) - 200000;
+}
+
 
 
 double accessRoadsCost(SiteTerrain terrain, TurbineLayout layout,
@@ -369,6 +428,46 @@ double siteCompoundCost(int accessRoadEntrances, int constructionTime,
     return cost;
 }
 
+void deriv_siteCompoundCost(double farmSize, double* dfarmSize){
+
+    double x1 = 10;
+    double x2 = 50;
+    double x1_2 = 80;
+    double x2_2 = 120;
+
+    double c3 = -6.25e-05;
+    double c2 = 0.005625;
+    double c1 = -0.09375;
+
+    double c3_2 = -0.00015625;
+    double c2_2 = 0.046875;
+    double c1_2 = -4.5;
+
+    double dmultiplier;
+    if (farmSize > x1 && farmSize < x2){
+        dmultiplier = 3.0*c3*pow(farmSize, 2) + 2.0*c2*farmSize + c1;
+    }
+    else if (farmSize > x1_2 && farmSize < x2_2){
+        dmultiplier = 3.0*c3_2*pow(farmSize, 2) + 2.0*c2_2*farmSize + c1_2;
+    }
+    else{
+        dmultiplier = 0.0;
+    }
+
+    *dfarmSize = dmultiplier * 30000;
+
+
+    c3 = -22.5;
+    c2 = 2025.0;
+    c1 = -54000.0;
+
+    if (farmSize > 20.0 && farmSize < 40.0){
+        *dfarmSize += 3.0*c3*pow(farmSize, 2) + 2.0*c2*farmSize + c1;
+    }
+
+    *dfarmSize += 60;
+}
+
 
 double buildingCost(double buildingSize){
 
@@ -378,6 +477,12 @@ double buildingCost(double buildingSize){
 
 }
 
+void deriv_buildingCost(double buildingSize, double* dbuildingSize){
+
+    *dbuildingSize = 125;
+
+}
+
 double foundationCost(double rating, double diameter, double topMass,
         double hubHt, SoilCondition soil, int nTurb){
 
@@ -403,6 +508,13 @@ void deriv_foundationCost(double rating, double diameter, double topMass,
 
 }
 
+void deriv_foundationCost_rating(double diameter, double topMass, int nTurb,
+        double* drating){
+
+    *drating = nTurb*diameter*topMass/1000.0;
+
+}
+
 
 double erectionCost(double rating, double hubHt, int nTurb, int weatherDelayDays,
         int craneBreakdowns, int deliveryAssistRequired){
@@ -424,6 +536,11 @@ void deriv_erectionCost(int nTurb, double* dhubHt){
     *dhubHt = 500.0*nTurb;
 }
 
+void deriv_erectionCost_rating(int nTurb, double* drating){
+
+    *drating = 37.0*nTurb;
+}
+
 
 double electricalMaterialsCost(SiteTerrain terrain, TurbineLayout layout,
         double farmSize, double diameter, int nTurb, int padMountTransformer,
@@ -518,6 +635,11 @@ void deriv_electricalMaterialsCost(SiteTerrain terrain, TurbineLayout layout,
     *ddiameter = nTurb*factor3;
 }
 
+void deriv_electricalMaterialsCost_farmSize(double* dfarmSize){
+
+    *dfarmSize = 35375/25.0 + 50000/100.0;
+}
+
 
 double electricalInstallationCost(SiteTerrain terrain, TurbineLayout layout,
         double farmSize, double diameter, int nTurb,
@@ -628,6 +750,23 @@ void deriv_electricalInstallationCost(SiteTerrain terrain, TurbineLayout layout,
 
 }
 
+void deriv_electricalInstallationCost_farmSize(double farmSize, double* dfarmSize){
+
+    *dfarmSize = 14985/25.0;
+
+    double c3 = -4.53125;
+    double c2 = 2718.75;
+    double c1 = -538312.5;
+
+    double x1 = 180;
+    double x2 = 220;
+
+    if (farmSize > x1 && farmSize < x2){
+        *dfarmSize += 3.0*c3*pow(farmSize, 2) + 2.0*c2*farmSize + c1;
+    }
+
+}
+
 
 double substationCost(double voltage, double farmSize){
 
@@ -636,6 +775,11 @@ double substationCost(double voltage, double farmSize){
     return cost;
 }
 
+void deriv_substationCost(double voltage, double farmSize, double* dfarmSize){
+
+    *dfarmSize = 11652 + 11795*0.3549*pow(farmSize, 0.3549 - 1.0);
+}
+
 
 double transmissionCost(double voltage, double distInter,
         int newSwitchyardRequired){
@@ -703,6 +847,17 @@ void deriv_insuranceMultiplierAndCost(double farmSize,
 
 }
 
+void deriv_insuranceMultiplierAndCost_farmSize(double tcc, int performanceBond,
+        double* dfarmSize){
+
+    *dfarmSize = (0.7 + 0.4 + 1.0) * tcc;
+
+    if (performanceBond){
+        *dfarmSize += 10.0 * tcc;
+    }
+
+}
+
 
 MultCost markupMultiplierAndCost(double transportationCost, double contingency,
         double warranty, double useTax, double overhead, double profitMargin){
@@ -777,4 +932,186 @@ double totalCost(double rating, double diameter, double hubHt,
 
     return cost;
 
-}
\ No newline at end of file
+}
+
+
+
+void landBOS(const LandBOSInputs* in, LandBOSResults* out){
+
+    int i, j;
+    double d1, d2, d3;
+    double sum, alpha, base;
+    double dfarmSize, dbuildingSize, dpermanent, dtemporary;
+    double *c = out->cost;
+    double (*dc)[N_DERIV_VARS] = out->dcost;
+
+    double tcc = in->turbineCost / in->rating;
+    double dtcc = -tcc / in->rating;  // d(tcc)/d(rating)
+
+    for (i = 0; i < N_COST_ITEMS; i++){
+        for (j = 0; j < N_DERIV_VARS; j++){
+            dc[i][j] = 0.0;
+        }
+    }
+
+    // defaults
+    out->farmSize = farmSize(in->rating, in->nTurb);
+
+    out->constructionTime = (in->constructionTime == -1) ?
+        defaultConstructionTime(in->nTurb) : in->constructionTime;
+    out->accessRoadEntrances = (in->accessRoadEntrances == -1) ?
+        defaultAccessRoadEntrances(in->nTurb) : in->accessRoadEntrances;
+    out->weatherDelayDays = (in->weatherDelayDays == -1) ?
+        defaultWeatherDelayDays(in->nTurb) : in->weatherDelayDays;
+    out->craneBreakdowns = (in->craneBreakdowns == -1) ?
+        defaultCraneBreakdowns(in->nTurb) : in->craneBreakdowns;
+    out->buildingSize = (in->buildingSize == -1) ?
+        defaultBuildingSize(out->farmSize) : in->buildingSize;
+    out->permanentMetTowers = (in->permanentMetTowers == -1) ?
+        defaultPermanentMetTowers(out->farmSize) : in->permanentMetTowers;
+    out->tempMetTowers = (in->tempMetTowers == -1) ?
+        defaultTempMetTowers(out->farmSize) : in->tempMetTowers;
+
+    // rating enters through the farm size and the defaults that depend on it
+    dfarmSize = in->nTurb / 1000.0;
+
+    dbuildingSize = 0.0;
+    if (in->buildingSize == -1){
+        deriv_defaultBuildingSize(out->farmSize, &dbuildingSize);
+        dbuildingSize *= dfarmSize;
+    }
+    dpermanent = 0.0;
+    if (in->permanentMetTowers == -1){
+        deriv_defaultPermanentMetTowers(out->farmSize, &dpermanent);
+        dpermanent *= dfarmSize;
+    }
+    dtemporary = 0.0;
+    if (in->tempMetTowers == -1){
+        deriv_defaultTempMetTowers(out->farmSize, &dtemporary);
+        dtemporary *= dfarmSize;
+    }
+
+    // line items
+    c[COST_TRANSPORTATION] = transportationCost(tcc, in->rating, in->nTurb,
+        in->hubHt, in->transportDist);
+    deriv_transportationCost(in->rating, in->nTurb, &d1, &d2);
+    dc[COST_TRANSPORTATION][D_TURBINECOST] = d1 / in->rating;
+    dc[COST_TRANSPORTATION][D_HUBHT] = d2;
+    dc[COST_TRANSPORTATION][D_RATING] = d1 * dtcc;
+    deriv_transportationCost_rating(tcc, in->nTurb, &d1);
+    dc[COST_TRANSPORTATION][D_RATING] += d1;
+
+    c[COST_ENGINEERING] = engineeringCost(in->nTurb, out->farmSize);
+    deriv_engineeringCost(in->nTurb, out->farmSize, &d1);
+    dc[COST_ENGINEERING][D_RATING] = d1 * dfarmSize;
+
+    c[COST_POWER_PERFORMANCE] = powerPerformanceCost(in->hubHt,
+        out->permanentMetTowers, out->tempMetTowers);
+    deriv_powerPerformanceCost(in->hubHt, out->permanentMetTowers,
+        out->tempMetTowers, &dc[COST_POWER_PERFORMANCE][D_HUBHT]);
+    deriv_powerPerformanceCost_metTowers(in->hubHt, &d1, &d2);
+    dc[COST_POWER_PERFORMANCE][D_RATING] = d1 * dpermanent + d2 * dtemporary;
+
+    c[COST_ACCESS_ROADS] = accessRoadsCost(in->terrain, in->layout, in->nTurb,
+        in->diameter, out->constructionTime, out->accessRoadEntrances);
+    deriv_accessRoadsCost(in->terrain, in->layout, in->nTurb,
+        &dc[COST_ACCESS_ROADS][D_DIAMETER]);
+
+    c[COST_SITE_COMPOUND] = siteCompoundCost(out->accessRoadEntrances,
+        out->constructionTime, out->farmSize);
+    deriv_siteCompoundCost(out->farmSize, &d1);
+    dc[COST_SITE_COMPOUND][D_RATING] = d1 * dfarmSize;
+
+    c[COST_BUILDING] = buildingCost(out->buildingSize);
+    deriv_buildingCost(out->buildingSize, &d1);
+    dc[COST_BUILDING][D_RATING] = d1 * dbuildingSize;
+
+    c[COST_FOUNDATION] = foundationCost(in->rating, in->diameter, in->topMass,
+        in->hubHt, in->soil, in->nTurb);
+    deriv_foundationCost(in->rating, in->diameter, in->topMass, in->nTurb,
+        &d1, &d2, &d3);
+    dc[COST_FOUNDATION][D_DIAMETER] = d1;
+    dc[COST_FOUNDATION][D_TOPMASS] = d2;
+    dc[COST_FOUNDATION][D_HUBHT] = d3;
+    deriv_foundationCost_rating(in->diameter, in->topMass, in->nTurb,
+        &dc[COST_FOUNDATION][D_RATING]);
+
+    c[COST_ERECTION] = erectionCost(in->rating, in->hubHt, in->nTurb,
+        out->weatherDelayDays, out->craneBreakdowns, in->deliveryAssistRequired);
+    deriv_erectionCost(in->nTurb, &dc[COST_ERECTION][D_HUBHT]);
+    deriv_erectionCost_rating(in->nTurb, &dc[COST_ERECTION][D_RATING]);
+
+    c[COST_ELECTRICAL_MATERIALS] = electricalMaterialsCost(in->terrain, in->layout,
+        out->farmSize, in->diameter, in->nTurb, in->padMountTransformer,
+        in->thermalBackfill);
+    deriv_electricalMaterialsCost(in->terrain, in->layout, in->nTurb,
+        &dc[COST_ELECTRICAL_MATERIALS][D_DIAMETER]);
+    deriv_electricalMaterialsCost_farmSize(&d1);
+    dc[COST_ELECTRICAL_MATERIALS][D_RATING] = d1 * dfarmSize;
+
+    c[COST_ELECTRICAL_INSTALLATION] = electricalInstallationCost(in->terrain,
+        in->layout, out->farmSize, in->diameter, in->nTurb,
+        in->rockTrenchingLength, in->overheadCollector);
+    deriv_electricalInstallationCost(in->terrain, in->layout, in->nTurb,
+        in->rockTrenchingLength, &dc[COST_ELECTRICAL_INSTALLATION][D_DIAMETER]);
+    deriv_electricalInstallationCost_farmSize(out->farmSize, &d1);
+    dc[COST_ELECTRICAL_INSTALLATION][D_RATING] = d1 * dfarmSize;
+
+    c[COST_SUBSTATION] = substationCost(in->voltage, out->farmSize);
+    deriv_substationCost(in->voltage, out->farmSize, &d1);
+    dc[COST_SUBSTATION][D_RATING] = d1 * dfarmSize;
+
+    c[COST_TRANSMISSION] = transmissionCost(in->voltage, in->distInter,
+        in->newSwitchyardRequired);
+
+    c[COST_PROJECT_MANAGEMENT] = projectMgmtCost(out->constructionTime);
+
+    c[COST_DEVELOPMENT] = developmentCost(in->developmentFee);
+
+    // multipliers (alpha does not depend on any of the derivative inputs)
+    MultCost result;
+
+    result = insuranceMultiplierAndCost(tcc, out->farmSize,
+        c[COST_FOUNDATION], in->performanceBond);
+    c[COST_INSURANCE] = result.cost;
+    out->insuranceAlpha = result.alpha;
+    deriv_insuranceMultiplierAndCost(out->farmSize, in->performanceBond, &d1, &d2);
+    for (j = 0; j < N_DERIV_VARS; j++){
+        dc[COST_INSURANCE][j] = d2 * dc[COST_FOUNDATION][j];
+    }
+    dc[COST_INSURANCE][D_TURBINECOST] += d1 / in->rating;
+    dc[COST_INSURANCE][D_RATING] += d1 * dtcc;
+    deriv_insuranceMultiplierAndCost_farmSize(tcc, in->performanceBond, &d1);
+    dc[COST_INSURANCE][D_RATING] += d1 * dfarmSize;
+
+    result = markupMultiplierAndCost(c[COST_TRANSPORTATION], in->contingency,
+        in->warranty, in->useTax, in->overhead, in->profitMargin);
+    c[COST_MARKUP] = result.cost;
+    out->markupAlpha = result.alpha;
+    deriv_markupMultiplierAndCost(in->contingency, in->warranty, in->useTax,
+        in->overhead, in->profitMargin, &d1);
+    for (j = 0; j < N_DERIV_VARS; j++){
+        dc[COST_MARKUP][j] = d1 * dc[COST_TRANSPORTATION][j];
+    }
+
+    // total, less the turbine cost so only BOS is left
+    sum = 0.0;
+    for (i = 0; i < N_COST_ITEMS; i++){
+        sum += c[i];
+    }
+    alpha = out->insuranceAlpha + out->markupAlpha;
+
+    base = sum / (1.0 - alpha) - in->turbineCost * in->nTurb;
+    out->bosCost = base * in->multiplier;
+
+    for (j = 0; j < N_DERIV_VARS; j++){
+        sum = 0.0;
+        for (i = 0; i < N_COST_ITEMS; i++){
+            sum += dc[i][j];
+        }
+        out->dbosCost[j] = in->multiplier / (1.0 - alpha) * sum;
+    }
+    out->dbosCost[D_TURBINECOST] -= in->multiplier * in->nTurb;
+    out->dbosCost[D_MULTIPLIER] = base;
+
+}
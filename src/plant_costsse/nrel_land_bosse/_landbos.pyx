@@ -1,6 +1,27 @@
 # distutils: language = c
+# cython: boundscheck=False, wraparound=False
 
 cimport c_landbos
+from cython.parallel cimport prange
+import numpy as np
+
+
+cdef extern from *:
+    """
+    #ifdef _OPENMP
+    #include <omp.h>
+    #define LANDBOS_OPENMP 1
+    static int landbos_max_threads(void){ return omp_get_max_threads(); }
+    #else
+    #define LANDBOS_OPENMP 0
+    static int landbos_max_threads(void){ return 1; }
+    #endif
+    """
+    int LANDBOS_OPENMP
+    int landbos_max_threads() nogil
+
+# True if the extension was built with OpenMP (otherwise landBOS_batch runs serially)
+openmp = bool(LANDBOS_OPENMP)
 
 
 
@@ -210,3 +231,861 @@ def totalCost(double rating, double diameter, double hubHt,
         overheadCollector, performanceBond, contingency, warranty,
         useTax, overhead, profitMargin, developmentFee, transportDist)
 
+
+
+# line items of landBOS in the order of the CostItem enum
+cost_items = ('transportation', 'engineering', 'powerperf', 'roads', 'compound',
+    'building', 'foundation', 'erection', 'elecmat', 'elecinst', 'substation',
+    'transmission', 'projmgmt', 'development', 'insurance', 'markup')
+
+# inputs the landBOS derivatives are taken with respect to (DerivVar enum)
+deriv_vars = ('diameter', 'hubHt', 'topMass', 'turbineCost', 'rating', 'multiplier')
+
+
+cdef dict _results(c_landbos.LandBOSResults* r):
+
+    cdef int i, j
+
+    out = {'farmSize': r.farmSize, 'constructionTime': r.constructionTime,
+        'accessRoadEntrances': r.accessRoadEntrances,
+        'weatherDelayDays': r.weatherDelayDays, 'craneBreakdowns': r.craneBreakdowns,
+        'buildingSize': r.buildingSize, 'permanentMetTowers': r.permanentMetTowers,
+        'tempMetTowers': r.tempMetTowers, 'insurance_alpha': r.insuranceAlpha,
+        'markup_alpha': r.markupAlpha, 'bos_costs': r.bosCost}
+
+    dcost = np.empty((c_landbos.N_COST_ITEMS, c_landbos.N_DERIV_VARS))
+    dbos_costs = np.empty(c_landbos.N_DERIV_VARS)
+    for i in range(c_landbos.N_COST_ITEMS):
+        out[cost_items[i]] = r.cost[i]
+        for j in range(c_landbos.N_DERIV_VARS):
+            dcost[i, j] = r.dcost[i][j]
+    for j in range(c_landbos.N_DERIV_VARS):
+        dbos_costs[j] = r.dbosCost[j]
+
+    out['dcost'] = dcost
+    out['dbos_costs'] = dbos_costs
+
+    return out
+
+
+def landBOS(double rating, double diameter, double hubHt,
+        int nTurb, double voltage, double distInter,
+        c_landbos.SiteTerrain terrain, c_landbos.TurbineLayout layout,
+        c_landbos.SoilCondition soil, double turbineCost, double topMass,
+        double multiplier=1.0, int constructionTime=-1, int accessRoadEntrances=-1,
+        int weatherDelayDays=-1, int craneBreakdowns=-1, double buildingSize=-1,
+        double permanentMetTowers=-1, double tempMetTowers=-1,
+        bint deliveryAssistRequired=False, bint padMountTransformer=True,
+        bint newSwitchyardRequired=True, double rockTrenchingLength=10.0,
+        double thermalBackfill=0.0, double overheadCollector=0.0,
+        bint performanceBond=False, double contingency=3.0, double warranty=0.02,
+        double useTax=0.0, double overhead=5.0, double profitMargin=5.0,
+        double developmentFee=5.0, double transportDist=0.0):
+    """
+    Whole land-based BOS model in a single call.
+
+    turbineCost is per turbine and topMass in tonnes; defaults left at -1 are computed.
+    Returns a dictionary with the defaults, every line item in cost_items,
+    'insurance_alpha', 'markup_alpha', 'bos_costs' (total less turbine cost, times
+    multiplier), 'dcost' (line items x deriv_vars) and 'dbos_costs' (deriv_vars).
+    """
+
+    cdef c_landbos.LandBOSInputs inputs
+    cdef c_landbos.LandBOSResults results
+
+    inputs.rating = rating
+    inputs.diameter = diameter
+    inputs.hubHt = hubHt
+    inputs.nTurb = nTurb
+    inputs.voltage = voltage
+    inputs.distInter = distInter
+    inputs.terrain = terrain
+    inputs.layout = layout
+    inputs.soil = soil
+    inputs.turbineCost = turbineCost
+    inputs.topMass = topMass
+    inputs.multiplier = multiplier
+    inputs.constructionTime = constructionTime
+    inputs.accessRoadEntrances = accessRoadEntrances
+    inputs.weatherDelayDays = weatherDelayDays
+    inputs.craneBreakdowns = craneBreakdowns
+    inputs.buildingSize = buildingSize
+    inputs.permanentMetTowers = permanentMetTowers
+    inputs.tempMetTowers = tempMetTowers
+    inputs.deliveryAssistRequired = deliveryAssistRequired
+    inputs.padMountTransformer = padMountTransformer
+    inputs.newSwitchyardRequired = newSwitchyardRequired
+    inputs.rockTrenchingLength = rockTrenchingLength
+    inputs.thermalBackfill = thermalBackfill
+    inputs.overheadCollector = overheadCollector
+    inputs.performanceBond = performanceBond
+    inputs.contingency = contingency
+    inputs.warranty = warranty
+    inputs.useTax = useTax
+    inputs.overhead = overhead
+    inputs.profitMargin = profitMargin
+    inputs.developmentFee = developmentFee
+    inputs.transportDist = transportDist
+
+    with nogil:
+        c_landbos.landBOS(&inputs, &results)
+
+    return _results(&results)
+
+
+
+
+# ---------------------------------------------------------------------
+# Vectorized versions: arguments are broadcast against each other and
+# each function loops over them in C with the GIL released.
+# ---------------------------------------------------------------------
+
+
+def _broadcast(*args):
+    arrays = np.broadcast_arrays(*[np.atleast_1d(a) for a in args])
+    return arrays[0].shape, [a.ravel() for a in arrays]
+
+
+cdef double[::1] _dbl(a):
+    return np.ascontiguousarray(a, dtype=np.float64)
+
+
+cdef int[::1] _int(a):
+    return np.ascontiguousarray(a, dtype=np.intc)
+
+
+def farmSize_batch(rating, nTurb):
+    shape, (a_rating, a_nTurb) = _broadcast(rating, nTurb)
+    cdef double[::1] v_rating = _dbl(a_rating)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_rating.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.farmSize(v_rating[i], v_nTurb[i])
+    return out.reshape(shape)
+
+
+def defaultConstructionTime_batch(nTurb):
+    shape, (a_nTurb,) = _broadcast(nTurb)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_nTurb.shape[0]
+    out = np.empty(n, dtype=np.intc)
+    cdef int[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.defaultConstructionTime(v_nTurb[i])
+    return out.reshape(shape)
+
+
+def defaultAccessRoadEntrances_batch(nTurb):
+    shape, (a_nTurb,) = _broadcast(nTurb)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_nTurb.shape[0]
+    out = np.empty(n, dtype=np.intc)
+    cdef int[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.defaultAccessRoadEntrances(v_nTurb[i])
+    return out.reshape(shape)
+
+
+def defaultBuildingSize_batch(farmSize):
+    shape, (a_farmSize,) = _broadcast(farmSize)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef Py_ssize_t i, n = v_farmSize.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.defaultBuildingSize(v_farmSize[i])
+    return out.reshape(shape)
+
+
+def defaultTempMetTowers_batch(farmSize):
+    shape, (a_farmSize,) = _broadcast(farmSize)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef Py_ssize_t i, n = v_farmSize.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.defaultTempMetTowers(v_farmSize[i])
+    return out.reshape(shape)
+
+
+def defaultPermanentMetTowers_batch(farmSize):
+    shape, (a_farmSize,) = _broadcast(farmSize)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef Py_ssize_t i, n = v_farmSize.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.defaultPermanentMetTowers(v_farmSize[i])
+    return out.reshape(shape)
+
+
+def defaultWeatherDelayDays_batch(nTurb):
+    shape, (a_nTurb,) = _broadcast(nTurb)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_nTurb.shape[0]
+    out = np.empty(n, dtype=np.intc)
+    cdef int[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.defaultWeatherDelayDays(v_nTurb[i])
+    return out.reshape(shape)
+
+
+def defaultCraneBreakdowns_batch(nTurb):
+    shape, (a_nTurb,) = _broadcast(nTurb)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_nTurb.shape[0]
+    out = np.empty(n, dtype=np.intc)
+    cdef int[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.defaultCraneBreakdowns(v_nTurb[i])
+    return out.reshape(shape)
+
+
+def transportationCost_batch(tcc, rating, nTurb, hubHt, transportDist=0.0):
+    shape, (a_tcc, a_rating, a_nTurb, a_hubHt, a_transportDist) = _broadcast(
+        tcc, rating, nTurb, hubHt, transportDist)
+    cdef double[::1] v_tcc = _dbl(a_tcc)
+    cdef double[::1] v_rating = _dbl(a_rating)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef double[::1] v_hubHt = _dbl(a_hubHt)
+    cdef double[::1] v_transportDist = _dbl(a_transportDist)
+    cdef Py_ssize_t i, n = v_tcc.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.transportationCost(v_tcc[i], v_rating[i], v_nTurb[i],
+                v_hubHt[i], v_transportDist[i])
+    return out.reshape(shape)
+
+
+def deriv_transportationCost_batch(rating, nTurb):
+    shape, (a_rating, a_nTurb) = _broadcast(rating, nTurb)
+    cdef double[::1] v_rating = _dbl(a_rating)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_rating.shape[0]
+    dtcc = np.empty(n)
+    dhubHt = np.empty(n)
+    cdef double[::1] v_dtcc = dtcc
+    cdef double[::1] v_dhubHt = dhubHt
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_transportationCost(v_rating[i], v_nTurb[i], &v_dtcc[i], &v_dhubHt[i])
+    return dtcc.reshape(shape), dhubHt.reshape(shape)
+
+
+def engineeringCost_batch(nTurb, farmSize):
+    shape, (a_nTurb, a_farmSize) = _broadcast(nTurb, farmSize)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef Py_ssize_t i, n = v_nTurb.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.engineeringCost(v_nTurb[i], v_farmSize[i])
+    return out.reshape(shape)
+
+
+def powerPerformanceCost_batch(hubHt, permanent, temporary):
+    shape, (a_hubHt, a_permanent, a_temporary) = _broadcast(hubHt, permanent, temporary)
+    cdef double[::1] v_hubHt = _dbl(a_hubHt)
+    cdef double[::1] v_permanent = _dbl(a_permanent)
+    cdef double[::1] v_temporary = _dbl(a_temporary)
+    cdef Py_ssize_t i, n = v_hubHt.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.powerPerformanceCost(v_hubHt[i], v_permanent[i], v_temporary[i])
+    return out.reshape(shape)
+
+
+def deriv_powerPerformanceCost_batch(hubHt, permanent, temporary):
+    shape, (a_hubHt, a_permanent, a_temporary) = _broadcast(hubHt, permanent, temporary)
+    cdef double[::1] v_hubHt = _dbl(a_hubHt)
+    cdef double[::1] v_permanent = _dbl(a_permanent)
+    cdef double[::1] v_temporary = _dbl(a_temporary)
+    cdef Py_ssize_t i, n = v_hubHt.shape[0]
+    dhubHt = np.empty(n)
+    cdef double[::1] v_dhubHt = dhubHt
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_powerPerformanceCost(v_hubHt[i], v_permanent[i], v_temporary[i],
+                &v_dhubHt[i])
+    return dhubHt.reshape(shape)
+
+
+def accessRoadsCost_batch(terrain, layout, nTurb, diameter, constructionTime,
+        accessRoadEntrances):
+    shape, (a_terrain, a_layout, a_nTurb, a_diameter, a_constructionTime,
+        a_accessRoadEntrances) = _broadcast(terrain, layout, nTurb, diameter,
+        constructionTime, accessRoadEntrances)
+    cdef int[::1] v_terrain = _int(a_terrain)
+    cdef int[::1] v_layout = _int(a_layout)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef double[::1] v_diameter = _dbl(a_diameter)
+    cdef int[::1] v_constructionTime = _int(a_constructionTime)
+    cdef int[::1] v_accessRoadEntrances = _int(a_accessRoadEntrances)
+    cdef Py_ssize_t i, n = v_terrain.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.accessRoadsCost(<c_landbos.SiteTerrain>v_terrain[i],
+                <c_landbos.TurbineLayout>v_layout[i], v_nTurb[i], v_diameter[i],
+                v_constructionTime[i], v_accessRoadEntrances[i])
+    return out.reshape(shape)
+
+
+def deriv_accessRoadsCost_batch(terrain, layout, nTurb):
+    shape, (a_terrain, a_layout, a_nTurb) = _broadcast(terrain, layout, nTurb)
+    cdef int[::1] v_terrain = _int(a_terrain)
+    cdef int[::1] v_layout = _int(a_layout)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_terrain.shape[0]
+    ddiameter = np.empty(n)
+    cdef double[::1] v_ddiameter = ddiameter
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_accessRoadsCost(<c_landbos.SiteTerrain>v_terrain[i],
+                <c_landbos.TurbineLayout>v_layout[i], v_nTurb[i], &v_ddiameter[i])
+    return ddiameter.reshape(shape)
+
+
+def siteCompoundCost_batch(accessRoadEntrances, constructionTime, farmSize):
+    shape, (a_accessRoadEntrances, a_constructionTime, a_farmSize) = _broadcast(
+        accessRoadEntrances, constructionTime, farmSize)
+    cdef int[::1] v_accessRoadEntrances = _int(a_accessRoadEntrances)
+    cdef int[::1] v_constructionTime = _int(a_constructionTime)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef Py_ssize_t i, n = v_farmSize.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.siteCompoundCost(v_accessRoadEntrances[i],
+                v_constructionTime[i], v_farmSize[i])
+    return out.reshape(shape)
+
+
+def buildingCost_batch(buildingSize):
+    shape, (a_buildingSize,) = _broadcast(buildingSize)
+    cdef double[::1] v_buildingSize = _dbl(a_buildingSize)
+    cdef Py_ssize_t i, n = v_buildingSize.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.buildingCost(v_buildingSize[i])
+    return out.reshape(shape)
+
+
+def foundationCost_batch(rating, diameter, topMass, hubHt, soil, nTurb):
+    shape, (a_rating, a_diameter, a_topMass, a_hubHt, a_soil, a_nTurb) = _broadcast(
+        rating, diameter, topMass, hubHt, soil, nTurb)
+    cdef double[::1] v_rating = _dbl(a_rating)
+    cdef double[::1] v_diameter = _dbl(a_diameter)
+    cdef double[::1] v_topMass = _dbl(a_topMass)
+    cdef double[::1] v_hubHt = _dbl(a_hubHt)
+    cdef int[::1] v_soil = _int(a_soil)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_rating.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.foundationCost(v_rating[i], v_diameter[i], v_topMass[i],
+                v_hubHt[i], <c_landbos.SoilCondition>v_soil[i], v_nTurb[i])
+    return out.reshape(shape)
+
+
+def deriv_foundationCost_batch(rating, diameter, topMass, nTurb):
+    shape, (a_rating, a_diameter, a_topMass, a_nTurb) = _broadcast(
+        rating, diameter, topMass, nTurb)
+    cdef double[::1] v_rating = _dbl(a_rating)
+    cdef double[::1] v_diameter = _dbl(a_diameter)
+    cdef double[::1] v_topMass = _dbl(a_topMass)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_rating.shape[0]
+    ddiameter = np.empty(n)
+    dtopMass = np.empty(n)
+    dhubHt = np.empty(n)
+    cdef double[::1] v_ddiameter = ddiameter
+    cdef double[::1] v_dtopMass = dtopMass
+    cdef double[::1] v_dhubHt = dhubHt
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_foundationCost(v_rating[i], v_diameter[i], v_topMass[i], v_nTurb[i],
+                &v_ddiameter[i], &v_dtopMass[i], &v_dhubHt[i])
+    return ddiameter.reshape(shape), dtopMass.reshape(shape), dhubHt.reshape(shape)
+
+
+def erectionCost_batch(rating, hubHt, nTurb, weatherDelayDays, craneBreakdowns,
+        deliveryAssistRequired=False):
+    shape, (a_rating, a_hubHt, a_nTurb, a_weatherDelayDays, a_craneBreakdowns,
+        a_deliveryAssistRequired) = _broadcast(rating, hubHt, nTurb, weatherDelayDays,
+        craneBreakdowns, deliveryAssistRequired)
+    cdef double[::1] v_rating = _dbl(a_rating)
+    cdef double[::1] v_hubHt = _dbl(a_hubHt)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef int[::1] v_weatherDelayDays = _int(a_weatherDelayDays)
+    cdef int[::1] v_craneBreakdowns = _int(a_craneBreakdowns)
+    cdef int[::1] v_deliveryAssistRequired = _int(a_deliveryAssistRequired)
+    cdef Py_ssize_t i, n = v_rating.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.erectionCost(v_rating[i], v_hubHt[i], v_nTurb[i],
+                v_weatherDelayDays[i], v_craneBreakdowns[i], v_deliveryAssistRequired[i])
+    return out.reshape(shape)
+
+
+def deriv_erectionCost_batch(nTurb):
+    shape, (a_nTurb,) = _broadcast(nTurb)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_nTurb.shape[0]
+    dhubHt = np.empty(n)
+    cdef double[::1] v_dhubHt = dhubHt
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_erectionCost(v_nTurb[i], &v_dhubHt[i])
+    return dhubHt.reshape(shape)
+
+
+def electricalMaterialsCost_batch(terrain, layout, farmSize, diameter, nTurb,
+        padMountTransformer=True, thermalBackfill=0.0):
+    shape, (a_terrain, a_layout, a_farmSize, a_diameter, a_nTurb, a_padMountTransformer,
+        a_thermalBackfill) = _broadcast(terrain, layout, farmSize, diameter, nTurb,
+        padMountTransformer, thermalBackfill)
+    cdef int[::1] v_terrain = _int(a_terrain)
+    cdef int[::1] v_layout = _int(a_layout)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef double[::1] v_diameter = _dbl(a_diameter)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef int[::1] v_padMountTransformer = _int(a_padMountTransformer)
+    cdef double[::1] v_thermalBackfill = _dbl(a_thermalBackfill)
+    cdef Py_ssize_t i, n = v_terrain.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.electricalMaterialsCost(<c_landbos.SiteTerrain>v_terrain[i],
+                <c_landbos.TurbineLayout>v_layout[i], v_farmSize[i], v_diameter[i], v_nTurb[i],
+                v_padMountTransformer[i], v_thermalBackfill[i])
+    return out.reshape(shape)
+
+
+def deriv_electricalMaterialsCost_batch(terrain, layout, nTurb):
+    shape, (a_terrain, a_layout, a_nTurb) = _broadcast(terrain, layout, nTurb)
+    cdef int[::1] v_terrain = _int(a_terrain)
+    cdef int[::1] v_layout = _int(a_layout)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef Py_ssize_t i, n = v_terrain.shape[0]
+    ddiameter = np.empty(n)
+    cdef double[::1] v_ddiameter = ddiameter
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_electricalMaterialsCost(<c_landbos.SiteTerrain>v_terrain[i],
+                <c_landbos.TurbineLayout>v_layout[i], v_nTurb[i], &v_ddiameter[i])
+    return ddiameter.reshape(shape)
+
+
+def electricalInstallationCost_batch(terrain, layout, farmSize, diameter, nTurb,
+        rockTrenchingLength=10.0, overheadCollector=0.0):
+    shape, (a_terrain, a_layout, a_farmSize, a_diameter, a_nTurb, a_rockTrenchingLength,
+        a_overheadCollector) = _broadcast(terrain, layout, farmSize, diameter, nTurb,
+        rockTrenchingLength, overheadCollector)
+    cdef int[::1] v_terrain = _int(a_terrain)
+    cdef int[::1] v_layout = _int(a_layout)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef double[::1] v_diameter = _dbl(a_diameter)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef double[::1] v_rockTrenchingLength = _dbl(a_rockTrenchingLength)
+    cdef double[::1] v_overheadCollector = _dbl(a_overheadCollector)
+    cdef Py_ssize_t i, n = v_terrain.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.electricalInstallationCost(<c_landbos.SiteTerrain>v_terrain[i],
+                <c_landbos.TurbineLayout>v_layout[i], v_farmSize[i], v_diameter[i], v_nTurb[i],
+                v_rockTrenchingLength[i], v_overheadCollector[i])
+    return out.reshape(shape)
+
+
+def deriv_electricalInstallationCost_batch(terrain, layout, nTurb, rockTrenchingLength=10.0):
+    shape, (a_terrain, a_layout, a_nTurb, a_rockTrenchingLength) = _broadcast(
+        terrain, layout, nTurb, rockTrenchingLength)
+    cdef int[::1] v_terrain = _int(a_terrain)
+    cdef int[::1] v_layout = _int(a_layout)
+    cdef int[::1] v_nTurb = _int(a_nTurb)
+    cdef double[::1] v_rockTrenchingLength = _dbl(a_rockTrenchingLength)
+    cdef Py_ssize_t i, n = v_terrain.shape[0]
+    ddiameter = np.empty(n)
+    cdef double[::1] v_ddiameter = ddiameter
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_electricalInstallationCost(<c_landbos.SiteTerrain>v_terrain[i],
+                <c_landbos.TurbineLayout>v_layout[i], v_nTurb[i], v_rockTrenchingLength[i],
+                &v_ddiameter[i])
+    return ddiameter.reshape(shape)
+
+
+def substationCost_batch(voltage, farmSize):
+    shape, (a_voltage, a_farmSize) = _broadcast(voltage, farmSize)
+    cdef double[::1] v_voltage = _dbl(a_voltage)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef Py_ssize_t i, n = v_voltage.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.substationCost(v_voltage[i], v_farmSize[i])
+    return out.reshape(shape)
+
+
+def transmissionCost_batch(voltage, distInter, newSwitchyardRequired=True):
+    shape, (a_voltage, a_distInter, a_newSwitchyardRequired) = _broadcast(
+        voltage, distInter, newSwitchyardRequired)
+    cdef double[::1] v_voltage = _dbl(a_voltage)
+    cdef double[::1] v_distInter = _dbl(a_distInter)
+    cdef int[::1] v_newSwitchyardRequired = _int(a_newSwitchyardRequired)
+    cdef Py_ssize_t i, n = v_voltage.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.transmissionCost(v_voltage[i], v_distInter[i],
+                v_newSwitchyardRequired[i])
+    return out.reshape(shape)
+
+
+def projectMgmtCost_batch(constructionTime):
+    shape, (a_constructionTime,) = _broadcast(constructionTime)
+    cdef int[::1] v_constructionTime = _int(a_constructionTime)
+    cdef Py_ssize_t i, n = v_constructionTime.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.projectMgmtCost(v_constructionTime[i])
+    return out.reshape(shape)
+
+
+def developmentCost_batch(developmentFee=5):
+    shape, (a_developmentFee,) = _broadcast(developmentFee)
+    cdef double[::1] v_developmentFee = _dbl(a_developmentFee)
+    cdef Py_ssize_t i, n = v_developmentFee.shape[0]
+    out = np.empty(n)
+    cdef double[::1] v_out = out
+    with nogil:
+        for i in range(n):
+            v_out[i] = c_landbos.developmentCost(v_developmentFee[i])
+    return out.reshape(shape)
+
+
+def insuranceMultiplierAndCost_batch(tcc, farmSize, foundationCost, performanceBond=True):
+    shape, (a_tcc, a_farmSize, a_foundationCost, a_performanceBond) = _broadcast(
+        tcc, farmSize, foundationCost, performanceBond)
+    cdef double[::1] v_tcc = _dbl(a_tcc)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef double[::1] v_foundationCost = _dbl(a_foundationCost)
+    cdef int[::1] v_performanceBond = _int(a_performanceBond)
+    cdef Py_ssize_t i, n = v_tcc.shape[0]
+    cdef c_landbos.MultCost result
+    alpha = np.empty(n)
+    cost = np.empty(n)
+    cdef double[::1] v_alpha = alpha
+    cdef double[::1] v_cost = cost
+    with nogil:
+        for i in range(n):
+            result = c_landbos.insuranceMultiplierAndCost(v_tcc[i], v_farmSize[i],
+                v_foundationCost[i], v_performanceBond[i])
+            v_alpha[i] = result.alpha
+            v_cost[i] = result.cost
+    return {'alpha': alpha.reshape(shape), 'cost': cost.reshape(shape)}
+
+
+def deriv_insuranceMultiplierAndCost_batch(farmSize, performanceBond=True):
+    shape, (a_farmSize, a_performanceBond) = _broadcast(farmSize, performanceBond)
+    cdef double[::1] v_farmSize = _dbl(a_farmSize)
+    cdef int[::1] v_performanceBond = _int(a_performanceBond)
+    cdef Py_ssize_t i, n = v_farmSize.shape[0]
+    dtcc = np.empty(n)
+    dfoundationCost = np.empty(n)
+    cdef double[::1] v_dtcc = dtcc
+    cdef double[::1] v_dfoundationCost = dfoundationCost
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_insuranceMultiplierAndCost(v_farmSize[i], v_performanceBond[i],
+                &v_dtcc[i], &v_dfoundationCost[i])
+    return dtcc.reshape(shape), dfoundationCost.reshape(shape)
+
+
+def markupMultiplierAndCost_batch(transportationCost, contingency=3.0, warranty=0.02,
+        useTax=0.0, overhead=5.0, profitMargin=5.0):
+    shape, (a_transportationCost, a_contingency, a_warranty, a_useTax, a_overhead,
+        a_profitMargin) = _broadcast(transportationCost, contingency, warranty, useTax,
+        overhead, profitMargin)
+    cdef double[::1] v_transportationCost = _dbl(a_transportationCost)
+    cdef double[::1] v_contingency = _dbl(a_contingency)
+    cdef double[::1] v_warranty = _dbl(a_warranty)
+    cdef double[::1] v_useTax = _dbl(a_useTax)
+    cdef double[::1] v_overhead = _dbl(a_overhead)
+    cdef double[::1] v_profitMargin = _dbl(a_profitMargin)
+    cdef Py_ssize_t i, n = v_transportationCost.shape[0]
+    cdef c_landbos.MultCost result
+    alpha = np.empty(n)
+    cost = np.empty(n)
+    cdef double[::1] v_alpha = alpha
+    cdef double[::1] v_cost = cost
+    with nogil:
+        for i in range(n):
+            result = c_landbos.markupMultiplierAndCost(v_transportationCost[i],
+                v_contingency[i], v_warranty[i], v_useTax[i], v_overhead[i],
+                v_profitMargin[i])
+            v_alpha[i] = result.alpha
+            v_cost[i] = result.cost
+    return {'alpha': alpha.reshape(shape), 'cost': cost.reshape(shape)}
+
+
+def deriv_markupMultiplierAndCost_batch(contingency=3.0, warranty=0.02, useTax=0.0,
+        overhead=5.0, profitMargin=5.0):
+    shape, (a_contingency, a_warranty, a_useTax, a_overhead, a_profitMargin) = _broadcast(
+        contingency, warranty, useTax, overhead, profitMargin)
+    cdef double[::1] v_contingency = _dbl(a_contingency)
+    cdef double[::1] v_warranty = _dbl(a_warranty)
+    cdef double[::1] v_useTax = _dbl(a_useTax)
+    cdef double[::1] v_overhead = _dbl(a_overhead)
+    cdef double[::1] v_profitMargin = _dbl(a_profitMargin)
+    cdef Py_ssize_t i, n = v_contingency.shape[0]
+    dtransportationCost = np.empty(n)
+    cdef double[::1] v_dtransportationCost = dtransportationCost
+    with nogil:
+        for i in range(n):
+            c_landbos.deriv_markupMultiplierAndCost(v_contingency[i], v_warranty[i],
+                v_useTax[i], v_overhead[i], v_profitMargin[i], &v_dtransportationCost[i])
+    return dtransportationCost.reshape(shape)
+
+
+
+# columns of the input table used by landBOS_batch (the landBOS arguments)
+batch_inputs = ('rating', 'diameter', 'hubHt', 'nTurb', 'voltage', 'distInter',
+    'terrain', 'layout', 'soil', 'turbineCost', 'topMass', 'multiplier',
+    'constructionTime', 'accessRoadEntrances', 'weatherDelayDays', 'craneBreakdowns',
+    'buildingSize', 'permanentMetTowers', 'tempMetTowers', 'deliveryAssistRequired',
+    'padMountTransformer', 'newSwitchyardRequired', 'rockTrenchingLength',
+    'thermalBackfill', 'overheadCollector', 'performanceBond', 'contingency',
+    'warranty', 'useTax', 'overhead', 'profitMargin', 'developmentFee', 'transportDist')
+
+_batch_defaults = ('farmSize', 'constructionTime', 'accessRoadEntrances',
+    'weatherDelayDays', 'craneBreakdowns', 'buildingSize', 'permanentMetTowers',
+    'tempMetTowers')
+
+
+cdef void _row_inputs(double[:, ::1] X, Py_ssize_t i,
+        c_landbos.LandBOSInputs* inputs) noexcept nogil:
+
+    inputs.rating = X[i, 0]
+    inputs.diameter = X[i, 1]
+    inputs.hubHt = X[i, 2]
+    inputs.nTurb = <int> X[i, 3]
+    inputs.voltage = X[i, 4]
+    inputs.distInter = X[i, 5]
+    inputs.terrain = <c_landbos.SiteTerrain> <int> X[i, 6]
+    inputs.layout = <c_landbos.TurbineLayout> <int> X[i, 7]
+    inputs.soil = <c_landbos.SoilCondition> <int> X[i, 8]
+    inputs.turbineCost = X[i, 9]
+    inputs.topMass = X[i, 10]
+    inputs.multiplier = X[i, 11]
+    inputs.constructionTime = <int> X[i, 12]
+    inputs.accessRoadEntrances = <int> X[i, 13]
+    inputs.weatherDelayDays = <int> X[i, 14]
+    inputs.craneBreakdowns = <int> X[i, 15]
+    inputs.buildingSize = X[i, 16]
+    inputs.permanentMetTowers = X[i, 17]
+    inputs.tempMetTowers = X[i, 18]
+    inputs.deliveryAssistRequired = <int> X[i, 19]
+    inputs.padMountTransformer = <int> X[i, 20]
+    inputs.newSwitchyardRequired = <int> X[i, 21]
+    inputs.rockTrenchingLength = X[i, 22]
+    inputs.thermalBackfill = X[i, 23]
+    inputs.overheadCollector = X[i, 24]
+    inputs.performanceBond = <int> X[i, 25]
+    inputs.contingency = X[i, 26]
+    inputs.warranty = X[i, 27]
+    inputs.useTax = X[i, 28]
+    inputs.overhead = X[i, 29]
+    inputs.profitMargin = X[i, 30]
+    inputs.developmentFee = X[i, 31]
+    inputs.transportDist = X[i, 32]
+
+
+cdef void _landBOS_row(double[:, ::1] X, Py_ssize_t i, double[:, ::1] defaults,
+        double[:, ::1] costs, double[:, ::1] totals, double[:, :, ::1] dcost,
+        double[:, ::1] dbos) noexcept nogil:
+
+    cdef c_landbos.LandBOSInputs inputs
+    cdef c_landbos.LandBOSResults r
+    cdef int j, k
+
+    _row_inputs(X, i, &inputs)
+    c_landbos.landBOS(&inputs, &r)
+
+    defaults[i, 0] = r.farmSize
+    defaults[i, 1] = r.constructionTime
+    defaults[i, 2] = r.accessRoadEntrances
+    defaults[i, 3] = r.weatherDelayDays
+    defaults[i, 4] = r.craneBreakdowns
+    defaults[i, 5] = r.buildingSize
+    defaults[i, 6] = r.permanentMetTowers
+    defaults[i, 7] = r.tempMetTowers
+
+    for j in range(c_landbos.N_COST_ITEMS):
+        costs[i, j] = r.cost[j]
+        for k in range(c_landbos.N_DERIV_VARS):
+            dcost[i, j, k] = r.dcost[j][k]
+
+    totals[i, 0] = r.insuranceAlpha
+    totals[i, 1] = r.markupAlpha
+    totals[i, 2] = r.bosCost
+
+    for k in range(c_landbos.N_DERIV_VARS):
+        dbos[i, k] = r.dbosCost[k]
+
+
+def landBOS_batch(rating, diameter, hubHt, nTurb, voltage, distInter, terrain, layout,
+        soil, turbineCost, topMass, multiplier=1.0, constructionTime=-1,
+        accessRoadEntrances=-1, weatherDelayDays=-1, craneBreakdowns=-1,
+        buildingSize=-1, permanentMetTowers=-1, tempMetTowers=-1,
+        deliveryAssistRequired=False, padMountTransformer=True,
+        newSwitchyardRequired=True, rockTrenchingLength=10.0, thermalBackfill=0.0,
+        overheadCollector=0.0, performanceBond=False, contingency=3.0, warranty=0.02,
+        useTax=0.0, overhead=5.0, profitMargin=5.0, developmentFee=5.0,
+        transportDist=0.0, int n_threads=0):
+    """
+    landBOS over broadcast array arguments, split across n_threads OpenMP threads
+    (0 uses the OpenMP default).  Every plant is written to its own slot so the
+    result does not depend on the number of threads.
+
+    Returns the landBOS dictionary with an array for every entry; 'dcost' and
+    'dbos_costs' get trailing dimensions (line items x deriv_vars) and (deriv_vars).
+    """
+
+    shape, columns = _broadcast(rating, diameter, hubHt, nTurb, voltage, distInter,
+        terrain, layout, soil, turbineCost, topMass, multiplier, constructionTime,
+        accessRoadEntrances, weatherDelayDays, craneBreakdowns, buildingSize,
+        permanentMetTowers, tempMetTowers, deliveryAssistRequired, padMountTransformer,
+        newSwitchyardRequired, rockTrenchingLength, thermalBackfill, overheadCollector,
+        performanceBond, contingency, warranty, useTax, overhead, profitMargin,
+        developmentFee, transportDist)
+
+    cdef double[:, ::1] X = np.ascontiguousarray(np.column_stack(columns), dtype=np.float64)
+    cdef Py_ssize_t i, n = X.shape[0]
+
+    defaults = np.empty((n, len(_batch_defaults)))
+    costs = np.empty((n, c_landbos.N_COST_ITEMS))
+    totals = np.empty((n, 3))
+    dcost = np.empty((n, c_landbos.N_COST_ITEMS, c_landbos.N_DERIV_VARS))
+    dbos = np.empty((n, c_landbos.N_DERIV_VARS))
+
+    cdef double[:, ::1] v_defaults = defaults
+    cdef double[:, ::1] v_costs = costs
+    cdef double[:, ::1] v_totals = totals
+    cdef double[:, :, ::1] v_dcost = dcost
+    cdef double[:, ::1] v_dbos = dbos
+
+    if n_threads <= 0:
+        n_threads = landbos_max_threads()
+
+    for i in prange(n, nogil=True, schedule='static', num_threads=n_threads):
+        _landBOS_row(X, i, v_defaults, v_costs, v_totals, v_dcost, v_dbos)
+
+    out = {}
+    for j, name in enumerate(_batch_defaults):
+        out[name] = defaults[:, j].reshape(shape)
+    for name in _batch_defaults[1:5]:
+        out[name] = out[name].astype(np.intc)
+    for j, name in enumerate(cost_items):
+        out[name] = costs[:, j].reshape(shape)
+    out['insurance_alpha'] = totals[:, 0].reshape(shape)
+    out['markup_alpha'] = totals[:, 1].reshape(shape)
+    out['bos_costs'] = totals[:, 2].reshape(shape)
+    out['dcost'] = dcost.reshape(shape + dcost.shape[1:])
+    out['dbos_costs'] = dbos.reshape(shape + dbos.shape[1:])
+
+    return out
+
+
+
+# fields of the landBOS_records structured array: the line items of cost_items,
+# then the multipliers and the total
+record_fields = cost_items + ('insurance_alpha', 'markup_alpha', 'bos_costs')
+record_dtype = np.dtype([(name, np.float64) for name in record_fields])
+
+
+cdef void _landBOS_record(double[:, ::1] X, Py_ssize_t i, double[:, ::1] records) noexcept nogil:
+
+    cdef c_landbos.LandBOSInputs inputs
+    cdef c_landbos.LandBOSResults r
+    cdef int j
+
+    _row_inputs(X, i, &inputs)
+    c_landbos.landBOS(&inputs, &r)
+
+    for j in range(c_landbos.N_COST_ITEMS):
+        records[i, j] = r.cost[j]
+    records[i, c_landbos.N_COST_ITEMS] = r.insuranceAlpha
+    records[i, c_landbos.N_COST_ITEMS + 1] = r.markupAlpha
+    records[i, c_landbos.N_COST_ITEMS + 2] = r.bosCost
+
+
+def landBOS_records(rating, diameter, hubHt, nTurb, voltage, distInter, terrain, layout,
+        soil, turbineCost, topMass, multiplier=1.0, constructionTime=-1,
+        accessRoadEntrances=-1, weatherDelayDays=-1, craneBreakdowns=-1,
+        buildingSize=-1, permanentMetTowers=-1, tempMetTowers=-1,
+        deliveryAssistRequired=False, padMountTransformer=True,
+        newSwitchyardRequired=True, rockTrenchingLength=10.0, thermalBackfill=0.0,
+        overheadCollector=0.0, performanceBond=False, contingency=3.0, warranty=0.02,
+        useTax=0.0, overhead=5.0, profitMargin=5.0, developmentFee=5.0,
+        transportDist=0.0, int n_threads=0):
+    """
+    landBOS_batch as a structured array of record_dtype, broadcast shape, with one
+    float64 field per entry of record_fields.  Each plant's record is written in place
+    by C, so the array can be handed on without copying.  The C landBOS still computes
+    the derivatives of every plant; they are discarded, not returned.
+    """
+
+    shape, columns = _broadcast(rating, diameter, hubHt, nTurb, voltage, distInter,
+        terrain, layout, soil, turbineCost, topMass, multiplier, constructionTime,
+        accessRoadEntrances, weatherDelayDays, craneBreakdowns, buildingSize,
+        permanentMetTowers, tempMetTowers, deliveryAssistRequired, padMountTransformer,
+        newSwitchyardRequired, rockTrenchingLength, thermalBackfill, overheadCollector,
+        performanceBond, contingency, warranty, useTax, overhead, profitMargin,
+        developmentFee, transportDist)
+
+    cdef double[:, ::1] X = np.ascontiguousarray(np.column_stack(columns), dtype=np.float64)
+    cdef Py_ssize_t i, n = X.shape[0]
+
+    records = np.empty(n, dtype=record_dtype)
+    cdef double[:, ::1] v_records = records.view(np.float64).reshape(n, len(record_fields))
+
+    if n_threads <= 0:
+        n_threads = landbos_max_threads()
+
+    for i in prange(n, nogil=True, schedule='static', num_threads=n_threads):
+        _landBOS_record(X, i, v_records)
+
+    return records.reshape(shape)
@@ -1,4 +1,4 @@
-cdef extern from "LandBOS.h":
+cdef extern from "LandBOS.h" nogil:
 
     ctypedef enum SiteTerrain:
         FLAT_TO_ROLLING
@@ -17,6 +17,61 @@ cdef extern from "LandBOS.h":
         double alpha
         double cost
 
+    enum:
+        N_COST_ITEMS
+        N_DERIV_VARS
+
+    ctypedef struct LandBOSInputs:
+        double rating
+        double diameter
+        double hubHt
+        int nTurb
+        double voltage
+        double distInter
+        SiteTerrain terrain
+        TurbineLayout layout
+        SoilCondition soil
+        double turbineCost
+        double topMass
+        double multiplier
+        int constructionTime
+        int accessRoadEntrances
+        int weatherDelayDays
+        int craneBreakdowns
+        double buildingSize
+        double permanentMetTowers
+        double tempMetTowers
+        int deliveryAssistRequired
+        int padMountTransformer
+        int newSwitchyardRequired
+        double rockTrenchingLength
+        double thermalBackfill
+        double overheadCollector
+        int performanceBond
+        double contingency
+        double warranty
+        double useTax
+        double overhead
+        double profitMargin
+        double developmentFee
+        double transportDist
+
+    ctypedef struct LandBOSResults:
+        double farmSize
+        int constructionTime
+        int accessRoadEntrances
+        int weatherDelayDays
+        int craneBreakdowns
+        double buildingSize
+        double permanentMetTowers
+        double tempMetTowers
+        double cost[N_COST_ITEMS]
+        double insuranceAlpha
+        double markupAlpha
+        double bosCost
+        double dcost[N_COST_ITEMS][N_DERIV_VARS]
+        double dbosCost[N_DERIV_VARS]
+
     double farmSize(double rating, int nTurb)
 
     int defaultConstructionTime(int nTurb)
@@ -120,4 +175,4 @@ cdef extern from "LandBOS.h":
         double useTax, double overhead, double profitMargin,
         double developmentFee, double transportDist)
 
-
+    void landBOS(const LandBOSInputs* inputs, LandBOSResults* out)
@@ -9,9 +9,16 @@ Copyright (c) NREL. All rights reserved.
 
 import numpy as np
 from openmdao.main.api import Component, Assembly
-from openmdao.main.datatypes.api import Int, Float, Enum, Bool
+from openmdao.main.datatypes.api import Int, Float, Enum, Bool, VarTree, Array, Str
+
+from fusedwind.plant_cost.fused_bos_costs import BOSVarTree
 
 import _landbos
+from plant_costsse.nrel_land_bosse.nrel_land_bosse_core import terrain_options, layout_options, soil_options, \
+    fused_inputs, fused_deriv_inputs, land_bos, land_bos_jacobian, land_bos_breakdown, \
+    land_bos_workflow, land_bos_connections, layout_diameter, IncrementalLandBOS
+from plant_costsse.nrel_land_bosse.nrel_land_bosse_collector import layout_cable_length
+from plant_costsse.nrel_land_bosse.nrel_land_bosse_roads import RoadNetwork, open_terrain_raster
 
 
 def Enum2Int(component, trait):
@@ -157,20 +164,23 @@ class PowerPerformance(Component):
 
 class AccessRoads(Component):
 
-    terrain = Enum('FLAT_TO_ROLLING', ('FLAT_TO_ROLLING', 'RIDGE_TOP', 'MOUNTAINOUS'),
+    terrain = Enum('FLAT_TO_ROLLING', terrain_options,
         iotype='in', desc='terrain options')
-    layout = Enum('SIMPLE', ('SIMPLE', 'COMPLEX'), iotype='in',
+    layout = Enum('SIMPLE', layout_options, iotype='in',
         desc='layout options')
     nTurbines = Int(iotype='in', desc='number of turbines')
     diameter = Float(iotype='in', units='m', desc='rotor diameter')
     constructionTime = Int(iotype='in', units='mo', desc='construction time')
     accessRoadEntrances = Int(iotype='in', desc='access road entrances')
+    road_length = Float(0.0, iotype='in', units='m', desc='access road length (0: estimated from the rotor diameter)')
+    road_diameters = Float(5.0, iotype='in', desc='access road per turbine in rotor diameters assumed by the model (see layout_diameter)')
 
     cost = Float(iotype='out', units='USD', desc='access roads and site improvement cost')
 
     def execute(self):
         self.cost = _landbos.accessRoadsCost(Enum2Int(self, 'terrain'),
-            Enum2Int(self, 'layout'), self.nTurbines, self.diameter,
+            Enum2Int(self, 'layout'), self.nTurbines,
+            layout_diameter(self.diameter, self.nTurbines, self.road_length, self.road_diameters),
             self.constructionTime, self.accessRoadEntrances)
 
     def list_deriv_vars(self):
@@ -184,6 +194,8 @@ class AccessRoads(Component):
 
         ddiameter = _landbos.deriv_accessRoadsCost(Enum2Int(self, 'terrain'),
             Enum2Int(self, 'layout'), self.nTurbines)
+        if self.road_length > 0:
+            ddiameter = 0.0
         J = np.array([[ddiameter]])
 
         return J
@@ -218,7 +230,7 @@ class Foundations(Component):
     diameter = Float(iotype='in', units='m', desc='rotor diameter')
     topMass = Float(iotype='in', units='kg', desc='tower top mass (tonnes)')
     hubHeight = Float(iotype='in', units='m', desc='hub height')
-    soil = Enum('STANDARD', ('STANDARD', 'BOUYANT'), iotype='in',
+    soil = Enum('STANDARD', soil_options, iotype='in',
         desc='soil options')
     nTurbines = Int(iotype='in', desc='number of turbines')
 
@@ -278,21 +290,25 @@ class Erection(Component):
 
 class ElecMaterials(Component):
 
-    terrain = Enum('FLAT_TO_ROLLING', ('FLAT_TO_ROLLING', 'RIDGE_TOP', 'MOUNTAINOUS'),
+    terrain = Enum('FLAT_TO_ROLLING', terrain_options,
         iotype='in', desc='terrain options')
-    layout = Enum('SIMPLE', ('SIMPLE', 'COMPLEX'), iotype='in',
+    layout = Enum('SIMPLE', layout_options, iotype='in',
         desc='layout options')
     farmSize = Float(iotype='in', units='MW', desc='wind farm size')
     diameter = Float(iotype='in', units='m', desc='rotor diameter')
     nTurbines = Int(iotype='in', desc='number of turbines')
     padMountTransformer = Bool(True, iotype='in', desc='pad mount transformer required')
     thermalBackfill = Float(0.0, iotype='in', units='mi', desc='MV thermal backfill')
+    cable_length = Float(0.0, iotype='in', units='m', desc='collector cable length (0: estimated from the rotor diameter)')
+    cable_diameters = Float(5.0, iotype='in', desc='collector cable per turbine in rotor diameters assumed by the model (see layout_diameter)')
 
     cost = Float(iotype='out', units='USD', desc='MV electrical materials cost')
 
     def execute(self):
         self.cost = _landbos.electricalMaterialsCost(Enum2Int(self, 'terrain'),
-            Enum2Int(self, 'layout'), self.farmSize, self.diameter, self.nTurbines,
+            Enum2Int(self, 'layout'), self.farmSize,
+            layout_diameter(self.diameter, self.nTurbines, self.cable_length, self.cable_diameters),
+            self.nTurbines,
             self.padMountTransformer, self.thermalBackfill)
 
     def list_deriv_vars(self):
@@ -306,6 +322,8 @@ class ElecMaterials(Component):
 
         ddiameter = _landbos.deriv_electricalMaterialsCost(Enum2Int(self, 'terrain'),
             Enum2Int(self, 'layout'), self.nTurbines)
+        if self.cable_length > 0:
+            ddiameter = 0.0
         J = np.array([[ddiameter]])
 
         return J
@@ -313,21 +331,25 @@ class ElecMaterials(Component):
 
 class ElecInstallation(Component):
 
-    terrain = Enum('FLAT_TO_ROLLING', ('FLAT_TO_ROLLING', 'RIDGE_TOP', 'MOUNTAINOUS'),
+    terrain = Enum('FLAT_TO_ROLLING', terrain_options,
         iotype='in', desc='terrain options')
-    layout = Enum('SIMPLE', ('SIMPLE', 'COMPLEX'), iotype='in',
+    layout = Enum('SIMPLE', layout_options, iotype='in',
         desc='layout options')
     farmSize = Float(iotype='in', units='MW', desc='wind farm size')
     diameter = Float(iotype='in', units='m', desc='rotor diameter')
     nTurbines = Int(iotype='in', desc='number of turbines')
     rockTrenchingLength = Float(10.0, iotype='in', desc='rock trenching required (% of collector cable length)')
     overheadCollector = Float(0.0, iotype='in', units='mi', desc='MV overhead collector')
+    cable_length = Float(0.0, iotype='in', units='m', desc='collector cable length (0: estimated from the rotor diameter)')
+    cable_diameters = Float(5.0, iotype='in', desc='collector cable per turbine in rotor diameters assumed by the model (see layout_diameter)')
 
     cost = Float(iotype='out', units='USD', desc='MV electrical materials cost')
 
     def execute(self):
         self.cost = _landbos.electricalInstallationCost(Enum2Int(self, 'terrain'),
-            Enum2Int(self, 'layout'), self.farmSize, self.diameter, self.nTurbines,
+            Enum2Int(self, 'layout'), self.farmSize,
+            layout_diameter(self.diameter, self.nTurbines, self.cable_length, self.cable_diameters),
+            self.nTurbines,
             self.rockTrenchingLength, self.overheadCollector)
 
     def list_deriv_vars(self):
@@ -341,6 +363,8 @@ class ElecInstallation(Component):
 
         ddiameter = _landbos.deriv_electricalInstallationCost(Enum2Int(self, 'terrain'),
             Enum2Int(self, 'layout'), self.nTurbines, self.rockTrenchingLength)
+        if self.cable_length > 0:
+            ddiameter = 0.0
         J = np.array([[ddiameter]])
 
         return J
@@ -484,6 +508,7 @@ class Total(Component):
     multiplier = Float(1.0, iotype='in')
 
     cost = Float(iotype='out', units='USD', desc='total BOS cost')
+    bos_breakdown = VarTree(BOSVarTree(), iotype='out', desc='BOS cost breakdown')
 
     missing_deriv_policy = 'assume_zero'
 
@@ -507,6 +532,12 @@ class Total(Component):
 
         self.cost *= self.multiplier
 
+        values = dict((name, getattr(self, name + '_cost')) for name in _landbos.cost_items)
+        values['insurance_alpha'] = self.insurance_alpha
+        values['markup_alpha'] = self.markup_alpha
+        for name, value in land_bos_breakdown(values, self.turbine_cost, self.nTurbines,
+                self.multiplier).items():
+            setattr(self.bos_breakdown, name, value)
 
     def list_deriv_vars(self):
 
@@ -531,6 +562,238 @@ class Total(Component):
         return J
 
 
+class CollectorLayout(Component):
+    """
+    Collector cable length of a turbine layout, routed as a capacity-constrained
+    minimum spanning tree from the substation (see collector_tree); connect
+    cable_length to NREL_Land_BOSSE.cable_length.
+    """
+
+    turbine_x = Array(iotype='in', units='m', desc='turbine x coordinates')
+    turbine_y = Array(iotype='in', units='m', desc='turbine y coordinates')
+    substation_x = Float(0.0, iotype='in', units='m', desc='substation x coordinate')
+    substation_y = Float(0.0, iotype='in', units='m', desc='substation y coordinate')
+    cable_capacity = Int(0, iotype='in', desc='largest number of turbines on one feeder (0: unconstrained)')
+
+    cable_length = Float(iotype='out', units='m', desc='collector cable length')
+
+    def execute(self):
+
+        self.cable_length = layout_cable_length(self.turbine_x, self.turbine_y,
+            self.substation_x, self.substation_y, self.cable_capacity)
+
+
+class RoadLayout(Component):
+    """
+    Access road length of a turbine layout, a minimum spanning forest over the pads
+    and entrances weighted by an optional terrain raster (see RoadNetwork); connect
+    road_length to NREL_Land_BOSSE.road_length.  Between runs only the roads at
+    turbines that moved are re-sampled from the raster.
+    """
+
+    turbine_x = Array(iotype='in', units='m', desc='turbine x coordinates')
+    turbine_y = Array(iotype='in', units='m', desc='turbine y coordinates')
+    entrance_x = Array(iotype='in', units='m', desc='road entrance x coordinates')
+    entrance_y = Array(iotype='in', units='m', desc='road entrance y coordinates')
+    terrain_raster = Str('', iotype='in', desc='.npy raster of road cost multipliers (memory-mapped), none if empty')
+    raster_x0 = Float(0.0, iotype='in', units='m', desc='x coordinate of the raster corner')
+    raster_y0 = Float(0.0, iotype='in', units='m', desc='y coordinate of the raster corner')
+    raster_cell_size = Float(1.0, iotype='in', units='m', desc='raster cell size')
+
+    road_length = Float(iotype='out', units='m', desc='terrain weighted access road length')
+
+    def __init__(self):
+
+        super(RoadLayout, self).__init__()
+
+        self.network = None
+        self._site = None
+
+    def execute(self):
+
+        turbines = np.column_stack([self.turbine_x, self.turbine_y])
+        site = (tuple(self.entrance_x), tuple(self.entrance_y), self.terrain_raster,
+                self.raster_x0, self.raster_y0, self.raster_cell_size)
+
+        if self.network is None or site != self._site:
+            raster = open_terrain_raster(self.terrain_raster, self.raster_x0, self.raster_y0,
+                self.raster_cell_size) if self.terrain_raster else None
+            self.network = RoadNetwork(turbines, np.column_stack([self.entrance_x, self.entrance_y]), raster)
+            self._site = site
+        else:
+            self.network.update(turbines)
+
+        self.road_length = self.network.weighted_length
+
+
+# component class of every name in land_bos_workflow
+land_bos_classes = {'fs': FarmSize, 'default': Defaults, 'transportation': Transportation,
+    'engineering': Engineering, 'powerperf': PowerPerformance, 'roads': AccessRoads,
+    'compound': SiteCompound, 'building': Building, 'foundation': Foundations,
+    'erection': Erection, 'elecmat': ElecMaterials, 'elecinst': ElecInstallation,
+    'substation': Substation, 'transmission': Transmission, 'projmgmt': ProjectMgmt,
+    'development': Development, 'insurance': Insurance, 'markup': Markup, 'total': Total}
+
+
+def land_bos_components():
+    """
+    new instance of every NREL_Land_BOSSE workflow component, by name
+    """
+
+    return dict((name, land_bos_classes[name]()) for name in land_bos_workflow)
+
+
+class LandBOSFused(Component):
+    """
+    The whole NREL_Land_BOSSE workflow evaluated by a single call to _landbos.landBOS.
+    """
+
+    machine_rating = Float(iotype='in', units='kW', desc='machine rating')
+    rotor_diameter = Float(iotype='in', units='m', desc='rotor diameter')
+    hub_height = Float(iotype='in', units='m', desc='hub height')
+    turbine_number = Int(iotype='in', desc='number of turbines')
+    voltage = Float(iotype='in', units='kV', desc='interconnect voltage')
+    distInter = Float(iotype='in', units='mi', desc='distance to interconnect')
+    terrain = Enum('FLAT_TO_ROLLING', terrain_options,
+        iotype='in', desc='terrain options')
+    layout = Enum('SIMPLE', layout_options, iotype='in',
+        desc='layout options')
+    soil = Enum('STANDARD', soil_options, iotype='in',
+        desc='soil options')
+
+    turbine_cost = Float(iotype='in', units='USD')
+    RNA_mass = Float(iotype='in', units='kg', desc='tower top mass')
+
+    multiplier = Float(1.0, iotype='in')
+
+    constructionTime = Int(-1, iotype='in', units='mo', desc='construction time')
+    buildingSize = Float(-1, iotype='in', units='ft**2', desc='O&M building size')
+    tempMetTowers = Float(-1, iotype='in', desc='temporary meteorological towers')
+    permanentMetTowers = Float(-1, iotype='in', desc='permananet meteorological towers')
+    weatherDelayDays = Int(-1, iotype='in', units='d', desc='weather delay days')
+    craneBreakdowns = Int(-1, iotype='in', desc='crane breakdowns')
+    accessRoadEntrances = Int(-1, iotype='in', desc='access road entrances')
+
+    deliveryAssistRequired = Bool(False, iotype='in', desc='delivery assist required')
+    padMountTransformer = Bool(True, iotype='in', desc='pad mount transformer required')
+    newSwitchyardRequired = Bool(True, iotype='in', desc='new switchyard required')
+    rockTrenchingLength = Float(10.0, iotype='in', desc='rock trenching required (% of collector cable length)')
+    thermalBackfill = Float(0.0, iotype='in', units='mi', desc='MV thermal backfill')
+    overheadCollector = Float(0.0, iotype='in', units='mi', desc='MV overhead collector')
+    performanceBond = Bool(False, iotype='in', desc='performance bond')
+    contingency = Float(3.0, iotype='in', desc='%')
+    warranty = Float(0.02, iotype='in', desc='%')
+    useTax = Float(0.0, iotype='in', desc='%')
+    overhead = Float(5.0, iotype='in', desc='%')
+    profitMargin = Float(5.0, iotype='in', desc='%')
+    developmentFee = Float(5.0, iotype='in', desc='development fee (in millions of dollars)')
+    transportDist = Float(0.0, iotype='in', units='mi', desc='transportation distance')
+    cable_length = Float(0.0, iotype='in', units='m', desc='collector cable length, e.g. from CollectorLayout (0: estimated from the rotor diameter)')
+    road_length = Float(0.0, iotype='in', units='m', desc='access road length, e.g. from RoadLayout (0: estimated from the rotor diameter)')
+    cable_diameters = Float(5.0, iotype='in', desc='collector cable per turbine in rotor diameters assumed by the model (see layout_diameter)')
+    road_diameters = Float(5.0, iotype='in', desc='access road per turbine in rotor diameters assumed by the model (see layout_diameter)')
+
+    transportation_cost = Float(iotype='out', units='USD', desc='turbine and transportation cost')
+    engineering_cost = Float(iotype='out', units='USD', desc='engineering cost')
+    powerperf_cost = Float(iotype='out', units='USD', desc='met masts and power performance cost')
+    roads_cost = Float(iotype='out', units='USD', desc='access roads and site improvement cost')
+    compound_cost = Float(iotype='out', units='USD', desc='site compound and security cost')
+    building_cost = Float(iotype='out', units='USD', desc='control - O&M building cost')
+    foundation_cost = Float(iotype='out', units='USD', desc='foundations cost')
+    erection_cost = Float(iotype='out', units='USD', desc='erection cost')
+    elecmat_cost = Float(iotype='out', units='USD', desc='MV electrical materials cost')
+    elecinst_cost = Float(iotype='out', units='USD', desc='MV electrical installation cost')
+    substation_cost = Float(iotype='out', units='USD', desc='collector substation cost')
+    transmission_cost = Float(iotype='out', units='USD', desc='transmission line and interconnect cost')
+    projmgmt_cost = Float(iotype='out', units='USD', desc='project management cost')
+    development_cost = Float(iotype='out', units='USD', desc='development cost')
+    insurance_cost = Float(iotype='out', units='USD', desc='constant portion of insurance cost')
+    markup_cost = Float(iotype='out', units='USD', desc='constant portion of markup cost')
+    insurance_alpha = Float(iotype='out', desc='multiplier portion of insurance cost')
+    markup_alpha = Float(iotype='out', desc='multiplier portion of markup cost')
+
+    bos_costs = Float(iotype='out', units='USD', desc='total BOS cost')
+    bos_breakdown = VarTree(BOSVarTree(), iotype='out', desc='BOS cost breakdown')
+
+    def execute(self):
+
+        values = fused_landbos(self)
+        self.set_outputs(values)
+
+        self.J = fused_jacobian(values)
+
+    def set_outputs(self, values):
+        """
+        line item costs, multipliers, bos_costs and bos_breakdown from land_bos values
+        """
+
+        for name in _landbos.cost_items:
+            setattr(self, name + '_cost', values[name])
+        self.insurance_alpha = values['insurance_alpha']
+        self.markup_alpha = values['markup_alpha']
+        self.bos_costs = values['bos_costs']
+
+        for name, value in land_bos_breakdown(values, self.turbine_cost, self.turbine_number,
+                self.multiplier).items():
+            setattr(self.bos_breakdown, name, value)
+
+    def list_deriv_vars(self):
+
+        inputs = fused_deriv_inputs
+        outputs = ('bos_costs',)
+
+        return inputs, outputs
+
+    def provideJ(self):
+
+        return self.J
+
+
+class LandBOSIncremental(LandBOSFused):
+    """
+    LandBOSFused evaluated by an IncrementalLandBOS over the workflow components, so a
+    run executes only the components downstream of the inputs changed since the
+    previous run.
+    """
+
+    evaluated_items = Int(iotype='out', desc='workflow components evaluated in the last run')
+    skipped_items = Int(iotype='out', desc='workflow components reused from the previous run')
+
+    def __init__(self):
+
+        super(LandBOSIncremental, self).__init__()
+
+        self.model = IncrementalLandBOS(land_bos_components())
+
+    def execute(self):
+
+        values = self.model.evaluate(**dict((name, getattr(self, name)) for name in fused_inputs))
+        self.set_outputs(values)
+
+        self.evaluated_items = len(self.model.evaluated)
+        self.skipped_items = len(self.model.skipped)
+
+    def provideJ(self):
+
+        return fused_jacobian(fused_landbos(self))
+
+
+def fused_landbos(obj):
+    """
+    land_bos evaluated on the fused_inputs of obj (a LandBOSFused component).
+    """
+
+    return land_bos(**dict((name, getattr(obj, name)) for name in fused_inputs))
+
+
+def fused_jacobian(values):
+    """
+    d(bos_costs)/d(fused_deriv_inputs) from the output of fused_landbos.
+    """
+
+    return land_bos_jacobian(values)[np.newaxis, :]
+
+
 class NREL_Land_BOSSE(Assembly):
 
     machine_rating = Float(iotype='in', units='kW', desc='machine rating')
@@ -539,11 +802,11 @@ class NREL_Land_BOSSE(Assembly):
     turbine_number = Int(iotype='in', desc='number of turbines')
     voltage = Float(iotype='in', units='kV', desc='interconnect voltage')
     distInter = Float(iotype='in', units='mi', desc='distance to interconnect')
-    terrain = Enum('FLAT_TO_ROLLING', ('FLAT_TO_ROLLING', 'RIDGE_TOP', 'MOUNTAINOUS'),
+    terrain = Enum('FLAT_TO_ROLLING', terrain_options,
         iotype='in', desc='terrain options')
-    layout = Enum('SIMPLE', ('SIMPLE', 'COMPLEX'), iotype='in',
+    layout = Enum('SIMPLE', layout_options, iotype='in',
         desc='layout options')
-    soil = Enum('STANDARD', ('STANDARD', 'BOUYANT'), iotype='in',
+    soil = Enum('STANDARD', soil_options, iotype='in',
         desc='soil options')
 
     turbine_cost = Float(iotype='in', units='USD')
@@ -577,172 +840,51 @@ class NREL_Land_BOSSE(Assembly):
     profitMargin = Float(5.0, iotype='in', desc='%')
     developmentFee = Float(5.0, iotype='in', desc='development fee (in millions of dollars)')
     transportDist = Float(0.0, iotype='in', units='mi', desc='transportation distance')
+    cable_length = Float(0.0, iotype='in', units='m', desc='collector cable length, e.g. from CollectorLayout (0: estimated from the rotor diameter)')
+    road_length = Float(0.0, iotype='in', units='m', desc='access road length, e.g. from RoadLayout (0: estimated from the rotor diameter)')
+    cable_diameters = Float(5.0, iotype='in', desc='collector cable per turbine in rotor diameters assumed by the model (see layout_diameter)')
+    road_diameters = Float(5.0, iotype='in', desc='access road per turbine in rotor diameters assumed by the model (see layout_diameter)')
 
     bos_costs = Float(iotype='out', units='USD', desc='total BOS cost')
+    bos_breakdown = VarTree(BOSVarTree(), iotype='out', desc='BOS cost breakdown')
+    skipped_items = Int(0, iotype='out', desc='workflow components reused from the previous run (incremental mode)')
+
+    def __init__(self, fused=False, incremental=False):
+        """
+        With fused=True the 19 component workflow is replaced by a single
+        LandBOSFused component that evaluates the whole model in one C call.
+        With incremental=True it is replaced by a LandBOSIncremental component that
+        runs the same components but executes only those downstream of the inputs
+        that changed.
+        """
+
+        self.fused = fused
+        self.incremental = incremental
+
+        super(NREL_Land_BOSSE, self).__init__()
 
     def configure(self):
 
-        self.add('fs', FarmSize())
-        self.add('default', Defaults())
-        self.add('transportation', Transportation())
-        self.add('engineering', Engineering())
-        self.add('powerperf', PowerPerformance())
-        self.add('roads', AccessRoads())
-        self.add('compound', SiteCompound())
-        self.add('building', Building())
-        self.add('foundation', Foundations())
-        self.add('erection', Erection())
-        self.add('elecmat', ElecMaterials())
-        self.add('elecinst', ElecInstallation())
-        self.add('substation', Substation())
-        self.add('transmission', Transmission())
-        self.add('projmgmt', ProjectMgmt())
-        self.add('development', Development())
-        self.add('insurance', Insurance())
-        self.add('markup', Markup())
-        self.add('total', Total())
-
-
-        self.driver.workflow.add(['fs', 'default', 'transportation', 'engineering',
-            'powerperf', 'roads', 'compound', 'building', 'foundation',
-            'erection', 'elecmat', 'elecinst', 'substation', 'transmission',
-            'projmgmt', 'development', 'insurance', 'markup', 'total'])
-
-        # connections to fs
-        self.connect('machine_rating', 'fs.rating')
-        self.connect('turbine_number', 'fs.nTurbines')
-
-        # connections to default
-        self.connect('turbine_number', 'default.nTurbines')
-        self.connect('fs.farmSize', 'default.farmSize')
-        self.connect('constructionTime', 'default.override_constructionTime')
-        self.connect('accessRoadEntrances', 'default.override_accessRoadEntrances')
-        self.connect('weatherDelayDays', 'default.override_weatherDelayDays')
-        self.connect('craneBreakdowns', 'default.override_craneBreakdowns')
-        self.connect('buildingSize', 'default.override_buildingSize')
-        self.connect('permanentMetTowers', 'default.override_permanentMetTowers')
-        self.connect('tempMetTowers', 'default.override_tempMetTowers')
-
-        # connections to transportation
-        self.connect('turbine_cost/machine_rating', 'transportation.TCC')
-        self.connect('machine_rating', 'transportation.rating')
-        self.connect('turbine_number', 'transportation.nTurbines')
-        self.connect('hub_height', 'transportation.hubHeight')
-        self.connect('transportDist', 'transportation.transportDist')
-
-        # connections to engineering
-        self.connect('turbine_number', 'engineering.nTurbines')
-        self.connect('fs.farmSize', 'engineering.farmSize')
-
-        # connections to powerperf
-        self.connect('hub_height', 'powerperf.hubHeight')
-        self.connect('default.permanentMetTowers', 'powerperf.permanentMetTowers')
-        self.connect('default.tempMetTowers', 'powerperf.tempMetTowers')
-
-        # connections to roads
-        self.connect('terrain', 'roads.terrain')
-        self.connect('layout', 'roads.layout')
-        self.connect('turbine_number', 'roads.nTurbines')
-        self.connect('rotor_diameter', 'roads.diameter')
-        self.connect('default.constructionTime', 'roads.constructionTime')
-        self.connect('default.accessRoadEntrances', 'roads.accessRoadEntrances')
-
-        # connections to compound
-        self.connect('default.constructionTime', 'compound.constructionTime')
-        self.connect('default.accessRoadEntrances', 'compound.accessRoadEntrances')
-        self.connect('fs.farmSize', 'compound.farmSize')
-
-        # connections to building
-        self.connect('default.buildingSize', 'building.buildingSize')
-
-        # connections to foundation
-        self.connect('machine_rating', 'foundation.rating')
-        self.connect('rotor_diameter', 'foundation.diameter')
-        self.connect('RNA_mass', 'foundation.topMass')
-        self.connect('hub_height', 'foundation.hubHeight')
-        self.connect('soil', 'foundation.soil')
-        self.connect('turbine_number', 'foundation.nTurbines')
-
-        # connections to erection
-        self.connect('machine_rating', 'erection.rating')
-        self.connect('hub_height', 'erection.hubHeight')
-        self.connect('turbine_number', 'erection.nTurbines')
-        self.connect('default.weatherDelayDays', 'erection.weatherDelayDays')
-        self.connect('default.craneBreakdowns', 'erection.craneBreakdowns')
-        self.connect('deliveryAssistRequired', 'erection.deliveryAssistRequired')
-
-        # connections to elecmat
-        self.connect('terrain', 'elecmat.terrain')
-        self.connect('layout', 'elecmat.layout')
-        self.connect('fs.farmSize', 'elecmat.farmSize')
-        self.connect('rotor_diameter', 'elecmat.diameter')
-        self.connect('turbine_number', 'elecmat.nTurbines')
-        self.connect('padMountTransformer', 'elecmat.padMountTransformer')
-        self.connect('thermalBackfill', 'elecmat.thermalBackfill')
-
-        # connections to elecinst
-        self.connect('terrain', 'elecinst.terrain')
-        self.connect('layout', 'elecinst.layout')
-        self.connect('fs.farmSize', 'elecinst.farmSize')
-        self.connect('rotor_diameter', 'elecinst.diameter')
-        self.connect('turbine_number', 'elecinst.nTurbines')
-        self.connect('rockTrenchingLength', 'elecinst.rockTrenchingLength')
-        self.connect('overheadCollector', 'elecinst.overheadCollector')
-
-        # connections to substation
-        self.connect('voltage', 'substation.voltage')
-        self.connect('fs.farmSize', 'substation.farmSize')
-
-        # connections to transmission
-        self.connect('voltage', 'transmission.voltage')
-        self.connect('distInter', 'transmission.distInter')
-        self.connect('newSwitchyardRequired', 'transmission.newSwitchyardRequired')
-
-        # connections to projmgmt
-        self.connect('default.constructionTime', 'projmgmt.constructionTime')
-
-        # connections to development
-        self.connect('developmentFee', 'development.developmentFee')
-
-        # connections to insurance
-        self.connect('turbine_cost/machine_rating', 'insurance.TCC')
-        self.connect('fs.farmSize', 'insurance.farmSize')
-        self.connect('foundation.cost', 'insurance.foundationCost')
-        self.connect('performanceBond', 'insurance.performanceBond')
-
-        # connections to markup
-        self.connect('transportation.cost', 'markup.transportationCost')
-        self.connect('contingency', 'markup.contingency')
-        self.connect('warranty', 'markup.warranty')
-        self.connect('useTax', 'markup.useTax')
-        self.connect('overhead', 'markup.overhead')
-        self.connect('profitMargin', 'markup.profitMargin')
-
-        # connections to total
-        self.connect('turbine_cost', 'total.turbine_cost')
-        self.connect('turbine_number', 'total.nTurbines')
-        self.connect('transportation.cost', 'total.transportation_cost')
-        self.connect('engineering.cost', 'total.engineering_cost')
-        self.connect('powerperf.cost', 'total.powerperf_cost')
-        self.connect('roads.cost', 'total.roads_cost')
-        self.connect('compound.cost', 'total.compound_cost')
-        self.connect('building.cost', 'total.building_cost')
-        self.connect('foundation.cost', 'total.foundation_cost')
-        self.connect('erection.cost', 'total.erection_cost')
-        self.connect('elecmat.cost', 'total.elecmat_cost')
-        self.connect('elecinst.cost', 'total.elecinst_cost')
-        self.connect('substation.cost', 'total.substation_cost')
-        self.connect('transmission.cost', 'total.transmission_cost')
-        self.connect('projmgmt.cost', 'total.projmgmt_cost')
-        self.connect('development.cost', 'total.development_cost')
-        self.connect('insurance.cost', 'total.insurance_cost')
-        self.connect('markup.cost', 'total.markup_cost')
-        self.connect('insurance.alpha', 'total.insurance_alpha')
-        self.connect('markup.alpha', 'total.markup_alpha')
-        self.connect('multiplier', 'total.multiplier')
-
-        # connections to outputs
-        self.connect('total.cost', 'bos_costs')
+        if self.fused or self.incremental:
+            self.add('landbos', LandBOSIncremental() if self.incremental else LandBOSFused())
+            self.driver.workflow.add(['landbos'])
+
+            for name in fused_inputs:
+                self.connect(name, 'landbos.' + name)
+            self.connect('landbos.bos_costs', 'bos_costs')
+            self.connect('landbos.bos_breakdown', 'bos_breakdown')
+            if self.incremental:
+                self.connect('landbos.skipped_items', 'skipped_items')
+
+            return
+
+        for name in land_bos_workflow:
+            self.add(name, land_bos_classes[name]())
+
+        self.driver.workflow.add(list(land_bos_workflow))
+
+        for source, target in land_bos_connections:
+            self.connect(source, target)
 
 
 
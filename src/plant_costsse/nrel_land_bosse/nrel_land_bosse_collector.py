@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+nrel_land_bosse_collector.py
+
+Collector system cable length from turbine and substation coordinates.
+
+Cables are routed as a capacity-constrained minimum spanning tree: Prim's algorithm
+grows the tree from the substation over a symmetrised KD-tree k-nearest-neighbour
+graph, and a turbine may only join a feeder (a branch leaving the substation) with
+fewer than capacity turbines.  The length is passed to land_bos as cable_length.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import heapq
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def collector_tree(turbines, substation, capacity=0, k=8):
+    """
+    Collector cable tree of one layout: turbines (n, 2) and substation (2,) coordinates
+    [m]; capacity is the largest number of turbines on one feeder (0: unconstrained).
+
+    Returns (parent, length): parent[i] is the turbine turbine i is connected to, or -1
+    for the substation, and length[i] the length of that cable [m].
+    """
+
+    turbines = np.asarray(turbines, dtype=float).reshape(-1, 2)
+    n = len(turbines)
+    parent = np.full(n, -1, dtype=int)
+    length = np.zeros(n)
+    if n == 0:
+        return parent, length
+
+    k = min(k, n - 1)
+    if k > 0:
+        dist, nbrs = cKDTree(turbines).query(turbines, k + 1)
+        dist, nbrs = dist[:, 1:].tolist(), nbrs[:, 1:].tolist()
+
+        # symmetric graph: w is a neighbour of v whenever v is one of w's k nearest
+        edges = [list(zip(d, w)) for d, w in zip(dist, nbrs)]
+        for v in range(n):
+            for dw, w in zip(dist[v], nbrs[v]):
+                if v not in nbrs[w]:
+                    edges[w].append((dw, v))
+
+    # turbines by distance to the substation, the candidates for a new feeder
+    to_substation = np.sqrt(((turbines - np.asarray(substation, dtype=float))**2).sum(axis=1))
+    order = np.argsort(to_substation, kind='mergesort').tolist()
+    to_substation = to_substation.tolist()
+    next_feeder = 0
+
+    connected = [False] * n
+    feeder = [0] * n
+    load = {}
+    heap = []
+
+    for count in range(n):
+
+        # cheapest allowed edge: from the tree (heap) or from the substation
+        while next_feeder < n and connected[order[next_feeder]]:
+            next_feeder += 1
+        best = (to_substation[order[next_feeder]], -1, order[next_feeder])
+
+        while heap and heap[0][0] < best[0]:
+            d, u, v = heapq.heappop(heap)
+            if connected[v] or (capacity > 0 and load[feeder[u]] >= capacity):
+                continue
+            best = (d, u, v)
+            break
+
+        d, u, v = best
+        connected[v] = True
+        parent[v] = u
+        length[v] = d
+        feeder[v] = v if u < 0 else feeder[u]
+        load[feeder[v]] = load.get(feeder[v], 0) + 1
+
+        if k > 0 and (capacity <= 0 or load[feeder[v]] < capacity):
+            for dw, w in edges[v]:
+                if not connected[w]:
+                    heapq.heappush(heap, (dw, v, w))
+
+    return parent, length
+
+
+def collector_length(turbines, substation, capacity=0, k=8):
+    """
+    total collector cable length [m] of one layout (see collector_tree)
+    """
+
+    return collector_tree(turbines, substation, capacity, k)[1].sum()
+
+
+def collector_lengths(turbines, substations, capacity=0, k=8):
+    """
+    collector_length of many layouts: turbines (..., n, 2) and substations (..., 2)
+    broadcast over the leading axes; returns an array of their shape.
+
+    This is a Python loop over the layouts, not a vectorised batch: each layout
+    needs its own KD-tree, and the capacity check makes the tree growth sequential.
+    The cost is one collector_length per layout (about n log n with the heap).
+    """
+
+    turbines = np.asarray(turbines, dtype=float)
+    substations = np.broadcast_to(np.asarray(substations, dtype=float), turbines.shape[:-2] + (2,))
+    shape = turbines.shape[:-2]
+
+    flat = turbines.reshape((-1,) + turbines.shape[-2:])
+    sites = substations.reshape(-1, 2)
+    lengths = np.array([collector_length(flat[i], sites[i], capacity, k) for i in range(len(flat))])
+
+    return lengths.reshape(shape)
+
+
+def layout_cable_length(turbine_x=(), turbine_y=(), substation_x=0.0, substation_y=0.0, cable_capacity=0):
+    """
+    collector_length of the layout given as coordinate arrays, 0 if there are no turbines
+    """
+
+    if len(turbine_x) == 0:
+        return 0.0
+
+    return collector_length(np.column_stack([turbine_x, turbine_y]), (substation_x, substation_y),
+                            cable_capacity)
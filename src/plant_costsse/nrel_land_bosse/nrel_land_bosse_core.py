@@ -0,0 +1,593 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+nrel_land_bosse_core.py
+
+The NREL land-based BOS model on plain floats and arrays, evaluated by the
+_landbos extension.  Nothing here imports OpenMDAO, so batch workers can use the
+model without loading it; NREL_Land_BOSSE and LandBOSFused wrap these functions.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import re
+
+import numpy as np
+
+import _landbos
+
+
+# values of the terrain, layout and soil options, in the order of the C enums
+terrain_options = ('FLAT_TO_ROLLING', 'RIDGE_TOP', 'MOUNTAINOUS')
+layout_options = ('SIMPLE', 'COMPLEX')
+soil_options = ('STANDARD', 'BOUYANT')
+
+# inputs of land_bos, in the order of its arguments
+fused_inputs = ('machine_rating', 'rotor_diameter', 'hub_height', 'turbine_number',
+    'voltage', 'distInter', 'terrain', 'layout', 'soil', 'turbine_cost', 'RNA_mass',
+    'multiplier', 'constructionTime', 'buildingSize', 'tempMetTowers',
+    'permanentMetTowers', 'weatherDelayDays', 'craneBreakdowns', 'accessRoadEntrances',
+    'deliveryAssistRequired', 'padMountTransformer', 'newSwitchyardRequired',
+    'rockTrenchingLength', 'thermalBackfill', 'overheadCollector', 'performanceBond',
+    'contingency', 'warranty', 'useTax', 'overhead', 'profitMargin', 'developmentFee',
+    'transportDist', 'cable_length', 'road_length', 'cable_diameters', 'road_diameters')
+
+# default values of the optional land_bos inputs
+fused_defaults = {'terrain': 'FLAT_TO_ROLLING', 'layout': 'SIMPLE', 'soil': 'STANDARD',
+    'turbine_cost': 0.0, 'RNA_mass': 0.0, 'multiplier': 1.0, 'constructionTime': -1,
+    'buildingSize': -1, 'tempMetTowers': -1, 'permanentMetTowers': -1,
+    'weatherDelayDays': -1, 'craneBreakdowns': -1, 'accessRoadEntrances': -1,
+    'deliveryAssistRequired': False, 'padMountTransformer': True,
+    'newSwitchyardRequired': True, 'rockTrenchingLength': 10.0, 'thermalBackfill': 0.0,
+    'overheadCollector': 0.0, 'performanceBond': False, 'contingency': 3.0,
+    'warranty': 0.02, 'useTax': 0.0, 'overhead': 5.0, 'profitMargin': 5.0,
+    'developmentFee': 5.0, 'transportDist': 0.0, 'cable_length': 0.0,
+    'road_length': 0.0, 'cable_diameters': 5.0,
+    'road_diameters': 5.0}
+
+# inputs of the land_bos Jacobian, in the order of _landbos.deriv_vars
+fused_deriv_inputs = ('rotor_diameter', 'hub_height', 'RNA_mass', 'turbine_cost',
+    'machine_rating', 'multiplier')
+
+# line items making up each fusedwind BOSVarTree field
+bos_breakdown_items = (
+    ('development_costs', ('engineering', 'powerperf', 'development')),
+    ('preparation_and_staging_costs', ('roads', 'compound', 'building')),
+    ('transportation_costs', ('transportation',)),
+    ('foundation_and_substructure_costs', ('foundation',)),
+    ('electrical_costs', ('elecmat', 'elecinst', 'substation', 'transmission')),
+    ('assembly_and_installation_costs', ('erection',)),
+    ('soft_costs', ('projmgmt', 'insurance', 'markup')),
+    ('other_costs', ()))
+
+# components of the NREL_Land_BOSSE workflow, in execution order
+land_bos_workflow = ('fs', 'default', 'transportation', 'engineering', 'powerperf',
+    'roads', 'compound', 'building', 'foundation', 'erection', 'elecmat', 'elecinst',
+    'substation', 'transmission', 'projmgmt', 'development', 'insurance', 'markup', 'total')
+
+# connect graph of the NREL_Land_BOSSE workflow as (source, target) pairs; a source is
+# an assembly input, an expression of assembly inputs or a component output
+land_bos_connections = (
+    # connections to fs
+    ('machine_rating', 'fs.rating'),
+    ('turbine_number', 'fs.nTurbines'),
+
+    # connections to default
+    ('turbine_number', 'default.nTurbines'),
+    ('fs.farmSize', 'default.farmSize'),
+    ('constructionTime', 'default.override_constructionTime'),
+    ('accessRoadEntrances', 'default.override_accessRoadEntrances'),
+    ('weatherDelayDays', 'default.override_weatherDelayDays'),
+    ('craneBreakdowns', 'default.override_craneBreakdowns'),
+    ('buildingSize', 'default.override_buildingSize'),
+    ('permanentMetTowers', 'default.override_permanentMetTowers'),
+    ('tempMetTowers', 'default.override_tempMetTowers'),
+
+    # connections to transportation
+    ('turbine_cost/machine_rating', 'transportation.TCC'),
+    ('machine_rating', 'transportation.rating'),
+    ('turbine_number', 'transportation.nTurbines'),
+    ('hub_height', 'transportation.hubHeight'),
+    ('transportDist', 'transportation.transportDist'),
+
+    # connections to engineering
+    ('turbine_number', 'engineering.nTurbines'),
+    ('fs.farmSize', 'engineering.farmSize'),
+
+    # connections to powerperf
+    ('hub_height', 'powerperf.hubHeight'),
+    ('default.permanentMetTowers', 'powerperf.permanentMetTowers'),
+    ('default.tempMetTowers', 'powerperf.tempMetTowers'),
+
+    # connections to roads
+    ('terrain', 'roads.terrain'),
+    ('layout', 'roads.layout'),
+    ('turbine_number', 'roads.nTurbines'),
+    ('rotor_diameter', 'roads.diameter'),
+    ('default.constructionTime', 'roads.constructionTime'),
+    ('default.accessRoadEntrances', 'roads.accessRoadEntrances'),
+    ('road_length', 'roads.road_length'),
+    ('road_diameters', 'roads.road_diameters'),
+
+    # connections to compound
+    ('default.constructionTime', 'compound.constructionTime'),
+    ('default.accessRoadEntrances', 'compound.accessRoadEntrances'),
+    ('fs.farmSize', 'compound.farmSize'),
+
+    # connections to building
+    ('default.buildingSize', 'building.buildingSize'),
+
+    # connections to foundation
+    ('machine_rating', 'foundation.rating'),
+    ('rotor_diameter', 'foundation.diameter'),
+    ('RNA_mass', 'foundation.topMass'),
+    ('hub_height', 'foundation.hubHeight'),
+    ('soil', 'foundation.soil'),
+    ('turbine_number', 'foundation.nTurbines'),
+
+    # connections to erection
+    ('machine_rating', 'erection.rating'),
+    ('hub_height', 'erection.hubHeight'),
+    ('turbine_number', 'erection.nTurbines'),
+    ('default.weatherDelayDays', 'erection.weatherDelayDays'),
+    ('default.craneBreakdowns', 'erection.craneBreakdowns'),
+    ('deliveryAssistRequired', 'erection.deliveryAssistRequired'),
+
+    # connections to elecmat
+    ('terrain', 'elecmat.terrain'),
+    ('layout', 'elecmat.layout'),
+    ('fs.farmSize', 'elecmat.farmSize'),
+    ('rotor_diameter', 'elecmat.diameter'),
+    ('turbine_number', 'elecmat.nTurbines'),
+    ('padMountTransformer', 'elecmat.padMountTransformer'),
+    ('thermalBackfill', 'elecmat.thermalBackfill'),
+    ('cable_length', 'elecmat.cable_length'),
+    ('cable_diameters', 'elecmat.cable_diameters'),
+
+    # connections to elecinst
+    ('terrain', 'elecinst.terrain'),
+    ('layout', 'elecinst.layout'),
+    ('fs.farmSize', 'elecinst.farmSize'),
+    ('rotor_diameter', 'elecinst.diameter'),
+    ('turbine_number', 'elecinst.nTurbines'),
+    ('rockTrenchingLength', 'elecinst.rockTrenchingLength'),
+    ('overheadCollector', 'elecinst.overheadCollector'),
+    ('cable_length', 'elecinst.cable_length'),
+    ('cable_diameters', 'elecinst.cable_diameters'),
+
+    # connections to substation
+    ('voltage', 'substation.voltage'),
+    ('fs.farmSize', 'substation.farmSize'),
+
+    # connections to transmission
+    ('voltage', 'transmission.voltage'),
+    ('distInter', 'transmission.distInter'),
+    ('newSwitchyardRequired', 'transmission.newSwitchyardRequired'),
+
+    # connections to projmgmt
+    ('default.constructionTime', 'projmgmt.constructionTime'),
+
+    # connections to development
+    ('developmentFee', 'development.developmentFee'),
+
+    # connections to insurance
+    ('turbine_cost/machine_rating', 'insurance.TCC'),
+    ('fs.farmSize', 'insurance.farmSize'),
+    ('foundation.cost', 'insurance.foundationCost'),
+    ('performanceBond', 'insurance.performanceBond'),
+
+    # connections to markup
+    ('transportation.cost', 'markup.transportationCost'),
+    ('contingency', 'markup.contingency'),
+    ('warranty', 'markup.warranty'),
+    ('useTax', 'markup.useTax'),
+    ('overhead', 'markup.overhead'),
+    ('profitMargin', 'markup.profitMargin'),
+
+    # connections to total
+    ('turbine_cost', 'total.turbine_cost'),
+    ('turbine_number', 'total.nTurbines'),
+    ('transportation.cost', 'total.transportation_cost'),
+    ('engineering.cost', 'total.engineering_cost'),
+    ('powerperf.cost', 'total.powerperf_cost'),
+    ('roads.cost', 'total.roads_cost'),
+    ('compound.cost', 'total.compound_cost'),
+    ('building.cost', 'total.building_cost'),
+    ('foundation.cost', 'total.foundation_cost'),
+    ('erection.cost', 'total.erection_cost'),
+    ('elecmat.cost', 'total.elecmat_cost'),
+    ('elecinst.cost', 'total.elecinst_cost'),
+    ('substation.cost', 'total.substation_cost'),
+    ('transmission.cost', 'total.transmission_cost'),
+    ('projmgmt.cost', 'total.projmgmt_cost'),
+    ('development.cost', 'total.development_cost'),
+    ('insurance.cost', 'total.insurance_cost'),
+    ('markup.cost', 'total.markup_cost'),
+    ('insurance.alpha', 'total.insurance_alpha'),
+    ('markup.alpha', 'total.markup_alpha'),
+    ('multiplier', 'total.multiplier'),
+
+    # connections to outputs
+    ('total.cost', 'bos_costs'),
+    ('total.bos_breakdown', 'bos_breakdown'),
+)
+
+
+def option_index(options, value):
+    """
+    index in options of value, given by name or already as an index; arrays of
+    either are converted element by element
+    """
+
+    value = np.asarray(value)
+    if value.dtype.kind not in 'SU':
+        return value if value.ndim else int(value)
+
+    try:
+        index = [options.index(v) for v in value.ravel().tolist()]
+    except ValueError:
+        raise ValueError('unknown option in {}, expected one of {}'.format(
+            value.tolist(), ', '.join(options)))
+
+    return np.array(index, dtype=int).reshape(value.shape) if value.ndim else index[0]
+
+
+def _landbos_args(machine_rating, rotor_diameter, hub_height, turbine_number, voltage, distInter,
+        terrain, layout, soil, turbine_cost, RNA_mass, multiplier, constructionTime,
+        buildingSize, tempMetTowers, permanentMetTowers, weatherDelayDays, craneBreakdowns,
+        accessRoadEntrances, deliveryAssistRequired, padMountTransformer,
+        newSwitchyardRequired, rockTrenchingLength, thermalBackfill, overheadCollector,
+        performanceBond, contingency, warranty, useTax, overhead, profitMargin,
+        developmentFee, transportDist):
+    """
+    positional arguments of _landbos.landBOS and landBOS_batch
+    """
+
+    return (machine_rating, rotor_diameter, hub_height, turbine_number, voltage, distInter,
+        option_index(terrain_options, terrain), option_index(layout_options, layout),
+        option_index(soil_options, soil), turbine_cost, np.asarray(RNA_mass)/1000.0,
+        multiplier, constructionTime, accessRoadEntrances, weatherDelayDays,
+        craneBreakdowns, buildingSize, permanentMetTowers, tempMetTowers,
+        deliveryAssistRequired, padMountTransformer, newSwitchyardRequired,
+        rockTrenchingLength, thermalBackfill, overheadCollector, performanceBond,
+        contingency, warranty, useTax, overhead, profitMargin, developmentFee,
+        transportDist)
+
+
+def land_bos(machine_rating, rotor_diameter, hub_height, turbine_number, voltage, distInter,
+        terrain='FLAT_TO_ROLLING', layout='SIMPLE', soil='STANDARD', turbine_cost=0.0,
+        RNA_mass=0.0, multiplier=1.0, constructionTime=-1, buildingSize=-1,
+        tempMetTowers=-1, permanentMetTowers=-1, weatherDelayDays=-1, craneBreakdowns=-1,
+        accessRoadEntrances=-1, deliveryAssistRequired=False, padMountTransformer=True,
+        newSwitchyardRequired=True, rockTrenchingLength=10.0, thermalBackfill=0.0,
+        overheadCollector=0.0, performanceBond=False, contingency=3.0, warranty=0.02,
+        useTax=0.0, overhead=5.0, profitMargin=5.0, developmentFee=5.0, transportDist=0.0,
+        cable_length=0.0, road_length=0.0, cable_diameters=5.0,
+        road_diameters=5.0):
+    """
+    Whole land-based BOS model for one plant, with the inputs and defaults of
+    NREL_Land_BOSSE (turbine_cost per turbine, RNA_mass in kg, options by name or index).
+    A positive cable_length [m], e.g. from collector_length, replaces the collector cable
+    estimated from the rotor diameter in the electrical line items, and a positive
+    road_length [m], e.g. from RoadNetwork, the access roads estimated from it
+    (see layout_diameter for cable_diameters and road_diameters).
+    Returns the _landbos.landBOS dictionary; see land_bos_jacobian for the derivatives.
+    """
+
+    args = _landbos_args(machine_rating, rotor_diameter, hub_height, turbine_number, voltage,
+        distInter, terrain, layout, soil, turbine_cost, RNA_mass, multiplier, constructionTime,
+        buildingSize, tempMetTowers, permanentMetTowers, weatherDelayDays, craneBreakdowns,
+        accessRoadEntrances, deliveryAssistRequired, padMountTransformer, newSwitchyardRequired,
+        rockTrenchingLength, thermalBackfill, overheadCollector, performanceBond, contingency,
+        warranty, useTax, overhead, profitMargin, developmentFee, transportDist)
+
+    return _with_layout_lengths(_landbos.landBOS(*args), args, cable_length, road_length,
+        cable_diameters, road_diameters)
+
+
+def land_bos_batch(machine_rating, rotor_diameter, hub_height, turbine_number, voltage, distInter,
+        terrain='FLAT_TO_ROLLING', layout='SIMPLE', soil='STANDARD', turbine_cost=0.0,
+        RNA_mass=0.0, multiplier=1.0, constructionTime=-1, buildingSize=-1,
+        tempMetTowers=-1, permanentMetTowers=-1, weatherDelayDays=-1, craneBreakdowns=-1,
+        accessRoadEntrances=-1, deliveryAssistRequired=False, padMountTransformer=True,
+        newSwitchyardRequired=True, rockTrenchingLength=10.0, thermalBackfill=0.0,
+        overheadCollector=0.0, performanceBond=False, contingency=3.0, warranty=0.02,
+        useTax=0.0, overhead=5.0, profitMargin=5.0, developmentFee=5.0, transportDist=0.0,
+        cable_length=0.0, road_length=0.0, cable_diameters=5.0,
+        road_diameters=5.0, n_threads=0):
+    """
+    land_bos over broadcast array arguments, evaluated by _landbos.landBOS_batch
+    on n_threads OpenMP threads (0 uses the OpenMP default).
+    """
+
+    args = _landbos_args(machine_rating, rotor_diameter, hub_height, turbine_number, voltage,
+        distInter, terrain, layout, soil, turbine_cost, RNA_mass, multiplier, constructionTime,
+        buildingSize, tempMetTowers, permanentMetTowers, weatherDelayDays, craneBreakdowns,
+        accessRoadEntrances, deliveryAssistRequired, padMountTransformer, newSwitchyardRequired,
+        rockTrenchingLength, thermalBackfill, overheadCollector, performanceBond, contingency,
+        warranty, useTax, overhead, profitMargin, developmentFee, transportDist)
+    args = _broadcast_lengths(args, cable_length, road_length)
+
+    return _with_layout_lengths(_landbos.landBOS_batch(*args, n_threads=n_threads), args, cable_length,
+        road_length, cable_diameters, road_diameters)
+
+
+def land_bos_records(machine_rating, rotor_diameter, hub_height, turbine_number, voltage, distInter,
+        terrain='FLAT_TO_ROLLING', layout='SIMPLE', soil='STANDARD', turbine_cost=0.0,
+        RNA_mass=0.0, multiplier=1.0, constructionTime=-1, buildingSize=-1,
+        tempMetTowers=-1, permanentMetTowers=-1, weatherDelayDays=-1, craneBreakdowns=-1,
+        accessRoadEntrances=-1, deliveryAssistRequired=False, padMountTransformer=True,
+        newSwitchyardRequired=True, rockTrenchingLength=10.0, thermalBackfill=0.0,
+        overheadCollector=0.0, performanceBond=False, contingency=3.0, warranty=0.02,
+        useTax=0.0, overhead=5.0, profitMargin=5.0, developmentFee=5.0, transportDist=0.0,
+        cable_length=0.0, road_length=0.0, cable_diameters=5.0,
+        road_diameters=5.0, n_threads=0):
+    """
+    land_bos over broadcast array arguments as a structured array with a float64
+    field per line item, 'insurance_alpha', 'markup_alpha' and 'bos_costs'
+    (_landbos.record_fields), filled in place by _landbos.landBOS_records.
+    """
+
+    args = _landbos_args(machine_rating, rotor_diameter, hub_height, turbine_number, voltage,
+        distInter, terrain, layout, soil, turbine_cost, RNA_mass, multiplier, constructionTime,
+        buildingSize, tempMetTowers, permanentMetTowers, weatherDelayDays, craneBreakdowns,
+        accessRoadEntrances, deliveryAssistRequired, padMountTransformer, newSwitchyardRequired,
+        rockTrenchingLength, thermalBackfill, overheadCollector, performanceBond, contingency,
+        warranty, useTax, overhead, profitMargin, developmentFee, transportDist)
+    args = _broadcast_lengths(args, cable_length, road_length)
+
+    return _with_layout_lengths(_landbos.landBOS_records(*args, n_threads=n_threads), args, cable_length,
+        road_length, cable_diameters, road_diameters)
+
+
+def land_bos_interconnect(machine_rating, turbine_number, voltage, distInter,
+        newSwitchyardRequired=True):
+    """
+    Cheapest interconnect of each site among candidates along the last axis of
+    voltage [kV], distInter [mi] and newSwitchyardRequired, e.g. (sites, candidates),
+    for plants of turbine_number turbines of machine_rating [kW] with the site shape.
+
+    Only the substation and transmission line items depend on the interconnect, so
+    the candidate with the lowest sum of the two also gives the lowest bos_costs.
+    Returns a dictionary of site arrays: the candidate 'index', its 'voltage',
+    'distInter', 'substation' and 'transmission' costs, and their sum 'cost'.
+    """
+
+    sites = np.broadcast(np.asarray(machine_rating), np.asarray(turbine_number)).shape
+    farmSize = _landbos.farmSize_batch(machine_rating, turbine_number).reshape(sites)[..., np.newaxis]
+    substation = _landbos.substationCost_batch(voltage, farmSize)
+    transmission = _landbos.transmissionCost_batch(voltage, distInter, newSwitchyardRequired)
+
+    cost = substation + transmission
+    index = np.argmin(cost, axis=-1)
+
+    pick = lambda a: np.take_along_axis(np.broadcast_to(a, cost.shape), index[..., np.newaxis], axis=-1)[..., 0]
+
+    return {'index': index, 'cost': pick(cost), 'voltage': pick(voltage), 'distInter': pick(distInter),
+        'substation': pick(substation), 'transmission': pick(transmission)}
+
+
+def layout_diameter(rotor_diameter, turbine_number, length, diameters):
+    """
+    Rotor diameter [m] at which to evaluate a line item for a layout length [m] of
+    collector cable or access road; rotor_diameter where length is not positive.
+
+    electricalMaterialsCost, electricalInstallationCost and accessRoadsCost stand in
+    for the cable and road lengths with terms proportional to diameter*nTurb, i.e.
+    a fixed number of rotor diameters of cable or road per turbine.  LandBOSSE does not
+    state that number.  It is therefore a calibration input (cable_diameters,
+    road_diameters), and the default of 5 is one five-diameter turbine spacing per
+    turbine.  A length then corresponds to the rotor diameter
+    length/(turbine_number*diameters).
+    """
+
+    given = np.asarray(length) > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diameter = np.where(given, np.asarray(length, dtype=float) /
+            (np.asarray(turbine_number) * np.asarray(diameters, dtype=float)), rotor_diameter)
+
+    return diameter if diameter.ndim else float(diameter)
+
+
+def _broadcast_lengths(args, cable_length, road_length):
+    """
+    _landbos batch args with the rotor diameter broadcast to the shape of
+    cable_length and road_length
+    """
+
+    diameter = np.asarray(args[1], dtype=float)
+    shape = np.broadcast(diameter, cable_length, road_length).shape
+    if shape == diameter.shape:
+        return args
+
+    return args[:1] + (np.broadcast_to(diameter, shape),) + args[2:]
+
+
+def _with_layout_lengths(values, args, cable_length, road_length, cable_diameters, road_diameters):
+    """
+    values of _landbos.landBOS, landBOS_batch or landBOS_records for the positional
+    args, with the electrical line items re-evaluated where cable_length is positive,
+    the access roads where road_length is positive, and bos_costs.  These items are
+    linear in the rotor diameter, so they change by the difference to layout_diameter
+    times their derivative.
+    """
+
+    diameter, nTurb, terrain, layout, multiplier = args[1], args[3], args[6], args[7], args[11]
+    rockTrenchingLength = args[22]
+
+    updates = []
+    if np.any(np.asarray(cable_length) > 0):
+        updates.append((np.asarray(cable_length) > 0, layout_diameter(diameter, nTurb, cable_length,
+            cable_diameters),
+            (('elecmat', _landbos.deriv_electricalMaterialsCost_batch(terrain, layout, nTurb)),
+             ('elecinst', _landbos.deriv_electricalInstallationCost_batch(terrain, layout, nTurb,
+                rockTrenchingLength)))))
+    if np.any(np.asarray(road_length) > 0):
+        updates.append((np.asarray(road_length) > 0, layout_diameter(diameter, nTurb, road_length,
+            road_diameters),
+            (('roads', _landbos.deriv_accessRoadsCost_batch(terrain, layout, nTurb)),)))
+    if not updates:
+        return values
+
+    share = 1.0 / (1.0 - values['insurance_alpha'] - values['markup_alpha'])
+    scale = multiplier * share
+    ddiameter, dmultiplier = _landbos.deriv_vars.index('diameter'), _landbos.deriv_vars.index('multiplier')
+    scalar = isinstance(values, dict) and np.ndim(values['bos_costs']) == 0
+    convert = float if scalar else np.asarray
+
+    for given, equivalent, items in updates:
+        change = equivalent - np.asarray(diameter, dtype=float)
+        for item, d in items:
+            if scalar:
+                d = float(np.ravel(d)[0])
+            values[item] = convert(values[item] + change * d)
+            values['bos_costs'] = convert(values['bos_costs'] + change * d * scale)
+
+            # with a given length the item no longer depends on the rotor diameter, and
+            # its change is scaled by the multiplier like every other item
+            if isinstance(values, dict) and 'dcost' in values:
+                values['dcost'][..., _landbos.cost_items.index(item), ddiameter] -= np.where(given, d, 0.0)
+                values['dbos_costs'][..., ddiameter] -= np.where(given, d * scale, 0.0)
+                values['dbos_costs'][..., dmultiplier] += np.where(given, change * d * share, 0.0)
+
+    return values
+
+
+def land_bos_breakdown(values, turbine_cost, turbine_number, multiplier=1.0):
+    """
+    fusedwind BOSVarTree fields from the line items of land_bos, land_bos_batch or
+    land_bos_records (see bos_breakdown_items); they add up to bos_costs.
+
+    The turbine cost carried in the transportation line item is removed, and the
+    share of insurance and markup proportional to the total (the alphas) is
+    counted in soft_costs.
+    """
+
+    items = dict((field, sum([values[item] for item in names], 0.0)) for field, names in bos_breakdown_items)
+    items['transportation_costs'] = items['transportation_costs'] - np.multiply(turbine_cost, turbine_number)
+
+    alpha = values['insurance_alpha'] + values['markup_alpha']
+    total = sum([values[item] for item in _landbos.cost_items], 0.0)
+    items['soft_costs'] = items['soft_costs'] + total * alpha / (1.0 - alpha)
+
+    return dict((field, items[field] * multiplier) for field, names in bos_breakdown_items)
+
+
+def land_bos_jacobian(values):
+    """
+    d(bos_costs)/d(fused_deriv_inputs) from the output of land_bos or land_bos_batch,
+    with a trailing axis over fused_deriv_inputs.
+    """
+
+    J = np.array(values['dbos_costs'], dtype=float)
+    J[..., 2] /= 1000.0  # RNA_mass is in kg, topMass in tonnes
+
+    return J
+
+
+def component_dependencies(connections=land_bos_connections, workflow=land_bos_workflow):
+    """
+    {assembly input: set of workflow components it reaches} from a connect graph,
+    following component outputs downstream
+    """
+
+    direct = {}
+    for source, target in connections:
+        if '.' not in target:
+            continue
+        if '.' in source:
+            names = [source.split('.')[0]]
+        else:
+            names = re.findall(r'[A-Za-z_]\w*', source)
+        for name in names:
+            direct.setdefault(name, set()).add(target.split('.')[0])
+
+    # components in reverse workflow order so downstream sets are complete when used
+    reach = {}
+    for comp in reversed(workflow):
+        reach[comp] = set([comp])
+        for target in direct.get(comp, ()):
+            reach[comp] |= reach[target]
+
+    return dict((name, set().union(*[reach[c] for c in targets]))
+                for name, targets in direct.items() if name not in reach)
+
+
+# connection sources of land_bos_connections computed from several assembly inputs
+land_bos_expressions = {
+    'turbine_cost/machine_rating': lambda inputs: inputs['turbine_cost'] / inputs['machine_rating']}
+
+
+class IncrementalLandBOS(object):
+    '''
+    class IncrementalLandBOS:
+      NREL_Land_BOSSE workflow run on its components: components maps every name in
+      land_bos_workflow to a component, e.g. from nrel_land_bosse.land_bos_components().
+      The components keep their outputs between calls and the next evaluate executes
+      only those downstream of the inputs that changed (component_dependencies of
+      land_bos_connections).  evaluated and skipped list the components executed and
+      reused by the last evaluate.
+    '''
+
+    def __init__(self, components):
+
+        self.components = components
+        self.dependencies = component_dependencies()
+        self.inputs = None
+        self.evaluated = []
+        self.skipped = []
+
+        self._targets = dict((comp, []) for comp in land_bos_workflow)
+        for source, target in land_bos_connections:
+            if '.' in target:
+                comp, name = target.split('.')
+                self._targets[comp].append((name, source))
+        self._defaults = sorted(set(source.split('.')[1] for source, target in land_bos_connections
+                                    if source.startswith('default.')))
+
+    def _source(self, source, inputs):
+
+        if '.' in source:
+            comp, name = source.split('.')
+            return getattr(self.components[comp], name)
+        if source in inputs:
+            return inputs[source]
+        return land_bos_expressions[source](inputs)
+
+    def evaluate(self, **inputs):
+        """
+        land_bos inputs (fused_inputs, with fused_defaults) -> dictionary of the
+        defaults, line item costs (_landbos.cost_items), 'insurance_alpha',
+        'markup_alpha' and 'bos_costs'
+        """
+
+        inputs = dict(fused_defaults, **inputs)
+        missing = set(fused_inputs) - set(inputs)
+        if missing:
+            raise TypeError('missing land BOS inputs: {}'.format(', '.join(sorted(missing))))
+
+        if self.inputs is None:
+            stale = set(land_bos_workflow)
+        else:
+            changed = [name for name in inputs if not np.array_equal(self.inputs.get(name), inputs[name])]
+            stale = set().union(*[self.dependencies.get(name, set()) for name in changed])
+
+        self.evaluated = [comp for comp in land_bos_workflow if comp in stale]
+        self.skipped = [comp for comp in land_bos_workflow if comp not in stale]
+
+        for comp in self.evaluated:
+            component = self.components[comp]
+            for name, source in self._targets[comp]:
+                setattr(component, name, self._source(source, inputs))
+            component.execute()
+        self.inputs = inputs
+
+        out = dict((name, getattr(self.components['default'], name)) for name in self._defaults)
+        out['farmSize'] = self.components['fs'].farmSize
+        for comp in _landbos.cost_items:
+            out[comp] = self.components[comp].cost
+        out['insurance_alpha'] = self.components['insurance'].alpha
+        out['markup_alpha'] = self.components['markup'].alpha
+        out['bos_costs'] = self.components['total'].cost
+
+        return out
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+nrel_land_bosse_roads.py
+
+Access road length from turbine pad and road entrance coordinates.
+
+Roads are a minimum spanning forest over the turbine pads and entrances, with every
+pad reached from some entrance: a minimum spanning tree of a KD-tree k-nearest-
+neighbour graph in which all entrances hang off one zero-cost root.  Road segments
+can be weighted by the penalty multipliers of a terrain raster (e.g. from slope),
+sampled along each segment.  RoadNetwork repairs the roads when a turbine moves
+instead of rebuilding them.  The length is passed to land_bos as road_length.
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree, connected_components
+
+
+class TerrainRaster(object):
+    '''
+    class TerrainRaster:
+      road cost multipliers (1 on easy ground) on a regular grid of square cells;
+      values[iy, ix] covers x0 + ix*cell_size <= x < x0 + (ix+1)*cell_size and
+      likewise in y.  Points outside the raster take the nearest edge cell.
+    '''
+
+    def __init__(self, values, x0=0.0, y0=0.0, cell_size=1.0):
+
+        self.values = values
+        self.x0 = x0
+        self.y0 = y0
+        self.cell_size = cell_size
+
+    def penalty(self, x, y):
+        """
+        multiplier of the cells holding points x, y [m]
+        """
+
+        ny, nx = self.values.shape
+        ix = np.clip(np.floor((np.asarray(x) - self.x0) / self.cell_size).astype(int), 0, nx - 1)
+        iy = np.clip(np.floor((np.asarray(y) - self.y0) / self.cell_size).astype(int), 0, ny - 1)
+
+        return np.asarray(self.values[iy, ix], dtype=float)
+
+    def segment_penalty(self, start, end, samples=8):
+        """
+        mean multiplier along segments start (m, 2) -> end (m, 2), sampled at the
+        midpoints of samples equal pieces
+        """
+
+        t = (np.arange(samples) + 0.5) / samples
+        points = start[:, np.newaxis, :] + t[:, np.newaxis] * (end - start)[:, np.newaxis, :]
+
+        return self.penalty(points[..., 0], points[..., 1]).mean(axis=1)
+
+
+def open_terrain_raster(filename, x0=0.0, y0=0.0, cell_size=1.0):
+    """
+    TerrainRaster memory-mapping a (ny, nx) .npy file of road cost multipliers
+    """
+
+    return TerrainRaster(np.load(filename, mmap_mode='r'), x0, y0, cell_size)
+
+
+class RoadNetwork(object):
+    '''
+    class RoadNetwork:
+      access roads of a layout as a minimum spanning forest over turbine pads
+      (n, 2) and entrances (m, 2) [m], on a k-nearest-neighbour graph weighted by
+      the optional TerrainRaster.  length is the road length [m], weighted_length
+      the length scaled by the terrain multipliers and edges the (i, j) pairs of
+      roads between nodes (turbines, then entrances).
+
+      move() updates the roads for one moved turbine without rebuilding them: the
+      neighbour lists are corrected from the KD-tree of the last build, only the
+      segments whose endpoints or neighbour lists changed are re-weighted, and the
+      tree is repaired from its remaining roads, the changed segments and the
+      segments joining the pieces it fell into, which contain the new minimum
+      spanning tree.  The result equals a rebuild on the same neighbour count.
+      update() moves the turbines that changed one at a time, or rebuilds the
+      network when more than max_moves of them did.
+    '''
+
+    def __init__(self, turbines, entrances, raster=None, k=8, samples=8, max_moves=16, max_stale=64):
+
+        self.entrances = np.asarray(entrances, dtype=float).reshape(-1, 2)
+        if len(self.entrances) == 0:
+            raise ValueError('a road network needs at least one entrance')
+
+        self.raster = raster
+        self.k = k
+        self.samples = samples
+        self.max_moves = max_moves
+        self.max_stale = max_stale
+
+        self.nodes = None
+        self.keys = None
+        self.weights = None
+        self.build(turbines)
+
+    @property
+    def turbines(self):
+        return self.nodes[:self.n_turbines]
+
+    def build(self, turbines):
+        """
+        roads of the turbine positions (n, 2) [m] from scratch, keeping the weights
+        of segments between pads that did not move; returns weighted_length
+        """
+
+        turbines = np.asarray(turbines, dtype=float).reshape(-1, 2)
+        nodes = np.vstack([turbines, self.entrances])
+        n = len(nodes)
+
+        moved = np.ones(n, dtype=bool)
+        if self.nodes is not None and len(self.nodes) == n:
+            moved = np.any(nodes != self.nodes, axis=1)
+        old_keys, old_weights = self.keys, self.weights
+
+        self.nodes = nodes
+        self.n_turbines = len(turbines)
+        self._kdtree = cKDTree(nodes)
+        self._stale = []
+
+        k = self.k
+        while True:
+            self.k_used = min(k, n - 1)
+            self.nbr, self.nbr_dist = self._knn(np.arange(n))
+            self.keys = self._pairs(np.arange(n))
+            self.weights = np.zeros(len(self.keys))
+
+            fresh = np.ones(len(self.keys), dtype=bool)
+            if old_keys is not None and len(old_keys) and not moved.all():
+                a, b = self.keys // n, self.keys % n
+                pos = np.minimum(np.searchsorted(old_keys, self.keys), len(old_keys) - 1)
+                reuse = (old_keys[pos] == self.keys) & ~moved[a] & ~moved[b]
+                self.weights[reuse] = old_weights[pos[reuse]]
+                fresh = ~reuse
+            self.weights[fresh] = self._weights(self.keys[fresh])
+
+            rooted = self._rooted(self.keys, self.weights)
+            if self.k_used >= n - 1 or connected_components(rooted, directed=False)[0] == 1:
+                break
+            k *= 2
+
+        self._set_tree(rooted)
+        return self.weighted_length
+
+    def update(self, turbines):
+        """
+        roads of the turbine positions (n, 2) [m]: a move() for each turbine that
+        changed, or a build() when more than max_moves did; returns weighted_length
+        """
+
+        turbines = np.asarray(turbines, dtype=float).reshape(-1, 2)
+        if len(turbines) != self.n_turbines:
+            return self.build(turbines)
+
+        moved = np.flatnonzero(np.any(turbines != self.turbines, axis=1))
+        if len(moved) > self.max_moves:
+            return self.build(turbines)
+
+        for i in moved:
+            self.move(i, turbines[i, 0], turbines[i, 1])
+        return self.weighted_length
+
+    def move(self, i, x, y):
+        """
+        move turbine i to x, y [m] and repair the roads; returns weighted_length
+        """
+
+        if len(self._stale) >= self.max_stale:
+            nodes = self.nodes.copy()
+            nodes[i] = x, y
+            return self.build(nodes[:self.n_turbines])
+
+        n = len(self.nodes)
+        self.nodes[i] = x, y
+        if i not in self._stale:
+            self._stale.append(i)
+
+        # nodes that had i as a neighbour or now have it closer than their k-th one
+        dist = np.sqrt(((self.nodes - self.nodes[i])**2).sum(axis=1))
+        rows = np.flatnonzero(np.any(self.nbr == i, axis=1) | (dist < self.nbr_dist[:, -1]))
+        rows = np.union1d(rows, [i])
+
+        before = self._pairs(rows)
+        self.nbr[rows], self.nbr_dist[rows] = self._knn(rows)
+        candidates = np.union1d(before, self._pairs(rows))
+
+        a, b = candidates // n, candidates % n
+        exists = np.any(self.nbr[a] == b[:, np.newaxis], axis=1) | np.any(self.nbr[b] == a[:, np.newaxis], axis=1)
+        was = np.in1d(candidates, self.keys, assume_unique=True)
+        at_i = (a == i) | (b == i)
+        removed = candidates[was & (~exists | at_i)]
+        added = candidates[exists & (~was | at_i)]
+
+        keep = ~np.in1d(self.keys, removed, assume_unique=True)
+        keys = np.concatenate([self.keys[keep], added])
+        weights = np.concatenate([self.weights[keep], self._weights(added)])
+        order = np.argsort(keys)
+        self.keys, self.weights = keys[order], weights[order]
+
+        # the remaining roads fall apart into pieces; the new tree is within them, the
+        # added segments and the segments joining different pieces
+        tree = self.tree_keys[~np.in1d(self.tree_keys, removed, assume_unique=True)]
+        pieces = connected_components(self._rooted(tree, np.ones(len(tree))), directed=False)[1]
+        joining = pieces[self.keys // n] != pieces[self.keys % n]
+        subset = np.union1d(np.union1d(tree, added), self.keys[joining])
+        weights = self.weights[np.searchsorted(self.keys, subset)]
+
+        rooted = self._rooted(subset, weights)
+        if connected_components(rooted, directed=False)[0] > 1:
+            return self.build(self.turbines)
+
+        self._set_tree(rooted)
+        return self.weighted_length
+
+    def _knn(self, rows):
+        """
+        (neighbours, distances) of the k_used nearest other nodes of rows, from the
+        KD-tree of the last build corrected for the nodes moved since
+        """
+
+        k, stale = self.k_used, np.array(self._stale, dtype=int)
+        if k < 1:
+            return np.zeros((len(rows), 0), dtype=int), np.zeros((len(rows), 0))
+
+        nq = min(k + 1 + len(stale), len(self.nodes))
+        idx = self._kdtree.query(self.nodes[rows], nq)[1].reshape(len(rows), nq)
+        idx = np.hstack([idx, np.broadcast_to(stale, (len(rows), len(stale)))])
+
+        dist = np.sqrt(((self.nodes[idx] - self.nodes[rows][:, np.newaxis, :])**2).sum(axis=2))
+        invalid = (idx == rows[:, np.newaxis])
+        invalid[:, :nq] |= np.in1d(idx[:, :nq], stale).reshape(len(rows), nq)
+        dist[invalid] = np.inf
+
+        order = np.argsort(dist, axis=1, kind='mergesort')[:, :k]
+        return np.take_along_axis(idx, order, axis=1), np.take_along_axis(dist, order, axis=1)
+
+    def _pairs(self, rows):
+        """
+        sorted keys a*n + b, a < b, of the neighbour graph segments of rows
+        """
+
+        n = len(self.nodes)
+        a = np.repeat(rows, self.nbr.shape[1])
+        b = self.nbr[rows].ravel()
+
+        return np.unique(np.minimum(a, b) * n + np.maximum(a, b))
+
+    def _weights(self, keys):
+        """
+        terrain weighted lengths of the segments keys
+        """
+
+        n = len(self.nodes)
+        start, end = self.nodes[keys // n], self.nodes[keys % n]
+        length = np.sqrt(((end - start)**2).sum(axis=1))
+        if self.raster is not None and len(keys):
+            length *= self.raster.segment_penalty(start, end, self.samples)
+
+        return np.maximum(length, 1e-9)  # coincident pads still need an edge
+
+    def _rooted(self, keys, weights):
+        """
+        graph of segments keys with a root node joined to every entrance at a cost
+        well below any road
+        """
+
+        n = len(self.nodes)
+        eps = 1e-9 * max(weights.min(), 1.0) if len(weights) else 1e-9
+
+        return coo_matrix((np.concatenate([weights, np.full(n - self.n_turbines, eps)]),
+                           (np.concatenate([keys // n, np.arange(self.n_turbines, n)]),
+                            np.concatenate([keys % n, np.full(n - self.n_turbines, n)]))),
+                          shape=(n + 1, n + 1)).tocsr()
+
+    def _set_tree(self, rooted):
+
+        n = len(self.nodes)
+        tree = minimum_spanning_tree(rooted).tocoo()
+        road = (tree.row < n) & (tree.col < n)
+        i, j = np.minimum(tree.row[road], tree.col[road]), np.maximum(tree.row[road], tree.col[road])
+
+        self.tree_keys = np.sort(i * n + j)
+        self.edges = np.column_stack([i, j])
+        self.length = np.sqrt(((self.nodes[i] - self.nodes[j])**2).sum(axis=1)).sum()
+        self.weighted_length = tree.data[road].sum()
+
+
+def road_length(turbines, entrances, raster=None, k=8):
+    """
+    terrain weighted access road length [m] of one layout (see RoadNetwork)
+    """
+
+    return RoadNetwork(turbines, entrances, raster, k).weighted_length
+
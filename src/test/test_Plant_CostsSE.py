@@ -5,11 +5,20 @@ Created by Katherine Dykes on 2014-01-07.
 Copyright (c) NREL. All rights reserved.
 """
 
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+import numpy as np
 from commonse.utilities import check_gradient_unit_test
 #from nrel_onshore_bos.nrel_bos_onshore import bos_nrel_onshore_component
-from plant_costsse.nrel_csm_bos.nrel_csm_bos import bos_csm_component, bos_csm_assembly
-from plant_costsse.nrel_csm_opex.nrel_csm_opex import opex_csm_component, opex_csm_assembly
+from plant_costsse.nrel_csm_bos.nrel_csm_bos import bos_csm_component, bos_csm_assembly, bos_csm_batch, bos_breakdown_fields, bos_csm_base_costs
+from plant_costsse.nrel_csm_opex.nrel_csm_opex import opex_csm_component, opex_csm_assembly, opex_csm_batch, opex_csm_cashflows, opex_csm_base_costs
+from plant_costsse import escalation
+from plant_costsse.escalation import EscalatorCache, EscalatorTable, EscalationContext, build_escalator_store, \
+    BaseYearCosts
+from commonse.config import ppi
 
 
 # Plant Costs - BOS
@@ -71,6 +80,42 @@ class Test_bos_csm_component(unittest.TestCase):
 
         check_gradient_unit_test(self, self.bos, display=False)
 
+class Test_bos_csm_batch(unittest.TestCase):
+
+    def setUp(self):
+
+        self.machine_rating = np.array([5000.0, 5000.0, 3000.0, 5000.0])
+        self.sea_depth = np.array([20.0, 0.0, 45.0, 80.0])
+
+    def test_functionality(self):
+
+        out = bos_csm_batch(self.machine_rating, 126.0, 90.0, self.sea_depth, 100, turbine_cost=5950209.28)
+
+        self.assertEqual(out['bos_costs'].shape, (4,))
+        self.assertEqual(out['J'].shape, (4, 9, 5))
+        self.assertEqual(round(out['bos_costs'][0],2), 766464743.61)
+        self.assertTrue(np.isnan(out['bos_costs'][3]))
+
+        total = sum(out[name] for name in bos_breakdown_fields)
+        np.testing.assert_allclose(total[:3], out['bos_costs'][:3])
+
+    def test_gradient(self):
+
+        x = np.array([5000.0, 126.0, 5950209.28, 90.0])
+        out = bos_csm_batch(x[0], x[1], x[3], self.sea_depth[:3, np.newaxis], 100, turbine_cost=x[2])
+
+        for i in range(4):
+            step = 1e-6 * x[i]
+            xp = x.copy()
+            xm = x.copy()
+            xp[i] += step
+            xm[i] -= step
+            outp = bos_csm_batch(xp[0], xp[1], xp[3], self.sea_depth[:3, np.newaxis], 100, turbine_cost=xp[2])
+            outm = bos_csm_batch(xm[0], xm[1], xm[3], self.sea_depth[:3, np.newaxis], 100, turbine_cost=xm[2])
+            for j, name in enumerate(bos_breakdown_fields + ('bos_costs',)):
+                fd = (outp[name] - outm[name]) / (2*step)
+                np.testing.assert_allclose(out['J'][:, 0, j, i], fd[:, 0], rtol=1e-5, atol=1e-3)
+
 
 # Plant Costs - OPEX
 
@@ -117,5 +162,155 @@ class Test_om_csm_component(unittest.TestCase):
 
         check_gradient_unit_test(self, self.om)
 
+class Test_om_csm_batch(unittest.TestCase):
+
+    def test_functionality(self):
+
+        out = opex_csm_batch(1701626526.28, 5000.0, np.array([20.0, 0.0]), np.array([2009, 2009]),
+                             12, 100)
+
+        self.assertEqual(out['J'].shape, (2, 5, 2))
+        self.assertEqual(round(out['avg_annual_opex'][0],1), 47575391.9)
+        self.assertLess(out['avg_annual_opex'][1], out['avg_annual_opex'][0])
+        np.testing.assert_allclose(out['J'][:, 4, 0] * 1701626526.28 + out['J'][:, 4, 1] * 5000.0,
+                                   out['avg_annual_opex'])
+
+    def test_cashflows(self):
+
+        flows = opex_csm_cashflows(1701626526.28, 5000.0, np.array([20.0, 0.0]), 2009, 12, 100,
+                                   project_lifetime=np.array([20, 15]), discount_rate=0.07)
+
+        self.assertEqual(flows['annual_opex'].shape, (2, 20))
+        np.testing.assert_allclose(flows['annual_opex'][:, 5],
+                                   opex_csm_batch(1701626526.28, 5000.0, np.array([20.0, 0.0]), 2014, 12, 100)['avg_annual_opex'])
+        np.testing.assert_array_equal(flows['annual_opex'][1, 15:], 0.0)
+        np.testing.assert_allclose(flows['opex_npv'], (flows['annual_opex'] / 1.07**np.arange(1, 21)).sum(axis=1))
+
+# PPI escalators
+
+class Test_escalation(unittest.TestCase):
+
+    def test_cache(self):
+
+        dates = (ppi.ref_yr, ppi.ref_mon, ppi.curr_yr, ppi.curr_mon)
+        cache = EscalatorCache(maxsize=2)
+
+        value = cache('IPPI_OAI', 2003, 9, 2009, 12)
+        self.assertEqual(cache('IPPI_OAI', 2003, 9, 2009, 12), value)
+        cache('IPPI_OAI', 2003, 9, 2010, 12)
+        cache('IPPI_OAI', 2003, 9, 2011, 12)
+
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 3, 2))
+        self.assertEqual((ppi.ref_yr, ppi.ref_mon, ppi.curr_yr, ppi.curr_mon), dates)
+
+    def test_table(self):
+
+        cache = EscalatorCache()
+        table = EscalatorTable(2008, 2010, cache=cache)
+
+        self.assertTrue(table.covers('IPPI_LPM', 2002, 3, np.array([2008, 2010])))
+        self.assertFalse(table.covers('IPPI_LPM', 2002, 3, np.array([2008, 2011])))
+        np.testing.assert_allclose(table.lookup('IPPI_LPM', 2002, 3, np.array([2009, 2010]), np.array([12, 1])),
+                                   [cache('IPPI_LPM', 2002, 3, 2009, 12), cache('IPPI_LPM', 2002, 3, 2010, 1)])
+
+    def test_context(self):
+
+        context = EscalationContext(2005, 2015)
+
+        self.assertRaises(AttributeError, setattr, context, 'first_year', 2000)
+        self.assertRaises(ValueError, context.escalators, 'IPPI_OAI', 2003, 9, 2020, 1)
+        self.assertAlmostEqual(context.escalators('IPPI_OAI', 2003, 9, 2009, 12),
+                               EscalatorCache()('IPPI_OAI', 2003, 9, 2009, 12))
+
+    def test_store(self):
+
+        store = os.path.join(tempfile.mkdtemp(), 'ppi_escalators.npy')
+        table = build_escalator_store(store, 2008, 2010)
+        mapped = EscalatorTable.load(store)
+
+        self.assertIsInstance(mapped.values, np.memmap)
+        self.assertFalse(mapped.values.flags.writeable)
+        np.testing.assert_array_equal(mapped.values, table.values)
+
+        context = EscalationContext.from_table(mapped)
+        self.assertEqual((context.first_year, context.last_year), (2008, 2010))
+        self.assertEqual(context.escalators('IPPI_OAI', 2003, 9, 2009, 12),
+                         table.lookup('IPPI_OAI', 2003, 9, 2009, 12))
+
+        saved = escalation.store_file, escalation._store
+        try:
+            escalation.store_file, escalation._store = store, None
+            self.assertIsInstance(escalation.escalator_store().values, np.memmap)
+            np.testing.assert_array_equal(escalation.escalators('IPPI_LPM', 2002, 3, [2008, 2010], [1, 12]),
+                                          table.lookup('IPPI_LPM', 2002, 3, [2008, 2010], [1, 12]))
+        finally:
+            escalation.store_file, escalation._store = saved
+
+    def test_threaded_batch(self):
+
+        context = EscalationContext(2005, 2015)
+        machine_rating = np.linspace(1500.0, 6000.0, 101)
+        sea_depth = np.array([0.0, 20.0, 45.0])[:, np.newaxis]
+        year = np.arange(2005, 2016)[:, np.newaxis, np.newaxis]
+
+        serial = bos_csm_batch(machine_rating, 126.0, 90.0, sea_depth, 100, 5950209.28, year, context=context)
+        threaded = bos_csm_batch(machine_rating, 126.0, 90.0, sea_depth, 100, 5950209.28, year, context=context,
+                                 n_threads=4)
+        np.testing.assert_array_equal(serial['bos_costs'], threaded['bos_costs'])
+        np.testing.assert_array_equal(serial['J'], threaded['J'])
+
+        serial = opex_csm_batch(1.7e9, machine_rating, sea_depth, year, context=context)
+        threaded = opex_csm_batch(1.7e9, machine_rating, sea_depth, year, context=context, n_threads=4)
+        np.testing.assert_array_equal(serial['avg_annual_opex'], threaded['avg_annual_opex'])
+
+    def test_threaded_batch_without_context(self):
+
+        machine_rating = np.linspace(1500.0, 6000.0, 11)
+        year = np.array([1998, 2035])[:, np.newaxis]
+
+        serial = bos_csm_batch(machine_rating, 126.0, 90.0, 20.0, 100, 5950209.28, year)
+        threaded = bos_csm_batch(machine_rating, 126.0, 90.0, 20.0, 100, 5950209.28, year, n_threads=2)
+        np.testing.assert_array_equal(serial['bos_costs'], threaded['bos_costs'])
+
+        serial = opex_csm_batch(1.7e9, machine_rating, 20.0, year)
+        threaded = opex_csm_batch(1.7e9, machine_rating, 20.0, year, n_threads=2)
+        np.testing.assert_array_equal(serial['avg_annual_opex'], threaded['avg_annual_opex'])
+
+    def test_base_year_costs(self):
+
+        machine_rating = np.linspace(1500.0, 6000.0, 11)
+        sea_depth = np.array([0.0, 20.0, 45.0])[:, np.newaxis]
+
+        base = bos_csm_base_costs(machine_rating, 126.0, 90.0, sea_depth, 100, 5950209.28, 1.1)
+        for year in (2009, 2014):
+            costs = base.escalate(year, 6)
+            out = bos_csm_batch(machine_rating, 126.0, 90.0, sea_depth, 100, 5950209.28, year, 6, 1.1)
+            for name in bos_breakdown_fields + ('bos_costs',):
+                np.testing.assert_allclose(costs[name], out[name], rtol=1e-12, atol=1e-6)
+
+        year = np.array([2010, 2012])[:, np.newaxis, np.newaxis]
+        base = opex_csm_base_costs(1.7e9, machine_rating, sea_depth)
+        np.testing.assert_allclose(base.escalate(year)['avg_annual_opex'],
+                                   opex_csm_batch(1.7e9, machine_rating, sea_depth, year)['avg_annual_opex'])
+
+        store = os.path.join(tempfile.mkdtemp(), 'opex_base.npz')
+        base.save(store)
+        loaded = BaseYearCosts.load(store)
+        self.assertEqual(base.terms, loaded.terms)
+        np.testing.assert_array_equal(base.escalate(year)['avg_annual_opex'],
+                                      loaded.escalate(year)['avg_annual_opex'])
+
+# OpenMDAO-free cores
+
+class Test_core(unittest.TestCase):
+
+    def test_import(self):
+
+        code = ('import sys\n'
+                'import plant_costsse.nrel_csm_bos.nrel_csm_bos_core, plant_costsse.nrel_csm_opex.nrel_csm_opex_core\n'
+                'print(sorted(set(m.split(".")[0] for m in sys.modules) & set(["openmdao", "fusedwind", "commonse"])))\n')
+        out = subprocess.check_output([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+        self.assertEqual(out.strip(), b'[]')
+
 if __name__ == "__main__":
     unittest.main()
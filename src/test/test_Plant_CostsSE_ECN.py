@@ -7,7 +7,20 @@ Copyright (c) NREL. All rights reserved.
 
 import unittest
 import sys
+import os
+import shutil
+import tempfile
+import time
+import warnings
+import numpy as np
 from plant_costsse.ecn_offshore_opex.ecn_offshore_opex import opex_ecn_offshore_component, opex_ecn_assembly
+from plant_costsse.ecn_offshore_opex.ecnomEngine import ecnomEngine, Workbook, ExcelError
+from plant_costsse.ecn_offshore_opex.ecnomPool import ecnomPool
+from plant_costsse.ecn_offshore_opex.ecnomCache import ecnomCache
+from plant_costsse.ecn_offshore_opex.ecnomFailures import simulate_failures, simulate_failure_chunks, failure_rates_from_workbook
+from plant_costsse.ecn_offshore_opex.ecnomTables import wt_fault_types, wt_failfreq_row, wt_failfreq_col
+from plant_costsse.ecn_offshore_opex.ecnomWeather import weather_windows, weather_cells, open_metocean
+from plant_costsse.ecn_offshore_opex.ecnomSurrogate import fit_surrogate, ecnomSurrogate, opex_ecn_surrogate_component
 
 # Plant Costs - OPEX
 
@@ -54,9 +67,431 @@ class Test_opex_ecn_assembly(unittest.TestCase):
         
         self.assertGreater(round(self.om.avg_annual_opex,1), 0.0)
 
+# Small synthetic workbook laid out like the ECN model
+ecn_cells = {('General', 6, 3): 100, ('General', 5, 8): 5000.0,
+             ('General', 7, 3): 20.0, ('General', 6, 8): 1800.0,
+             ('General', 12, 3): 1.0,  # winter accessibility
+             ('Data', 1, 1): 1.0, ('Data', 1, 2): 0.90,
+             ('Data', 2, 1): 50.0, ('Data', 2, 2): 0.95,
+             ('Data', 3, 1): 200.0, ('Data', 3, 2): 0.97,
+             ('OverviewResults', 20, 9): '=VLOOKUP(General!C6,Data!$A$1:$B$3,2,TRUE)',
+             ('OverviewResults', 51, 9): '=General!C6*General!H5*0.01/1000',
+             ('OverviewResults', 52, 9): '=I51/2/General!C12',
+             ('OverviewResults', 53, 9): '=General!H6*General!C6*0.02/1000',
+             ('OverviewResults', 54, 9): '=IF(General!C7>15,10,5)+ROUND(2.5,0)',
+             ('OverviewResults', 56, 9): '=SUM(I51:I54)'}
+
+# Headless ECN engine
+class Test_ecnomEngine(unittest.TestCase):
+
+    def setUp(self):
+
+        self.engine = ecnomEngine()
+        self.engine.book = Workbook(ecn_cells)
+        self.engine.saved = {('OverviewResults', 20, 9): 0.95, ('OverviewResults', 56, 9): 24.1}
+
+    def test_outputs(self):
+
+        self.assertAlmostEqual(self.engine.getCell(20, 9), 0.95)
+        self.assertAlmostEqual(self.engine.getCell(51, 9), 5.0)
+        self.assertAlmostEqual(self.engine.getCell(54, 9), 13.0)
+        self.assertAlmostEqual(self.engine.getCell(56, 9), 24.1)
+
+    def test_setCell(self):
+
+        self.engine.setCell(6, 3, 10)
+        self.assertAlmostEqual(self.engine.getCell(20, 9), 0.90)
+        self.assertAlmostEqual(self.engine.getCell(56, 9), 14.11)
+
+    def test_batch(self):
+
+        self.engine.set_cells({(6, 3): 10, (7, 3): 10.0})
+        self.engine.calculate_once()
+        col = [row[0] for row in self.engine.get_range('OverviewResults', 51, 9, 54, 9)]
+        self.assertAlmostEqual(col[0], 0.5)
+        self.assertAlmostEqual(col[3], 8.0)
+
+    def test_verify(self):
+
+        self.assertEqual(self.engine.verify([(20, 9), (56, 9)]), [])
+        self.engine.setCell(6, 3, 10)
+        self.assertEqual(len(self.engine.verify([(20, 9), (56, 9)])), 2)
+
+    def test_errors(self):
+
+        book = self.engine.book
+        book.set('X', 1, 1, '=1/0')
+        book.set('X', 1, 2, '=IFERROR(A1,7)')
+        book.set('X', 1, 3, '=FOO(1)+rate')
+        self.assertRaises(ExcelError, book.value, 'X', 1, 1)
+        self.assertEqual(book.value('X', 1, 2), 7.0)
+        self.assertRaises(ExcelError, book.value, 'X', 1, 3)
+        self.assertEqual(book.unsupported, {('X', 1, 3): ['FOO()', 'rate']})
+
+        # unsupported names are only fatal where the outputs depend on them
+        self.engine.check()
+        book.set('OverviewResults', 53, 9, '=X!C1')
+        self.assertRaises(NotImplementedError, self.engine.check)
+        book.set('X', 1, 3, 2.0)
+        self.engine.check()
+
+    def test_whole_columns(self):
+
+        book = self.engine.book
+        book.set('X', 1, 1, '=SUM(Data!A:A)')
+        book.set('X', 1, 2, '=VLOOKUP(50,Data!$A:$B,2,FALSE)')
+        book.set('X', 1, 3, '=SUM(Data!1:1)')
+        self.assertEqual(book.value('X', 1, 1), 251.0)
+        self.assertEqual(book.value('X', 1, 2), 0.95)
+        self.assertAlmostEqual(book.value('X', 1, 3), 1.9)
+
+        book.set('Data', 4, 1, '=X!C1')
+        self.assertEqual(book.value('X', 1, 1), 251.0 + 1.9)
+
+    def test_long_chain(self):
+
+        book = self.engine.book
+        book.set('Chain', 1, 1, 1.0)
+        for row in range(2, 5001):
+            book.set('Chain', row, 1, '=A{}+1'.format(row - 1))
+        book.set('Chain', 1, 2, '=SUM(A1:A5000)')
+        self.assertEqual(book.value('Chain', 5000, 1), 5000.0)
+        self.assertEqual(book.value('Chain', 1, 2), 5000*5001/2.0)
+
+        book.set('Chain', 1, 1, '=A5000')
+        self.assertRaises(ValueError, book.value, 'Chain', 1, 2)
+
+# the real ECN model, saved as .xlsx, against the values Excel cached in it
+class Test_ecnomEngine_parity(unittest.TestCase):
+
+    ssfile = "Path to ECN model saved as .xlsx"
+
+    def setUp(self):
+
+        if not (os.path.isfile(self.ssfile) and self.ssfile.lower().endswith(('.xlsx', '.xlsm'))):
+            self.skipTest('ECN model workbook not available')
+        self.engine = ecnomEngine()
+        self.engine.ssopen(self.ssfile)
+
+    def test_outputs(self):
+
+        # OverviewResults I20, I51:I56 and the printCosts block
+        self.assertEqual(self.engine.verify(rtol=1e-9), [])
+
+# synthetic workbook saved as .xlsx for the python backend
+class ECNWorkbookTestCase(unittest.TestCase):
+
+    def save(self, cells):
+
+        import openpyxl
+
+        book = openpyxl.Workbook()
+        book.remove(book.active)
+        for (sheet, irow, icol), value in sorted(cells.items()):
+            if sheet not in book.sheetnames:
+                book.create_sheet(sheet)
+            book[sheet].cell(row=irow, column=icol, value=value)
+        book.save(self.ssfile)
+
+    def component(self, cache=None):
+
+        om = opex_ecn_offshore_component(self.ssfile, backend='python', cache=cache)
+        om.turbine_cost = 9000000.0
+        om.machine_rating = 5000.0
+        om.turbine_number = 100
+        om.project_lifetime = 20.0
+        return om
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.ssfile = os.path.join(self.tmpdir, 'ecn.xlsx')
+        self.save(ecn_cells)
+        self.om = self.component()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+# ECN Offshore OPEX with the python backend
+class Test_opex_ecn_python_backend(ECNWorkbookTestCase):
+
+    def test_functionality(self):
+
+        self.om.run()
+
+        self.assertAlmostEqual(self.om.availability, 0.95)
+        self.assertAlmostEqual(self.om.avg_annual_opex, 24.1 * 1000 + 21.0 * 100 * 5000.0)
+        self.assertAlmostEqual(self.om.opex_breakdown.corrective_opex, 7500.0)
+
+    def test_input_delta(self):
+
+        self.om.run()
+        self.om.run()
+        self.assertEqual(self.om.writes_saved, 4)
+        self.assertEqual(self.om.reads_saved, 1)
+
+        self.om.turbine_cost = 4500000.0
+        self.om.run()
+        self.assertEqual(self.om.writes_saved, 7)
+        self.assertEqual(self.om.reads_saved, 1)
+        self.assertAlmostEqual(self.om.opex_breakdown.preventative_opex, 1800.0)
+
+    def test_cache(self):
+
+        dbfile = os.path.join(self.tmpdir, 'ecn.db')
+
+        om = self.component(dbfile)
+        om.run()
+        self.assertEqual(om.cache.stats()['misses'], 1)
+        om.close()
+
+        om = self.component(dbfile)
+        om.run()
+        self.assertEqual(om.cache.stats()['hits'], 1)
+        self.assertEqual(om.cell_cache, {})  # spreadsheet untouched
+        self.assertAlmostEqual(om.opex_breakdown.corrective_opex, 7500.0)
+        om.close()
+
+        # keys hold the backend and compare numbers by value
+        python = ecnomCache(dbfile, self.ssfile, backend='python')
+        excel = ecnomCache(dbfile, self.ssfile, backend='excel')
+        self.assertEqual(python.key({(6, 8): 5}), python.key({(6L, 8): np.float64(5.0)}))
+        self.assertNotEqual(python.key({(6, 8): 5.0}), excel.key({(6, 8): 5.0}))
+        self.assertEqual(excel.get(dict(om.last_inputs)), None)
+        python.close()
+        excel.close()
+
+        # editing the workbook invalidates its entries
+        cells = dict(ecn_cells)
+        cells[('OverviewResults', 52, 9)] = '=I51'
+        self.save(cells)
+        om = self.component(dbfile)
+        self.assertEqual(om.cache.stats()['entries'], 0)
+        om.run()
+        self.assertEqual(om.cache.stats()['misses'], 1)
+        self.assertAlmostEqual(om.opex_breakdown.corrective_opex, 10000.0)
+        om.close()
+
+    def test_weather_cells(self):
+
+        stats = {'accessibility': np.array([0.5, 0.7, 0.9, 0.8, 0.725])}
+        self.om.weather_cells = weather_cells(stats, {(12, 3): ('accessibility', 'win')})
+        self.om.run()
+        self.assertAlmostEqual(self.om.opex_breakdown.corrective_opex, 5000.0 + 5000.0)
+
+        self.om.weather_cells = {(12, 3): 0.5, (7, 3): 10.0}  # project_lifetime
+        self.assertRaises(ValueError, self.om.run)
+
+    def test_weather_cells_removed(self):
+
+        for cache in (None, os.path.join(self.tmpdir, 'ecn.db')):
+            om = self.component(cache)
+            for cells, corrective in (({}, 7500.0), ({(12, 3): 0.5}, 10000.0), ({}, 7500.0),
+                                      ({(12, 3): 0.25}, 15000.0), ({}, 7500.0)):
+                om.weather_cells = cells
+                om.run()
+                self.assertAlmostEqual(om.opex_breakdown.corrective_opex, corrective)
+            if cache is None:
+                self.assertEqual(om.ecnxls.getInputCell(12, 3), 1.0)
+            else:
+                self.assertEqual(om.cache.stats()['hits'], 2)  # repeated {}: workbook untouched
+            om.close()
+
+        # the entry without weather cells holds the workbook's own accessibility
+        om = self.component(cache)
+        om.turbine_number = 50
+        om.weather_cells = {(12, 3): 0.5}
+        om.run()
+        om.weather_cells = {}
+        om.run()
+        om.close()
+        om = self.component(cache)
+        om.turbine_number = 50
+        om.run()
+        self.assertEqual(om.cache.stats()['hits'], 1)
+        self.assertAlmostEqual(om.opex_breakdown.corrective_opex, 3750.0)
+        om.close()
+
+# stand-in backend that hangs for plants of 13 turbines
+class HangingEngine(ecnomEngine):
+
+    def calculate_once(self):
+        if self.getInputCell(6, 3) == 13:
+            time.sleep(60.0)
+
+class Test_ecnomPool(ECNWorkbookTestCase):
+
+    def test_order(self):
+
+        nturb = [10, 100, 250, 40, 60]
+        with ecnomPool(self.ssfile, n_workers=2, backend='python') as pool:
+            out = pool.evaluate(9000000.0, 5000.0, nturb, 20.0)
+
+        for i, n in enumerate(nturb):
+            self.om.turbine_number = n
+            self.om.run()
+            self.assertAlmostEqual(out['avg_annual_opex'][i], self.om.avg_annual_opex)
+            self.assertAlmostEqual(out['availability'][i], self.om.availability)
+
+    def test_timeout(self):
+
+        with ecnomPool(self.ssfile, n_workers=2, backend=HangingEngine, timeout=0.5, retries=0) as pool:
+            self.assertRaises(RuntimeError, pool.evaluate, 9000000.0, 5000.0, [10, 13, 100], 20.0)
+            self.assertEqual(pool.restarts, 1)
+
+            out = pool.evaluate(9000000.0, 5000.0, [10, 100], 20.0)
+            self.assertAlmostEqual(out['availability'][1], 0.95)
+
+# ECN surrogate fitted to a smooth stand-in for the spreadsheet
+def smooth_opex(turbine_cost, machine_rating, turbine_number, project_lifetime):
+
+    turbine_cost, machine_rating, turbine_number = np.broadcast_arrays(
+        np.asarray(turbine_cost, dtype=float), np.asarray(machine_rating, dtype=float),
+        np.asarray(turbine_number, dtype=float))
+    out = {'availability': 0.97 - 0.02*np.exp(-turbine_number/100.0),
+           'corrective_opex': turbine_number*(30.0*machine_rating**0.9 + 0.001*turbine_cost),
+           'preventative_opex': turbine_number*turbine_cost*0.002/np.sqrt(project_lifetime),
+           'other_opex': 3.0*turbine_number*machine_rating,
+           'lease_opex': 21.0*turbine_number*machine_rating}
+    out['avg_annual_opex'] = out['corrective_opex'] + out['preventative_opex'] + out['other_opex'] + out['lease_opex']
+    return out
+
+class Test_ecnomSurrogate(unittest.TestCase):
+
+    def setUp(self):
+
+        self.surrogate = fit_surrogate(smooth_opex, {'turbine_cost': (3e6, 12e6), 'machine_rating': (2000.0, 8000.0)},
+                                       tol=1e-4, n_max=100)
+
+    def test_accuracy(self):
+
+        values, gradients = self.surrogate.evaluate(turbine_cost=[4e6, 9e6], machine_rating=[2500.0, 5000.0])
+        exact = smooth_opex([4e6, 9e6], [2500.0, 5000.0], 100, 20.0)
+        for name in exact:
+            self.assertTrue(np.allclose(values[name], exact[name], rtol=1e-3))
+        self.assertLess(self.surrogate.relative_error, 1e-3)
+
+    def test_component(self):
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'ecn_surrogate.npz')
+            self.surrogate.save(filename)
+            om = opex_ecn_surrogate_component(filename)
+        finally:
+            shutil.rmtree(tmpdir)
+
+        om.turbine_cost = 9000000.0
+        om.machine_rating = 5000.0
+        om.run()
+        J = om.provideJ()
+        opex = om.avg_annual_opex
+
+        om.turbine_cost += 1.0
+        om.run()
+        self.assertAlmostEqual(J[4, 0], om.avg_annual_opex - opex, places=3)
+        self.assertEqual(J[4, 2], 0.0)
+
+        self.assertEqual(om.relative_error, self.surrogate.relative_error)
+        self.assertEqual(om.opex_error, self.surrogate.error['avg_annual_opex'])
+
+        om.turbine_number = 80
+        self.assertRaises(ValueError, om.run)
+        om.turbine_number = 100
+
+        om.turbine_cost = 20e6
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            om.run()
+        self.assertEqual(len(caught), 1)
+        self.assertIn('turbine_cost', str(caught[0].message))
+
+# Monte Carlo failure and repair simulation
+class Test_ecnomFailures(unittest.TestCase):
+
+    def setUp(self):
+
+        self.rate = dict((code, 0.1) for code in wt_fault_types)
+        self.rate['MD'] = 5.0  # remote resets
+        self.mttr = dict((code, 24.0) for code in wt_fault_types)
+        self.mttr['MD'] = 2.0
+        self.cost = dict((code, 20000.0) for code in wt_fault_types)
+        self.cost['MD'] = 500.0
+
+    def test_means(self):
+
+        out = simulate_failures(self.rate, self.mttr, self.cost, turbine_number=50, years=20, realizations=200)
+
+        downtime = sum(self.rate[code] * self.mttr[code] for code in wt_fault_types)
+        opex = 50 * sum(self.rate[code] * self.cost[code] for code in wt_fault_types)
+        self.assertAlmostEqual(out['availability_mean'], 1.0 - downtime / 8760.0, places=5)
+        self.assertAlmostEqual(out['corrective_opex_mean'] / opex, 1.0, places=2)
+        self.assertAlmostEqual(out['failures']['MD'] / (5.0 * 50 * 20), 1.0, places=2)
+        self.assertLess(out['availability_p10'], out['availability_p90'])
+
+    def test_chunks(self):
+
+        chunks = list(simulate_failure_chunks(self.rate, self.mttr, self.cost, turbine_number=10, years=5,
+                                              realizations=25, max_samples=10 * 5 * 18 * 4))
+        self.assertEqual([len(c['availability']) for c in chunks], [4] * 6 + [1])
+        self.assertEqual(chunks[0]['failures'].shape, (4, len(wt_fault_types)))
+
+    def test_workbook_rates(self):
+
+        engine = ecnomEngine()
+        engine.book = Workbook(dict((('FaultTypesWT', row, wt_failfreq_col), 0.01 * row)
+                                    for row in wt_failfreq_row.values()))
+        rates = failure_rates_from_workbook(engine)
+        self.assertAlmostEqual(rates['MDK10'], 0.43)
+
+# Weather window statistics
+class Test_ecnomWeather(unittest.TestCase):
+
+    def setUp(self):
+
+        rs = np.random.RandomState(0)
+        n = 24 * 365 * 2
+        wave = 1.5 + 0.5*np.sin(np.arange(n) * 2*np.pi / 8766.0) + np.cumsum(rs.randn(n)) * 0.02 % 1.0 - 0.5
+        wind = 10.0 + 3.0*rs.randn(n)
+        self.series = np.column_stack([wave, wind]).astype('float32')
+
+    def test_brute_force(self):
+
+        out = weather_windows(self.series, 1.5, 14.0, 6, chunk_hours=1000)
+
+        ok = (self.series[:, 0] <= 1.5) & (self.series[:, 1] <= 14.0)
+        n = len(ok)
+        start = np.array([t + 6 <= n and ok[t:t + 6].all() for t in range(n)])
+        first = start & np.concatenate([[True], ~ok[:-1]])
+        starts = np.nonzero(start)[0]
+        waits = starts[np.searchsorted(starts, np.arange(starts[-1] + 1))] - np.arange(starts[-1] + 1)
+
+        self.assertEqual(out['windows'][-1], first.sum())
+        self.assertAlmostEqual(out['accessibility'][-1], ok.mean())
+        self.assertAlmostEqual(out['mean_wait'][-1], waits.mean())
+        self.assertEqual(out['censored'][-1], n - starts[-1] - 1)
+
+    def test_memmap(self):
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'site.npy')
+            np.save(filename, self.series)
+            a = weather_windows(open_metocean(filename), 1.5, 14.0, 6, chunk_hours=777)
+        finally:
+            shutil.rmtree(tmpdir)
+        b = weather_windows(self.series, 1.5, 14.0, 6, chunk_hours=len(self.series))
+
+        for key in b:
+            self.assertTrue(np.allclose(a[key], b[key]))
+
+        cells = weather_cells(b, {(12, 3): ('accessibility', 'win')})
+        self.assertAlmostEqual(cells[(12, 3)], b['accessibility'][0])
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         Test_opex_ecn_offshore_component.ssfile = sys.argv.pop()
         Test_opex_ecn_assembly.ssfile = Test_opex_ecn_offshore_component.ssfile
+        Test_ecnomEngine_parity.ssfile = Test_opex_ecn_offshore_component.ssfile
 
     unittest.main()
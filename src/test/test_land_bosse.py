@@ -8,7 +8,22 @@ Copyright (c) NREL. All rights reserved.
 """
 
 import unittest
+import numpy as np
+from scipy.sparse.csgraph import minimum_spanning_tree
+from scipy.spatial.distance import cdist
 import _landbos
+from plant_costsse.nrel_land_bosse.nrel_land_bosse_core import land_bos, land_bos_batch, land_bos_jacobian, \
+    land_bos_records, land_bos_breakdown, land_bos_interconnect, IncrementalLandBOS, component_dependencies, \
+    fused_deriv_inputs, fused_defaults
+from plant_costsse.nrel_land_bosse.nrel_land_bosse_collector import collector_tree, collector_length, \
+    collector_lengths
+from plant_costsse.nrel_land_bosse.nrel_land_bosse_roads import RoadNetwork, TerrainRaster, road_length
+from plant_costsse.nrel_land_bosse.nrel_land_bosse import land_bos_components
+
+
+# inputs shared by the fused model tests
+farm_inputs = {'machine_rating': 2000.0, 'rotor_diameter': 110.0, 'hub_height': 100.0, 'turbine_number': 100,
+    'voltage': 137.0, 'distInter': 5.0, 'layout': 'COMPLEX', 'turbine_cost': 2e6, 'RNA_mass': 88000.0}
 
 
 class TestDefaultCosts(unittest.TestCase):
@@ -272,6 +287,366 @@ class TestDefaultCosts(unittest.TestCase):
         self.assertAlmostEqual(285646716, cost, delta=0.5)
 
 
+    def test_landBOS(self):
+
+        values = _landbos.landBOS(self.rating, self.diameter, self.hubHeight,
+            self.nTurbines, self.voltage, self.distToInterconnect, self.terrain,
+            self.layout, self.soil, self.TCC*self.rating, self.towerTopMass)
+
+        cost = _landbos.totalCost(self.rating,
+            self.diameter, self.hubHeight, self.nTurbines, self.voltage,
+            self.distToInterconnect, self.terrain, self.layout, self.soil,
+            self.farmSize, self.TCC, self.towerTopMass, self.constructionTime,
+            self.buildingSize, self.tempMetTowers, self.permanentMetTowers,
+            self.weatherDelayDays, self.craneBreakdowns, self.accessRoadEntrances)
+
+        self.assertAlmostEqual(cost - self.TCC*self.rating*self.nTurbines, values['bos_costs'], delta=0.5)
+        self.assertEqual(self.constructionTime, values['constructionTime'])
+        self.assertEqual(_landbos.foundationCost(self.rating, self.diameter,
+            self.towerTopMass, self.hubHeight, self.soil, self.nTurbines), values['foundation'])
+        self.assertEqual((len(_landbos.cost_items), len(_landbos.deriv_vars)), values['dcost'].shape)
+
+
+    def test_landBOS_gradient(self):
+
+        x = {'rating': self.rating, 'diameter': self.diameter, 'hubHt': 90.0,
+            'turbineCost': self.TCC*self.rating, 'topMass': self.towerTopMass,
+            'multiplier': 1.2}
+
+        def bos(**kwargs):
+            args = dict(x, **kwargs)
+            return _landbos.landBOS(args['rating'], args['diameter'], args['hubHt'],
+                self.nTurbines, self.voltage, self.distToInterconnect, self.terrain,
+                self.layout, self.soil, args['turbineCost'], args['topMass'],
+                args['multiplier'])
+
+        dbos = bos()['dbos_costs']
+
+        for j, name in enumerate(_landbos.deriv_vars):
+            h = 1e-6*x[name]
+            fd = (bos(**{name: x[name]+h})['bos_costs'] - bos(**{name: x[name]-h})['bos_costs'])/(2*h)
+            self.assertAlmostEqual(fd, dbos[j], delta=1e-6*abs(fd))
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+
+        self.rating = np.array([1500.0, 2000.0, 3000.0])
+        self.diameter = np.array([80.0, 110.0, 120.0])
+        self.hubHeight = np.array([80.0, 100.0, 110.0])
+        self.towerTopMass = np.array([60.0, 88.0, 150.0])
+        self.nTurbines = np.array([50, 100, 150])
+        self.terrain = np.array([0, 1, 2])
+        self.layout = np.array([1, 0, 2])
+        self.soil = np.array([0, 1, 0])
+
+        self.farmSize = _landbos.farmSize_batch(self.rating, self.nTurbines)
+
+
+    def test_farmSize(self):
+
+        for i in range(3):
+            self.assertEqual(_landbos.farmSize(self.rating[i], self.nTurbines[i]), self.farmSize[i])
+
+
+    def test_foundation(self):
+
+        cost = _landbos.foundationCost_batch(self.rating, self.diameter, self.towerTopMass,
+            self.hubHeight, self.soil, self.nTurbines)
+        ddiameter, dtopMass, dhubHt = _landbos.deriv_foundationCost_batch(self.rating,
+            self.diameter, self.towerTopMass, self.nTurbines)
+
+        for i in range(3):
+            self.assertEqual(_landbos.foundationCost(self.rating[i], self.diameter[i],
+                self.towerTopMass[i], self.hubHeight[i], self.soil[i], self.nTurbines[i]), cost[i])
+            self.assertEqual(_landbos.deriv_foundationCost(self.rating[i], self.diameter[i],
+                self.towerTopMass[i], self.nTurbines[i]), (ddiameter[i], dtopMass[i], dhubHt[i]))
+
+
+    def test_electricalMaterials(self):
+
+        cost = _landbos.electricalMaterialsCost_batch(self.terrain, self.layout, self.farmSize,
+            self.diameter, self.nTurbines)
+
+        for i in range(3):
+            self.assertEqual(_landbos.electricalMaterialsCost(self.terrain[i], self.layout[i],
+                self.farmSize[i], self.diameter[i], self.nTurbines[i]), cost[i])
+
+
+    def test_insurance(self):
+
+        result = _landbos.insuranceMultiplierAndCost_batch(1000.0, self.farmSize, 1e6)
+
+        for i in range(3):
+            scalar = _landbos.insuranceMultiplierAndCost(1000.0, self.farmSize[i], 1e6)
+            self.assertEqual(scalar['alpha'], result['alpha'][i])
+            self.assertEqual(scalar['cost'], result['cost'][i])
+
+
+    def test_broadcast(self):
+
+        cost = _landbos.transportationCost_batch(1000.0, self.rating[:, np.newaxis],
+            self.nTurbines, 100.0)
+        self.assertEqual((3, 3), cost.shape)
+        self.assertEqual(_landbos.transportationCost(1000.0, self.rating[2], self.nTurbines[1],
+            100.0), cost[2, 1])
+
+        constructionTime = _landbos.defaultConstructionTime_batch(self.nTurbines)
+        self.assertEqual(np.intc, constructionTime.dtype)
+
+
+    def test_landBOS(self):
+
+        turbineCost = 1000.0*self.rating
+
+        serial = _landbos.landBOS_batch(self.rating, self.diameter, self.hubHeight,
+            self.nTurbines, 137.0, 5.0, self.terrain, self.layout, self.soil,
+            turbineCost, self.towerTopMass, n_threads=1)
+        parallel = _landbos.landBOS_batch(self.rating, self.diameter, self.hubHeight,
+            self.nTurbines, 137.0, 5.0, self.terrain, self.layout, self.soil,
+            turbineCost, self.towerTopMass, n_threads=3)
+
+        for i in range(3):
+            values = _landbos.landBOS(self.rating[i], self.diameter[i], self.hubHeight[i],
+                self.nTurbines[i], 137.0, 5.0, self.terrain[i], self.layout[i], self.soil[i],
+                turbineCost[i], self.towerTopMass[i])
+            for name in values:
+                np.testing.assert_array_equal(values[name], serial[name][i])
+                np.testing.assert_array_equal(serial[name][i], parallel[name][i])
+
+
+    def test_landBOS_records(self):
+
+        turbineCost = 1000.0*self.rating
+
+        batch = _landbos.landBOS_batch(self.rating, self.diameter, self.hubHeight[:, np.newaxis],
+            self.nTurbines, 137.0, 5.0, self.terrain, self.layout, self.soil,
+            turbineCost, self.towerTopMass)
+        records = _landbos.landBOS_records(self.rating, self.diameter, self.hubHeight[:, np.newaxis],
+            self.nTurbines, 137.0, 5.0, self.terrain, self.layout, self.soil,
+            turbineCost, self.towerTopMass, n_threads=2)
+
+        self.assertEqual((3, 3), records.shape)
+        self.assertEqual(_landbos.record_fields, records.dtype.names)
+        for name in _landbos.record_fields:
+            np.testing.assert_array_equal(batch[name], records[name])
+
+
+class TestCore(unittest.TestCase):
+
+    def test_land_bos(self):
+
+        values = land_bos(2000.0, 110.0, 100.0, 100, 137.0, 5.0, 'RIDGE_TOP', 'COMPLEX',
+            'BOUYANT', 2e6, 88000.0)
+        expected = _landbos.landBOS(2000.0, 110.0, 100.0, 100, 137.0, 5.0, 1, 1, 1, 2e6, 88.0)
+
+        self.assertEqual(expected['bos_costs'], values['bos_costs'])
+        self.assertEqual(expected['dbos_costs'][2]/1000.0, land_bos_jacobian(values)[2])
+        self.assertRaises(ValueError, land_bos, 2000.0, 110.0, 100.0, 100, 137.0, 5.0, 'HILLY')
+
+    def test_land_bos_batch(self):
+
+        terrain = np.array(['FLAT_TO_ROLLING', 'MOUNTAINOUS'])
+        values = land_bos_batch(np.array([1500.0, 3000.0]), 110.0, 100.0, 100, 137.0, 5.0,
+            terrain, 'SIMPLE', 0, 2e6, 88000.0)
+
+        self.assertEqual((2, 6), land_bos_jacobian(values).shape)
+        for i in range(2):
+            self.assertEqual(land_bos([1500.0, 3000.0][i], 110.0, 100.0, 100, 137.0, 5.0,
+                terrain[i], 'SIMPLE', 'STANDARD', 2e6, 88000.0)['bos_costs'], values['bos_costs'][i])
+
+    def test_incremental(self):
+
+        inputs = dict(farm_inputs)
+
+        model = IncrementalLandBOS(land_bos_components())
+        values = model.evaluate(**inputs)
+        self.assertEqual(([], 19), (model.skipped, len(model.evaluated)))
+        self.assertAlmostEqual(land_bos(**inputs)['bos_costs'], values['bos_costs'], delta=1e-6)
+
+        self.assertEqual(set(['transportation', 'powerperf', 'foundation', 'erection', 'insurance',
+            'markup', 'total']), component_dependencies()['hub_height'])
+
+        for name, value in (('hub_height', 90.0), ('terrain', 'RIDGE_TOP'), ('turbine_number', 80),
+                ('turbine_cost', 2.2e6)):
+            inputs[name] = value
+            values = model.evaluate(**inputs)
+            self.assertEqual(len(component_dependencies()[name]), len(model.evaluated))
+            full = IncrementalLandBOS(land_bos_components()).evaluate(**inputs)
+            for key in full:
+                self.assertEqual(full[key], values[key])
+
+        model.evaluate(**inputs)
+        self.assertEqual(([], 19), (model.evaluated, len(model.skipped)))
+
+        inputs['turbine_cost'] = np.array(2.2e6)
+        model.evaluate(**inputs)
+        self.assertEqual(([], 19), (model.evaluated, len(model.skipped)))
+
+    def test_breakdown(self):
+
+        values = land_bos_records(np.array([1500.0, 3000.0]), 110.0, 100.0, 100, 137.0, 5.0,
+            'RIDGE_TOP', 'COMPLEX', turbine_cost=2e6, RNA_mass=88000.0, multiplier=1.1,
+            transportDist=50.0)
+        breakdown = land_bos_breakdown(values, 2e6, 100, 1.1)
+
+        np.testing.assert_allclose(sum(breakdown.values()), values['bos_costs'], rtol=1e-12)
+        np.testing.assert_allclose(breakdown['foundation_and_substructure_costs'], 1.1*values['foundation'])
+        self.assertTrue(np.all(breakdown['transportation_costs'] > 0.0))
+
+    def test_interconnect(self):
+
+        voltage = np.array([[69.0, 138.0, 230.0], [69.0, 138.0, 230.0]])
+        distInter = np.array([[40.0, 10.0, 2.0], [1.0, 30.0, 60.0]])
+        best = land_bos_interconnect(np.array([1500.0, 3000.0]), 100, voltage, distInter)
+
+        for i in range(2):
+            bos = land_bos_batch([1500.0, 3000.0][i], 110.0, 100.0, 100, voltage[i], distInter[i],
+                turbine_cost=2e6, RNA_mass=88000.0)
+            self.assertEqual(np.argmin(bos['bos_costs']), best['index'][i])
+            self.assertAlmostEqual(bos['substation'][best['index'][i]] + bos['transmission'][best['index'][i]],
+                best['cost'][i], delta=1e-6)
+            self.assertEqual(distInter[i, best['index'][i]], best['distInter'][i])
+
+
+class TestCollector(unittest.TestCase):
+
+    def setUp(self):
+
+        x, y = np.meshgrid(np.arange(10)*400.0, np.arange(4)*900.0)
+        self.turbines = np.column_stack([x.ravel(), y.ravel()])
+        self.substation = np.array([2000.0, -500.0])
+
+    def test_tree(self):
+
+        parent, length = collector_tree(self.turbines, self.substation)
+
+        # rows strung at 400 m, joined at 900 m, and 500 m to the substation
+        self.assertAlmostEqual(36*400.0 + 3*900.0 + 500.0, length.sum())
+        self.assertEqual(1, np.sum(parent < 0))
+
+    def test_minimum_spanning_tree(self):
+
+        np.random.seed(1)
+        turbines = np.random.uniform(0.0, 20000.0, (1000, 2))
+        substation = np.array([10000.0, 10000.0])
+
+        points = np.vstack([substation, turbines])
+        exact = minimum_spanning_tree(cdist(points, points)).sum()
+        self.assertAlmostEqual(exact, collector_length(turbines, substation), delta=1e-6)
+
+    def test_capacity(self):
+
+        parent, length = collector_tree(self.turbines, self.substation, capacity=10)
+
+        feeder = np.arange(len(parent))
+        while np.any(parent[feeder] >= 0):
+            feeder = np.where(parent[feeder] >= 0, parent[feeder], feeder)
+        self.assertEqual(10, np.bincount(feeder).max())
+        self.assertTrue(length.sum() > collector_length(self.turbines, self.substation))
+
+        lengths = collector_lengths(np.array([self.turbines, 2.0*self.turbines]), self.substation, 10)
+        self.assertEqual(length.sum(), lengths[0])
+
+    def test_cable_length(self):
+
+        inputs = dict(farm_inputs)
+        values = land_bos(**inputs)
+
+        # the cable length implied by the rotor diameter reproduces the model
+        same = land_bos(cable_length=100*110.0*fused_defaults['cable_diameters'], **inputs)
+        self.assertAlmostEqual(values['bos_costs'], same['bos_costs'], delta=1e-6)
+        calibrated = land_bos(cable_length=100*110.0*8.0, cable_diameters=8.0, **inputs)
+        self.assertAlmostEqual(values['bos_costs'], calibrated['bos_costs'], delta=1e-6)
+
+        longer = land_bos(cable_length=2*100*110.0*fused_defaults['cable_diameters'], **inputs)
+        self.assertTrue(longer['elecmat'] > values['elecmat'])
+        self.assertEqual(values['foundation'], longer['foundation'])
+        self.assertAlmostEqual(longer['bos_costs'], IncrementalLandBOS(land_bos_components()).evaluate(
+            cable_length=2*100*110.0*fused_defaults['cable_diameters'], **inputs)['bos_costs'], delta=1e-6)
+
+        batch = land_bos_batch(cable_length=np.array([0.0, 2*100*110.0*fused_defaults['cable_diameters']]),
+            **inputs)
+        np.testing.assert_allclose(batch['bos_costs'], [values['bos_costs'], longer['bos_costs']])
+        self.assertEqual(longer['dbos_costs'][0], batch['dbos_costs'][1, 0])
+
+    def test_jacobian(self):
+
+        inputs = dict(farm_inputs, multiplier=1.1, cable_length=60000.0)
+        check_jacobian(self, inputs)
+
+
+def check_jacobian(test, inputs):
+    """
+    land_bos_jacobian of inputs against central finite differences of every fused_deriv_input
+    """
+
+    J = land_bos_jacobian(land_bos(**inputs))
+    for j, name in enumerate(fused_deriv_inputs):
+        h = 1e-6 * inputs[name]
+        plus = land_bos(**dict(inputs, **{name: inputs[name] + h}))['bos_costs']
+        minus = land_bos(**dict(inputs, **{name: inputs[name] - h}))['bos_costs']
+        test.assertAlmostEqual(1.0, J[j] / ((plus - minus) / (2*h)), delta=1e-5, msg=name)
+
+
+class TestRoads(unittest.TestCase):
+
+    def setUp(self):
+
+        x, y = np.meshgrid(np.arange(10)*400.0, np.arange(4)*900.0)
+        self.turbines = np.column_stack([x.ravel(), y.ravel()])
+        self.entrances = np.array([[-300.0, 0.0], [3900.0, 3000.0]])
+
+    def test_network(self):
+
+        # rows at 400 m; the bottom two rows joined at 900 m from one entrance, the top
+        # two from the other
+        self.assertAlmostEqual(36*400.0 + 2*900.0 + 300.0 + 300.0*np.sqrt(2.0),
+            road_length(self.turbines, self.entrances))
+
+        raster = TerrainRaster(np.full((10, 10), 2.0), cell_size=1000.0)
+        network = RoadNetwork(self.turbines, self.entrances, raster)
+        self.assertAlmostEqual(2.0*network.length, network.weighted_length)
+
+    def test_move(self):
+
+        raster = TerrainRaster(1.0 + np.arange(100.0).reshape(10, 10)/100.0, cell_size=500.0)
+        network = RoadNetwork(self.turbines, self.entrances, raster)
+        for i, x, y in ((3, 1300.0, 200.0), (39, 3500.0, 2500.0), (3, 1250.0, -100.0), (12, 3000.0, -900.0)):
+            network.move(i, x, y)
+            full = RoadNetwork(network.turbines.copy(), self.entrances, raster)
+            self.assertAlmostEqual(full.weighted_length, network.weighted_length, delta=1e-6)
+        self.assertEqual(39, len(network.edges) - 1)
+
+        turbines = network.turbines.copy()
+        turbines[[0, 20]] += 150.0
+        network.update(turbines)
+        self.assertAlmostEqual(RoadNetwork(turbines, self.entrances, raster).weighted_length,
+            network.weighted_length, delta=1e-6)
+
+    def test_road_length(self):
+
+        inputs = dict(farm_inputs)
+        values = land_bos(**inputs)
+
+        same = land_bos(road_length=100*110.0*fused_defaults['road_diameters'], **inputs)
+        self.assertAlmostEqual(values['bos_costs'], same['bos_costs'], delta=1e-6)
+        calibrated = land_bos(road_length=100*110.0*3.0, road_diameters=3.0, **inputs)
+        self.assertAlmostEqual(values['bos_costs'], calibrated['bos_costs'], delta=1e-6)
+
+        longer = land_bos(road_length=2*100*110.0*fused_defaults['road_diameters'], **inputs)
+        self.assertTrue(longer['roads'] > values['roads'])
+        self.assertEqual(values['elecmat'], longer['elecmat'])
+        self.assertAlmostEqual(longer['bos_costs'], IncrementalLandBOS(land_bos_components()).evaluate(
+            road_length=2*100*110.0*fused_defaults['road_diameters'], **inputs)['bos_costs'], delta=1e-6)
+
+    def test_jacobian(self):
+
+        inputs = dict(farm_inputs, multiplier=1.1, road_length=40000.0)
+        check_jacobian(self, inputs)
+        check_jacobian(self, dict(inputs, cable_length=60000.0))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -10,7 +10,7 @@ Copyright (c) NREL. All rights reserved.
 import unittest
 
 from landbos import Transportation, PowerPerformance, AccessRoads, Foundations, \
-    Erection, ElecMaterials, ElecInstallation, Insurance, Markup, Total
+    Erection, ElecMaterials, ElecInstallation, Insurance, Markup, Total, LandBOSFused
 from commonse.utilities import check_gradient_unit_test, check_for_missing_unit_tests
 
 
@@ -202,6 +202,27 @@ class TestTotal(unittest.TestCase):
         check_gradient_unit_test(self, comp)
 
 
+class TestLandBOSFused(unittest.TestCase):
+
+    def test1(self):
+
+        comp = LandBOSFused()
+        comp.machine_rating = 2000.0
+        comp.rotor_diameter = 110.0
+        comp.hub_height = 100.0
+        comp.turbine_number = 100
+        comp.voltage = 137.0
+        comp.distInter = 5.0
+        comp.terrain = 'FLAT_TO_ROLLING'
+        comp.layout = 'COMPLEX'
+        comp.soil = 'STANDARD'
+        comp.turbine_cost = 2000000.0
+        comp.RNA_mass = 88000.0
+        comp.multiplier = 1.3
+
+        check_gradient_unit_test(self, comp)
+
+
 
 
 if __name__ == '__main__':